@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Background task layer for Enhanced YouTube Downloader
+Runs blocking network and disk work on a QThreadPool; results reach the UI only through signals
+"""
+
+import logging
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+DEFAULT_MAX_THREADS = 16
+
+_pool = None
+
+
+def task_pool() -> QThreadPool:
+    """Shared pool for background tasks (separate from Qt's global pool)"""
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        # Downloads hold a slot for their whole run; keep room for short tasks
+        _pool.setMaxThreadCount(max(DEFAULT_MAX_THREADS, QThreadPool.globalInstance().maxThreadCount()))
+    return _pool
+
+
+class _Runnable(QRunnable):
+    def __init__(self, task):
+        super().__init__()
+        self.task = task
+
+    def run(self):
+        self.task._execute()
+
+
+class BackgroundTask(QObject):
+    """A unit of blocking work run on :func:`task_pool`.
+
+    ``func(task)`` runs off the GUI thread and talks back only by emitting
+    the task's signals, which Qt delivers to slots in the GUI thread. The
+    interface mirrors a QThread worker (``start``, ``isRunning``, ``wait``,
+    ``finished``) so callers can track and wait for tasks the same way.
+    """
+
+    data_signal = pyqtSignal(object)
+    count_update = pyqtSignal(int, int)
+    warning_signal = pyqtSignal(str)
+    progress_update = pyqtSignal(str)
+    progress_value = pyqtSignal(int)
+    finished_signal = pyqtSignal(str)
+    error_signal = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, func, pool=None):
+        super().__init__()
+        self.func = func
+        self._pool = pool
+        self._done = threading.Event()
+        self._started = False
+
+    def start(self):
+        self._started = True
+        (self._pool or task_pool()).start(_Runnable(self))
+
+    def _execute(self):
+        try:
+            self.func(self)
+        except Exception as e:
+            logging.exception('Background task failed')
+            self.error_signal.emit(str(e))
+        finally:
+            self._done.set()
+            self.finished.emit()
+
+    def isRunning(self) -> bool:
+        return self._started and not self._done.is_set()
+
+    def quit(self):
+        """Tasks cannot be interrupted; kept for QThread compatibility"""
+
+    def wait(self, msecs=None) -> bool:
+        return self._done.wait(None if msecs is None else msecs / 1000.0)
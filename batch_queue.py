@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Persistent job queue for batch downloads
+Records every URL of a batch file in SQLite so an interrupted batch can resume
+"""
+
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class BatchJobQueue:
+    """SQLite-backed job table shared by all batch runs.
+
+    Jobs are keyed by (batch_key, url); the batch key is derived from the
+    absolute path of the URL list file. A fresh connection is opened per call
+    so the queue can be used from several worker threads.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._init_db()
+
+    @staticmethod
+    def batch_key_for(path: str) -> str:
+        """Stable key for a URL list file"""
+        return os.path.normcase(os.path.abspath(path))
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS batch_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    batch_key TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    updated_at TEXT,
+                    UNIQUE (batch_key, url)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_batch_jobs_status ON batch_jobs (batch_key, status)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def enqueue(self, batch_key: str, urls) -> int:
+        """Register a batch and return how many of its jobs still have to run.
+
+        The batch becomes exactly ``urls``: jobs for URLs no longer in the
+        list (the file was edited) are dropped, the others take their new
+        position and keep their state. Jobs left in 'running' by an
+        interrupted session and jobs that failed are put back to 'pending'.
+        A batch that had fully completed starts over.
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        urls = list(dict.fromkeys(urls))
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            # Completion is judged before the edit, so removing the last unfinished URLs does not restart it
+            cur.execute("SELECT COUNT(*) FROM batch_jobs WHERE batch_key = ? AND status != ?", (batch_key, DONE))
+            remaining = cur.fetchone()[0]
+            if remaining == 0:
+                cur.execute('DELETE FROM batch_jobs WHERE batch_key = ?', (batch_key,))
+            cur.execute('CREATE TEMP TABLE IF NOT EXISTS batch_urls (url TEXT PRIMARY KEY)')
+            cur.execute('DELETE FROM batch_urls')
+            cur.executemany('INSERT INTO batch_urls (url) VALUES (?)', [(url,) for url in urls])
+            cur.execute('DELETE FROM batch_jobs WHERE batch_key = ? AND url NOT IN (SELECT url FROM batch_urls)',
+                        (batch_key,))
+            cur.executemany(
+                'INSERT INTO batch_jobs (batch_key, position, url, status, updated_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (batch_key, url) DO UPDATE SET position = excluded.position',
+                [(batch_key, pos, url, PENDING, now) for pos, url in enumerate(urls)]
+            )
+            cur.execute(
+                'UPDATE batch_jobs SET status = ?, updated_at = ? WHERE batch_key = ? AND status IN (?, ?)',
+                (PENDING, now, batch_key, RUNNING, FAILED)
+            )
+            conn.commit()
+            cur.execute('SELECT COUNT(*) FROM batch_jobs WHERE batch_key = ? AND status = ?', (batch_key, PENDING))
+            return cur.fetchone()[0]
+        finally:
+            conn.close()
+
+    def pending(self, batch_key: str):
+        """Return [(job_id, url)] for jobs that still have to run, in file order"""
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                'SELECT id, url FROM batch_jobs WHERE batch_key = ? AND status = ? ORDER BY position',
+                (batch_key, PENDING)
+            )
+            return cur.fetchall()
+        finally:
+            conn.close()
+
+    def mark(self, job_id: int, status: str, error: str = None):
+        """Update the state of one job"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            conn = self._connect()
+            try:
+                if status == RUNNING:
+                    conn.execute(
+                        'UPDATE batch_jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?',
+                        (status, now, job_id)
+                    )
+                else:
+                    conn.execute(
+                        'UPDATE batch_jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?',
+                        (status, error, now, job_id)
+                    )
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception:
+            logging.exception('Failed to update batch job %s', job_id)
+
+    def counts(self, batch_key: str) -> dict:
+        """Return {status: count} for a batch"""
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT status, COUNT(*) FROM batch_jobs WHERE batch_key = ? GROUP BY status', (batch_key,))
+            return dict(cur.fetchall())
+        finally:
+            conn.close()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Conversion cache for Enhanced YouTube Downloader
+Remembers which outputs came from which input and settings so unchanged work is skipped
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+# Settings that change how fast a file is converted, or where, but not what is produced
+_IGNORED_SETTINGS = frozenset({'output_dir', 'threads', 'priority', 'skip_up_to_date'})
+_CHUNK = 500
+
+
+def normalized_settings(settings: dict) -> str:
+    """Canonical JSON of the settings that affect the output"""
+    relevant = {k: v for k, v in (settings or {}).items() if k not in _IGNORED_SETTINGS and v not in (None, '')}
+    return json.dumps(relevant, sort_keys=True, default=str)
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None
+
+
+def fingerprint(input_file, settings):
+    """Hash of the input's (path, size, mtime) and the normalized settings, or None if the input is missing"""
+    state = _stat(input_file)
+    if state is None:
+        return None
+    key = json.dumps([os.path.abspath(input_file), state[0], state[1], normalized_settings(settings)])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class ConversionCache:
+    """SQLite record of finished conversions, keyed by output path.
+
+    An output is up to date when it was produced from the same input file
+    (same path, size and mtime) with the same settings, and the output file
+    itself is unchanged since then. A fresh connection is opened per call
+    so the cache can be used from worker threads.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS conversion_cache (
+                    output_path TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    input_path TEXT NOT NULL,
+                    output_size INTEGER NOT NULL,
+                    output_mtime_ns INTEGER NOT NULL,
+                    converted_at TEXT
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def up_to_date(self, pairs, settings) -> set:
+        """Output paths among ``pairs`` of (input, output) that need no conversion"""
+        wanted = {}
+        for input_file, output_file in pairs:
+            fp = fingerprint(input_file, settings)
+            if fp is not None and os.path.exists(output_file):
+                wanted[os.path.abspath(output_file)] = (output_file, fp)
+        if not wanted:
+            return set()
+        current = set()
+        keys = list(wanted)
+        try:
+            conn = self._connect()
+            try:
+                for start in range(0, len(keys), _CHUNK):
+                    chunk = keys[start:start + _CHUNK]
+                    cur = conn.execute(
+                        'SELECT output_path, fingerprint, output_size, output_mtime_ns FROM conversion_cache '
+                        f"WHERE output_path IN ({', '.join('?' * len(chunk))})", chunk)
+                    for path, fp, size, mtime_ns in cur:
+                        output_file, expected = wanted[path]
+                        if fp == expected and _stat(output_file) == (size, mtime_ns):
+                            current.add(output_file)
+            finally:
+                conn.close()
+        except Exception:
+            logging.exception('Failed to read conversion cache')
+        return current
+
+    def is_current(self, input_file, output_file, settings) -> bool:
+        return output_file in self.up_to_date([(input_file, output_file)], settings)
+
+    def record(self, input_file, output_file, settings):
+        """Remember that ``output_file`` was just produced from ``input_file`` with ``settings``"""
+        fp = fingerprint(input_file, settings)
+        state = _stat(output_file)
+        if fp is None or state is None:
+            return
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    'INSERT OR REPLACE INTO conversion_cache '
+                    '(output_path, fingerprint, input_path, output_size, output_mtime_ns, converted_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (os.path.abspath(output_file), fp, os.path.abspath(input_file), state[0], state[1],
+                     datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception:
+            logging.exception('Failed to record conversion of %s', input_file)
@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""
+Conversion engine for Enhanced YouTube Downloader
+Runs several ffmpeg processes at once with a chosen OS priority and live progress
+"""
+
+import os
+import re
+import shlex
+import shutil
+import signal
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from media_probe import probe_duration
+
+PRIORITIES = ('Low', 'Normal', 'High')
+# POSIX nice increments; raising priority needs privileges and is skipped otherwise
+_NICE = {'Low': 10, 'Normal': 0, 'High': -5}
+# Encoders that already spread one file over many cores
+HEAVY_CODECS = frozenset({'h265', 'vp9'})
+VIDEO_FORMATS = ('mp4', 'avi', 'mkv', 'webm', 'mov')
+# Lines of ffmpeg stderr kept per process for error reports
+STDERR_TAIL_LINES = 40
+# Hardware encoders tried in order before falling back to the software one
+SOFTWARE_ENCODERS = {'h264': 'libx264', 'h265': 'libx265', 'vp9': 'libvpx-vp9'}
+HW_ENCODERS = {
+    'h264': ('h264_nvenc', 'h264_qsv', 'h264_videotoolbox', 'h264_amf'),
+    'h265': ('hevc_nvenc', 'hevc_qsv', 'hevc_videotoolbox', 'hevc_amf'),
+    'vp9': ('vp9_qsv',),
+}
+# Seconds a terminated ffmpeg gets to exit before it is killed
+KILL_GRACE = 3.0
+_DURATION_RE = re.compile(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)')
+
+
+def auto_workers(settings: dict, file_count: int, cpu_count: int = None) -> int:
+    """How many files to convert at once for this codec mix.
+
+    Stream copies and audio-only jobs are I/O bound, so one per core is
+    fine. Software video encoders use several cores each (x265/VP9 more than
+    x264), so fewer files run side by side. An explicit ``threads`` setting
+    wins, but there are never more workers than files.
+    """
+    requested = int(settings.get('threads') or 0)
+    if requested > 0:
+        return max(1, min(requested, file_count))
+    cpus = cpu_count or os.cpu_count() or 1
+    codec = settings.get('video_codec')
+    if settings.get('output_format') not in VIDEO_FORMATS or codec in (None, '', 'copy'):
+        workers = cpus
+    elif codec in HEAVY_CODECS:
+        workers = cpus // 4
+    else:
+        workers = cpus // 2
+    return max(1, min(workers, file_count))
+
+
+def priority_kwargs(priority: str) -> dict:
+    """subprocess keyword arguments that start a process at ``priority`` (Windows only; see renice)"""
+    if os.name == 'nt':
+        flags = subprocess.CREATE_NO_WINDOW
+        if priority == 'Low':
+            flags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        elif priority == 'High':
+            flags |= subprocess.ABOVE_NORMAL_PRIORITY_CLASS
+        return {'creationflags': flags}
+    return {}
+
+
+def renice(proc, priority: str):
+    """Move a started POSIX process to ``priority`` relative to this one.
+
+    Done after Popen rather than in a preexec_fn, which is unsafe to fork
+    from a process with threads (pool workers, Qt).
+    """
+    increment = _NICE.get(priority, 0)
+    if os.name == 'nt' or not increment:
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, proc.pid, os.getpriority(os.PRIO_PROCESS, 0) + increment)
+    except OSError:
+        pass  # exited already, or no privilege to raise priority
+
+
+def _no_window():
+    return {'creationflags': subprocess.CREATE_NO_WINDOW} if os.name == 'nt' else {}
+
+
+def threads_per_job(workers: int, cpu_count: int = None) -> int:
+    """ffmpeg ``-threads`` for one of ``workers`` concurrent encodes"""
+    cpus = cpu_count or os.cpu_count() or 1
+    return max(1, cpus // max(1, workers))
+
+
+def software_preset(threads: int) -> str:
+    """Fastest sensible x264/x265 preset for the cores one job gets"""
+    if threads >= 8:
+        return 'medium'
+    if threads >= 4:
+        return 'faster'
+    if threads >= 2:
+        return 'veryfast'
+    return 'superfast'
+
+
+def parse_custom_options(text: str, windows: bool = None) -> list:
+    """Split user-supplied ffmpeg options like a shell would, without a shell.
+
+    Quotes group words and are removed. On Windows (``windows`` defaults
+    to the running OS) backslashes are kept literally, so paths like
+    C:\\subs\\film.srt survive. Raises ValueError for unbalanced quotes or
+    options that would add inputs or redirect the process's own streams.
+    """
+    if windows is None:
+        windows = os.name == 'nt'
+    lexer = shlex.shlex(text or '', posix=True)
+    lexer.whitespace_split = True
+    lexer.commenters = ''
+    if windows:
+        lexer.escape = ''
+    args = list(lexer)
+    for arg in args:
+        if arg in ('-i', '-progress', '-y', '-n') or arg.startswith('-filter_complex_script'):
+            raise ValueError(f"Option {arg} is managed by the converter and cannot be overridden")
+    return args
+
+
+def _ffmpeg_lines(*args):
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', *args], capture_output=True, text=True,
+                                timeout=20, **_no_window())
+        return result.stdout.splitlines()
+    except Exception:
+        return []
+
+
+@lru_cache(maxsize=None)
+def available_encoders() -> frozenset:
+    """Encoder names compiled into the local ffmpeg"""
+    names = set()
+    for line in _ffmpeg_lines('-encoders'):
+        parts = line.split()
+        # ' V....D libx264   ...': flags column then the name
+        if len(parts) >= 2 and len(parts[0]) == 6 and parts[0][0] in 'VAS':
+            names.add(parts[1])
+    return frozenset(names)
+
+
+@lru_cache(maxsize=None)
+def available_hwaccels() -> tuple:
+    """Hardware decoders ffmpeg reports (``-hwaccels``)"""
+    lines = _ffmpeg_lines('-hwaccels')
+    return tuple(l.strip() for l in lines if l.strip() and not l.strip().endswith(':'))
+
+
+@lru_cache(maxsize=None)
+def encoder_works(encoder: str) -> bool:
+    """True if a tiny test encode succeeds (the device exists, not just the build flag)"""
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-v', 'error', '-f', 'lavfi', '-i', 'color=s=256x256:d=0.1',
+             '-frames:v', '1', '-c:v', encoder, '-f', 'null', '-'],
+            capture_output=True, text=True, timeout=20, **_no_window())
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+def select_video_encoder(codec: str, hw_accel: bool = False):
+    """(encoder, is_hardware) for a codec choice, falling back to software"""
+    if hw_accel:
+        compiled = available_encoders()
+        for encoder in HW_ENCODERS.get(codec, ()):
+            if encoder in compiled and encoder_works(encoder):
+                return encoder, True
+    return SOFTWARE_ENCODERS.get(codec), False
+
+
+def parse_ffmpeg_time(value):
+    """Seconds from an ffmpeg 'HH:MM:SS.micro' timestamp"""
+    try:
+        h, m, sec = value.strip().split(':')
+        return int(h) * 3600 + int(m) * 60 + float(sec)
+    except (AttributeError, ValueError):
+        return None
+
+
+class FFmpegProgress:
+    """Incremental parser for ``ffmpeg -progress`` key=value output.
+
+    Every block ends with a ``progress=continue|end`` line, at which point
+    :attr:`out_time` (seconds encoded), :attr:`speed` (x realtime) and
+    :attr:`fps` reflect the latest state.
+    """
+
+    def __init__(self, duration=None):
+        self.duration = duration
+        self.out_time = 0.0
+        self.speed = 0.0
+        self.fps = 0.0
+        self.finished = False
+
+    @property
+    def percent(self) -> float:
+        if self.finished:
+            return 100.0
+        if not self.duration:
+            return 0.0
+        return max(0.0, min(100.0, self.out_time * 100.0 / self.duration))
+
+    def feed(self, line) -> bool:
+        """Consume one output line; True when a progress block is complete"""
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return False
+        value = value.strip()
+        if key in ('out_time_us', 'out_time_ms'):
+            # both are microseconds (out_time_ms is misnamed by ffmpeg)
+            if value.lstrip('-').isdigit():
+                self.out_time = max(0.0, int(value) / 1_000_000)
+        elif key == 'out_time':
+            seconds = parse_ffmpeg_time(value)
+            if seconds is not None:
+                self.out_time = max(0.0, seconds)
+        elif key == 'speed':
+            try:
+                self.speed = float(value.rstrip('x'))
+            except ValueError:
+                pass
+        elif key == 'fps':
+            try:
+                self.fps = float(value)
+            except ValueError:
+                pass
+        elif key == 'progress':
+            self.finished = value == 'end'
+            return True
+        return False
+
+
+def _nt_process_call(proc, name):
+    # Windows has no SIGSTOP; ntdll's (undocumented but stable) process suspend calls do the same
+    import ctypes
+    getattr(ctypes.windll.ntdll, name)(int(proc._handle))
+
+
+def suspend_process(proc) -> bool:
+    """Pause a running process (SIGSTOP / NtSuspendProcess); False if it already exited"""
+    if proc is None or proc.poll() is not None:
+        return False
+    try:
+        if os.name == 'nt':
+            _nt_process_call(proc, 'NtSuspendProcess')
+        else:
+            os.kill(proc.pid, signal.SIGSTOP)
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+def resume_process(proc) -> bool:
+    """Continue a process paused by :func:`suspend_process`"""
+    if proc is None or proc.poll() is not None:
+        return False
+    try:
+        if os.name == 'nt':
+            _nt_process_call(proc, 'NtResumeProcess')
+        else:
+            os.kill(proc.pid, signal.SIGCONT)
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+def stop_process(proc, grace=KILL_GRACE):
+    """Terminate ``proc`` now and kill it if it is still alive after ``grace`` seconds.
+
+    Returns immediately; the kill is scheduled on a timer so callers on the
+    GUI thread never wait for ffmpeg to exit.
+    """
+    if proc is None or proc.poll() is not None:
+        return
+    # A stopped process cannot act on SIGTERM until it runs again
+    resume_process(proc)
+    try:
+        proc.terminate()
+    except OSError:
+        return
+
+    def _kill():
+        if proc.poll() is None:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+    timer = threading.Timer(grace, _kill)
+    timer.daemon = True
+    timer.start()
+
+
+def run_ffmpeg(cmd, duration=None, on_progress=None, on_start=None, **popen_kwargs):
+    """Run an ffmpeg command while streaming its progress.
+
+    ``-progress pipe:1`` is added so stdout carries machine-readable progress;
+    ``on_progress(FFmpegProgress)`` is called after every block. stderr is
+    drained on a helper thread into a bounded ring buffer, so memory stays
+    flat however chatty ffmpeg gets. ``on_start(proc)`` receives the Popen
+    handle so the caller can pause or stop the process. Returns
+    ``(returncode, stderr_tail)``.
+    """
+    cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + list(cmd[1:])
+    progress = FFmpegProgress(duration)
+    tail = deque(maxlen=STDERR_TAIL_LINES)
+    kwargs = _no_window()
+    kwargs.update(popen_kwargs)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
+                            text=True, encoding='utf-8', errors='replace', **kwargs)
+    if on_start is not None:
+        on_start(proc)
+
+    def _drain_stderr():
+        for line in proc.stderr:
+            tail.append(line.rstrip())
+            if progress.duration is None:
+                # no probe result: take the input duration ffmpeg prints first
+                m = _DURATION_RE.search(line)
+                if m:
+                    progress.duration = int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3)) or None
+
+    reader = threading.Thread(target=_drain_stderr, daemon=True)
+    reader.start()
+    for line in proc.stdout:
+        if progress.feed(line) and on_progress is not None:
+            on_progress(progress)
+    returncode = proc.wait()
+    reader.join(timeout=5)
+    return returncode, '\n'.join(tail)
+
+
+class ParallelStep:
+    """Commands of one job that run side by side, e.g. the segments of a chunked encode.
+
+    ``durations`` (seconds of media each command covers) weight their
+    progress; at most ``max_workers`` processes run at once.
+    """
+
+    def __init__(self, commands, durations=None, max_workers=None):
+        self.commands = list(commands)
+        self.durations = list(durations) if durations else [1.0] * len(self.commands)
+        self.max_workers = max(1, int(max_workers or len(self.commands) or 1))
+
+
+class ConversionJob:
+    """One input file, its output path and the ffmpeg command producing it"""
+
+    def __init__(self, input_file, output_file, cmd=None, passes=None, temp_dir=None, prepare=None, weights=None):
+        self.input_file = input_file
+        self.output_file = output_file
+        self.cmd = cmd
+        # Steps run in order (two-pass: analysis pass, then ``cmd``); a step is
+        # a command or a ParallelStep
+        self.passes = passes or [cmd]
+        # Share of the job's progress per step (default: equal)
+        self.weights = weights
+        self.temp_dir = temp_dir
+        # Optional ``prepare(job)`` that fills in cmd/passes on a pool thread (e.g. after probing)
+        self.prepare = prepare
+        self.percent = 0.0
+        self.duration = None
+        self.speed = 0.0
+        self.fps = 0.0
+        self.running = False
+        self.ok = None
+        self.error = ''
+        # Job control: the live ffmpeg processes and what was asked of them
+        self.processes = []
+        self.paused = False
+        self.cancelled = False
+
+
+def _output_state(path):
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None
+
+
+def _remove_partial(path, before):
+    """Delete ``path`` if this run created or rewrote it (its size/mtime differ from ``before``)"""
+    state = _output_state(path)
+    if state is not None and state != before:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _remove_temp_dir(job):
+    if job.temp_dir:
+        shutil.rmtree(job.temp_dir, ignore_errors=True)
+        job.temp_dir = None
+
+
+class ConversionPool:
+    """Convert files with up to ``max_workers`` ffmpeg processes at once.
+
+    ``on_progress(job, aggregate_percent)`` is called whenever a job's
+    percentage changes and ``on_job_done(job)`` once per finished job; both
+    run on pool threads. :meth:`cancel`, :meth:`pause` and :meth:`resume`
+    act on the ffmpeg processes directly and return at once, for one job or
+    for all of them.
+    """
+
+    def __init__(self, max_workers=1, priority='Normal', on_progress=None, on_job_done=None):
+        self.max_workers = max(1, int(max_workers))
+        self.priority = priority
+        self.on_progress = on_progress
+        self.on_job_done = on_job_done
+        self._lock = threading.Lock()
+        self._jobs = []
+        self._cancelled = threading.Event()
+        self._resumed = threading.Event()
+        self._resumed.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._resumed.is_set()
+
+    def _targets(self, job):
+        # Lock held
+        return list(self._jobs) if job is None else [job]
+
+    def cancel(self, job=None):
+        """Cancel ``job`` (default: all jobs); running ffmpeg processes are terminated.
+
+        Cancelled jobs fail with "Cancelled" once their process has exited
+        and their partial output is removed; queued ones are skipped.
+        """
+        with self._lock:
+            if job is None:
+                self._cancelled.set()
+            targets = self._targets(job)
+            for j in targets:
+                j.cancelled = True
+            procs = [p for j in targets for p in j.processes]
+        if job is None:
+            self._resumed.set()  # let held-back workers run into the cancel check
+        for proc in procs:
+            stop_process(proc)
+
+    def pause(self, job=None):
+        """Suspend ``job``'s ffmpeg process; without a job, pause everything and hold queued jobs"""
+        with self._lock:
+            if job is None:
+                self._resumed.clear()
+            targets = [j for j in self._targets(job) if job is not None or j.running]
+            for j in targets:
+                j.paused = True
+                j.speed = 0.0
+            procs = [p for j in targets for p in j.processes]
+        for proc in procs:
+            suspend_process(proc)
+
+    def resume(self, job=None):
+        """Undo :meth:`pause` for ``job`` (default: all jobs)"""
+        with self._lock:
+            targets = [j for j in self._targets(job) if j.paused]
+            for j in targets:
+                j.paused = False
+            procs = [p for j in targets for p in j.processes]
+        for proc in procs:
+            resume_process(proc)
+        if job is None:
+            self._resumed.set()
+
+    def _attach(self, job, proc):
+        """Register a freshly started process, applying a pause or cancel that came first"""
+        with self._lock:
+            job.processes.append(proc)
+            paused = job.paused or self.paused
+            job.paused = paused
+            cancelled = job.cancelled
+        if cancelled:
+            stop_process(proc)
+        elif paused:
+            suspend_process(proc)
+
+    def aggregate_percent(self) -> float:
+        with self._lock:
+            if not self._jobs:
+                return 0.0
+            return sum(j.percent for j in self._jobs) / len(self._jobs)
+
+    def throughput(self) -> float:
+        """Combined speed of the running jobs, in x realtime"""
+        with self._lock:
+            return sum(j.speed for j in self._jobs if j.running)
+
+    def eta(self):
+        """Seconds until all jobs are done at the current throughput, or None"""
+        speed = self.throughput()
+        with self._lock:
+            known = [j.duration for j in self._jobs if j.duration]
+            if speed <= 0 or not known:
+                return None
+            # Files not probed yet are assumed to be as long as the average one
+            average = sum(known) / len(known)
+            remaining = sum((j.duration or average) * (100.0 - j.percent) / 100.0
+                            for j in self._jobs if j.ok is None)
+        return remaining / speed
+
+    def report(self, job, percent):
+        with self._lock:
+            job.percent = max(0.0, min(100.0, float(percent)))
+        if self.on_progress is not None:
+            self.on_progress(job, self.aggregate_percent())
+
+    def _run_command(self, job, cmd, duration, on_progress):
+        started = []
+
+        def on_start(proc):
+            renice(proc, self.priority)
+            started.append(proc)
+            self._attach(job, proc)
+        try:
+            return run_ffmpeg(cmd, duration, on_progress, on_start=on_start, **priority_kwargs(self.priority))
+        finally:
+            with self._lock:
+                for proc in started:
+                    job.processes.remove(proc)
+
+    def _run_parallel(self, job, step, report):
+        """Run a ParallelStep; the first failure stops the remaining commands"""
+        total = sum(step.durations) or 1.0
+        percents = [0.0] * len(step.commands)
+        speeds = [0.0] * len(step.commands)
+        failed = threading.Event()
+        # Index of the command whose failure stopped the others
+        first_failure = []
+
+        def run_one(i):
+            if failed.is_set() or job.cancelled:
+                return 1, "Cancelled"
+
+            def on_progress(progress):
+                percents[i], speeds[i] = progress.percent, progress.speed
+                # Media seconds of the whole job covered per second, as for a single process
+                job.speed = sum(speeds) * (job.duration or total) / total
+                report(sum(p * d for p, d in zip(percents, step.durations)) / total)
+            returncode, stderr = self._run_command(job, step.commands[i], step.durations[i], on_progress)
+            speeds[i] = 0.0
+            if returncode != 0:
+                with self._lock:
+                    if failed.is_set():
+                        return returncode, stderr
+                    failed.set()
+                    first_failure.append(i)
+                    procs = list(job.processes)
+                for proc in procs:
+                    stop_process(proc)
+            return returncode, stderr
+
+        with ThreadPoolExecutor(max_workers=min(step.max_workers, len(step.commands))) as pool:
+            results = list(pool.map(run_one, range(len(step.commands))))
+        # Report the failure that caused the stop rather than the processes it terminated
+        if first_failure:
+            return results[first_failure[0]]
+        return next(((rc, err) for rc, err in results if rc != 0), (0, ''))
+
+    def _execute(self, job):
+        try:
+            if job.prepare is not None:
+                job.prepare(job)
+            job.duration = probe_duration(job.input_file)
+            weights = job.weights or [1.0] * len(job.passes)
+            total = float(sum(weights)) or 1.0
+            done = 0.0
+            for index, step in enumerate(job.passes):
+                if index and job.cancelled:
+                    return 1, "Cancelled"
+
+                def report(percent, done=done, weight=weights[index]):
+                    self.report(job, (done + weight * percent / 100.0) * 100.0 / total)
+
+                if isinstance(step, ParallelStep):
+                    returncode, stderr = self._run_parallel(job, step, report)
+                else:
+                    def on_progress(progress):
+                        job.speed, job.fps = progress.speed, progress.fps
+                        if progress.duration and not job.duration:
+                            job.duration = progress.duration
+                        report(progress.percent)
+                    returncode, stderr = self._run_command(job, step, job.duration, on_progress)
+                if returncode != 0:
+                    break
+                done += weights[index]
+            return returncode, stderr
+        finally:
+            _remove_temp_dir(job)
+
+    def _run_job(self, job):
+        # Queued jobs wait while the whole pool is paused
+        self._resumed.wait()
+        if self.cancelled or job.cancelled:
+            _remove_temp_dir(job)
+            return
+        before = _output_state(job.output_file)
+        job.running = True
+        self.report(job, 0)
+        try:
+            returncode, stderr = self._execute(job)
+            ok, error = returncode == 0, ('' if returncode == 0 else stderr or "Unknown error")
+        except FileNotFoundError:
+            ok, error = False, "FFmpeg not found. Install and add to PATH."
+        except Exception as e:
+            ok, error = False, str(e)
+        if not ok:
+            if job.cancelled:
+                error = "Cancelled"
+            _remove_partial(job.output_file, before)
+        with self._lock:
+            job.running = False
+        job.ok, job.error = ok, error
+        self.report(job, 100)
+        if self.on_job_done is not None:
+            self.on_job_done(job)
+
+    def run(self, jobs):
+        """Convert ``jobs`` and block until all of them finished (or were skipped)"""
+        jobs = list(jobs)
+        with self._lock:
+            self._jobs = jobs
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(jobs)))) as pool:
+            for future in [pool.submit(self._run_job, job) for job in jobs]:
+                future.result()
+        return jobs
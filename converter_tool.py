@@ -4,10 +4,23 @@ Enhanced Video Converter Tool for Enhanced YouTube Downloader
 Supports both basic and advanced conversion options
 """
 
+import logging
 import os
+import shutil
 import subprocess
+import tempfile
 import threading
 from PyQt5 import QtCore, QtGui, QtWidgets
+from conversion_engine import (ConversionJob, ConversionPool, ParallelStep, auto_workers, PRIORITIES, VIDEO_FORMATS,
+                               SOFTWARE_ENCODERS, select_video_encoder, available_hwaccels,
+                               threads_per_job, software_preset, parse_custom_options)
+from media_probe import probe, probe_duration, copyable_streams
+from segment_encoder import (MIN_CHUNKED_DURATION, SEGMENT_THREADS, SEGMENTS_PER_WORKER,
+                             keyframe_times, plan_segments, segment_durations, concat_command)
+from media_library import MediaMetadataCache, describe
+from background_tasks import BackgroundTask
+from folder_scanner import FolderScanner, MEDIA_SUFFIXES
+from conversion_cache import ConversionCache
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                             QLineEdit, QPushButton, QComboBox, QGroupBox,
                             QFormLayout, QFileDialog, QMessageBox, QProgressBar,
@@ -20,98 +33,171 @@ class AdvancedConverterWorker(QtCore.QThread):
     progress_updated = QtCore.pyqtSignal(str, int)  # message, percentage
     conversion_completed = QtCore.pyqtSignal(str, str)  # input_file, output_file
     conversion_failed = QtCore.pyqtSignal(str, str)  # input_file, error
+    conversion_skipped = QtCore.pyqtSignal(str, str)  # input_file, up-to-date output_file
+    throughput_updated = QtCore.pyqtSignal(float, float)  # x realtime, ETA seconds (-1 if unknown)
     
-    def __init__(self, input_files, conversion_settings):
+    def __init__(self, input_files, conversion_settings, cache=None):
         super().__init__()
         self.input_files = input_files
         self.conversion_settings = conversion_settings
+        # Optional ConversionCache: outputs already produced with these settings are skipped
+        self.cache = cache
         self.is_cancelled = False
+        self.is_paused = False
+        self.pool = None
+        self._threads = None
+        self.speed = 0.0
+        self.eta = None
     
     def run(self):
         """Run the conversion process"""
-        total_files = len(self.input_files)
+        output_format = self.conversion_settings['output_format']
+        output_dir = self.conversion_settings['output_dir']
+        
+        done = []
+        
+        pairs = []
+        for input_file in self.input_files:
+            # Generate output filename
+            base_name = os.path.splitext(os.path.basename(input_file))[0]
+            pairs.append((input_file, os.path.join(output_dir, f"{base_name}.{output_format}")))
+        
+        current = set()
+        if self.cache is not None and self.conversion_settings.get('skip_up_to_date', True):
+            current = self.cache.up_to_date(pairs, self.conversion_settings)
+        jobs = []
+        for input_file, output_file in pairs:
+            if output_file in current:
+                self.conversion_skipped.emit(input_file, output_file)
+            else:
+                # Probing and command building happen on the pool threads
+                jobs.append(ConversionJob(input_file, output_file, prepare=self._prepare_job))
+        if current:
+            self.progress_updated.emit(f"Skipped {len(current)} up-to-date file(s)", 0)
+        total_files = len(jobs)
+        
+        workers = auto_workers(self.conversion_settings, max(1, total_files))
+        self._threads = threads_per_job(workers)
+        
+        def on_progress(job, aggregate):
+            self.speed, self.eta = self.pool.throughput(), self.pool.eta()
+            self.throughput_updated.emit(self.speed, -1.0 if self.eta is None else self.eta)
+            stats = f" | {self.speed:.1f}x" if self.speed else ""
+            if self.eta is not None:
+                stats += f" | ETA {int(self.eta) // 60}:{int(self.eta) % 60:02d}"
+            self.progress_updated.emit(
+                f"Converting {len(done)}/{total_files} done ({workers} at a time){stats}: {os.path.basename(job.input_file)}",
+                int(aggregate)
+            )
         
-        for i, input_file in enumerate(self.input_files, 1):
-            if self.is_cancelled:
-                break
-            
-            try:
-                file_progress = int((i - 1) / total_files * 100)
-                self.progress_updated.emit(
-                    f"Converting {i}/{total_files}: {os.path.basename(input_file)}", 
-                    file_progress
-                )
-                
-                # Generate output filename
-                base_name = os.path.splitext(os.path.basename(input_file))[0]
-                output_format = self.conversion_settings['output_format']
-                output_dir = self.conversion_settings['output_dir']
-                output_file = os.path.join(output_dir, f"{base_name}.{output_format}")
-                
-                # Build FFmpeg command
-                cmd = self._build_ffmpeg_command(input_file, output_file)
-                
-                # Run conversion
-                result = subprocess.run(
-                    cmd, 
-                    capture_output=True, 
-                    text=True, 
-                    creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-                )
-                
-                if result.returncode == 0:
-                    self.conversion_completed.emit(input_file, output_file)
-                else:
-                    error_msg = result.stderr or "Unknown error"
-                    self.conversion_failed.emit(input_file, error_msg)
-                    
-            except Exception as e:
-                self.conversion_failed.emit(input_file, str(e))
+        def on_job_done(job):
+            done.append(job)
+            if job.ok:
+                if self.cache is not None:
+                    self.cache.record(job.input_file, job.output_file, self.conversion_settings)
+                self.conversion_completed.emit(job.input_file, job.output_file)
+            else:
+                self.conversion_failed.emit(job.input_file, job.error)
         
-        final_progress = 100 if not self.is_cancelled else 0
-        self.progress_updated.emit("Conversion process completed", final_progress)
+        self.pool = ConversionPool(
+            max_workers=workers,
+            priority=self.conversion_settings.get('priority', 'Normal'),
+            on_progress=on_progress,
+            on_job_done=on_job_done,
+        )
+        if self.is_cancelled:
+            self.pool.cancel()
+        elif self.is_paused:
+            self.pool.pause()
+        self.pool.run(jobs)
+        
+        if self.is_cancelled:
+            self.progress_updated.emit("Conversion cancelled", 0)
+        else:
+            self.progress_updated.emit("Conversion process completed", 100)
     
-    def _build_ffmpeg_command(self, input_file, output_file):
-        """Build advanced FFmpeg command based on settings"""
+    def _build_ffmpeg_command(self, input_file, output_file, threads=None, pass_number=None, passlog=None,
+                              copy_video=False, copy_audio=False, segment=None, streams=None, preset_threads=None):
+        """Build advanced FFmpeg command based on settings.
+        
+        ``threads`` is the -threads value for software encoders (cores per
+        concurrent job). ``pass_number``/``passlog`` build one pass of a
+        two-pass encode; pass 1 only analyses video and writes no output.
+        ``copy_video``/``copy_audio`` stream-copy inputs that already match.
+        ``segment`` (start, end) encodes only that range and ``streams``
+        ('video' or 'audio') keeps only that stream, for chunked encodes.
+        """
         settings = self.conversion_settings
-        cmd = ['ffmpeg', '-i', input_file, '-y']  # -y to overwrite existing files
+        cmd = ['ffmpeg']
         
         output_format = settings['output_format']
+        video_out = streams != 'audio'
+        audio_out = streams != 'video' and pass_number != 1
+        codec = 'copy' if copy_video else settings.get('video_codec') if video_out else None
+        audio_codec = 'copy' if copy_audio else settings.get('audio_codec')
+        encodes_video = output_format in VIDEO_FORMATS and codec in SOFTWARE_ENCODERS
+        encoder, hardware = (None, False)
+        if encodes_video:
+            # Probed once per process; falls back to the software encoder
+            encoder, hardware = select_video_encoder(codec, settings.get('hw_accel', False))
+        if settings.get('hw_accel') and available_hwaccels():
+            # Decoder side; ffmpeg itself falls back to software decoding
+            cmd.extend(['-hwaccel', 'auto'])
+        if segment is not None:
+            # Input seeking is fast, and frame-accurate because the video is re-encoded
+            cmd.extend(['-ss', f"{segment[0]:.3f}"])
+        cmd.extend(['-i', input_file, '-y'])  # -y to overwrite existing files
+        if segment is not None and segment[1] is not None:
+            cmd.extend(['-t', f"{segment[1] - segment[0]:.3f}"])
+        if streams == 'video':
+            cmd.extend(['-map', '0:v:0', '-sn'])
+        elif streams == 'audio':
+            cmd.extend(['-map', '0:a:0', '-vn'])
         
         # Video settings
-        if output_format in ['mp4', 'avi', 'mkv', 'webm', 'mov']:
+        if output_format in VIDEO_FORMATS:
             # Video codec
-            if settings.get('video_codec') == 'h264':
-                cmd.extend(['-codec:v', 'libx264'])
-            elif settings.get('video_codec') == 'h265':
-                cmd.extend(['-codec:v', 'libx265'])
-            elif settings.get('video_codec') == 'vp9':
-                cmd.extend(['-codec:v', 'libvpx-vp9'])
-            elif settings.get('video_codec') == 'copy':
+            if encodes_video:
+                cmd.extend(['-codec:v', encoder])
+            elif codec == 'copy':
                 cmd.extend(['-codec:v', 'copy'])
             
             # Video bitrate
-            if settings.get('video_bitrate') and settings.get('video_codec') != 'copy':
+            if settings.get('video_bitrate') and codec != 'copy' and video_out:
                 cmd.extend(['-b:v', f"{settings['video_bitrate']}k"])
             
             # Resolution
-            if settings.get('resolution') and settings.get('video_codec') != 'copy':
+            if settings.get('resolution') and codec != 'copy' and video_out:
                 cmd.extend(['-vf', f"scale={settings['resolution']}"])
             
             # Frame rate
-            if settings.get('framerate') and settings.get('video_codec') != 'copy':
+            if settings.get('framerate') and codec != 'copy' and video_out:
                 cmd.extend(['-r', str(settings['framerate'])])
             
+            if encodes_video and not hardware:
+                if threads:
+                    cmd.extend(['-threads', str(threads)])
+                if codec == 'vp9':
+                    cmd.extend(['-row-mt', '1'])
+            
+            if pass_number:
+                if codec == 'h265':
+                    cmd.extend(['-x265-params', f"pass={pass_number}:stats={passlog}.log"])
+                else:
+                    cmd.extend(['-pass', str(pass_number), '-passlogfile', passlog])
+            
             # Audio codec for video files
-            if settings.get('audio_codec') == 'aac':
+            if not audio_out:
+                cmd.append('-an')
+            elif audio_codec == 'aac':
                 cmd.extend(['-codec:a', 'aac'])
-            elif settings.get('audio_codec') == 'mp3':
+            elif audio_codec == 'mp3':
                 cmd.extend(['-codec:a', 'libmp3lame'])
-            elif settings.get('audio_codec') == 'copy':
+            elif audio_codec == 'copy':
                 cmd.extend(['-codec:a', 'copy'])
             
             # Audio bitrate
-            if settings.get('audio_bitrate') and settings.get('audio_codec') != 'copy':
+            if settings.get('audio_bitrate') and audio_codec != 'copy' and audio_out:
                 cmd.extend(['-b:a', f"{settings['audio_bitrate']}k"])
         
         # Audio-only settings
@@ -141,20 +227,144 @@ class AdvancedConverterWorker(QtCore.QThread):
             if settings.get('sample_rate'):
                 cmd.extend(['-ar', str(settings['sample_rate'])])
         
-        # Quality preset
-        if settings.get('quality_preset') and settings.get('video_codec') in ['h264', 'h265']:
-            cmd.extend(['-preset', settings['quality_preset']])
+        software_x26x = encodes_video and not hardware and codec in ['h264', 'h265']
+        
+        # Quality preset; 'auto' (or HW acceleration requested on a CPU-only box)
+        # picks the fastest sensible preset for the cores each job gets
+        preset = settings.get('quality_preset')
+        if software_x26x and (preset == 'auto' or settings.get('hw_accel')):
+            preset = software_preset(preset_threads or threads or threads_per_job(1))
+        if preset and preset != 'auto' and software_x26x:
+            cmd.extend(['-preset', preset])
         
-        # CRF (Constant Rate Factor) for quality
-        if settings.get('crf') and settings.get('video_codec') in ['h264', 'h265']:
+        # CRF (Constant Rate Factor) for quality; two-pass targets the bitrate instead
+        if settings.get('crf') and software_x26x and not pass_number:
             cmd.extend(['-crf', str(settings['crf'])])
         
-        cmd.append(output_file)
+        if settings.get('custom_options'):
+            cmd.extend(parse_custom_options(settings['custom_options']))
+        
+        if pass_number == 1:
+            cmd.extend(['-f', 'null', os.devnull])
+        else:
+            cmd.append(output_file)
         return cmd
     
+    def _prepare_job(self, job):
+        """Fill in a pool job's commands (runs on the pool thread)"""
+        built = self._build_job(job.input_file, job.output_file, self._threads)
+        job.cmd, job.passes, job.temp_dir = built.cmd, built.passes, built.temp_dir
+    
+    def _build_job(self, input_file, output_file, threads):
+        """ConversionJob for one file: a single command, or both passes of a two-pass encode"""
+        settings = self.conversion_settings
+        codec = settings.get('video_codec')
+        two_pass = (settings.get('two_pass') and settings['output_format'] in VIDEO_FORMATS
+                    and codec in SOFTWARE_ENCODERS and settings.get('video_bitrate'))
+        if two_pass:
+            _, hardware = select_video_encoder(codec, settings.get('hw_accel', False))
+            two_pass = not hardware  # HW encoders do their own multipass
+        if settings.get('chunked') and not two_pass:
+            job = self._build_segmented_job(input_file, output_file, threads)
+            if job is not None:
+                return job
+        if not two_pass:
+            # Streams that already match the requested output are copied, not re-encoded
+            copy_video, copy_audio = copyable_streams(probe(input_file), settings)
+            cmd = self._build_ffmpeg_command(input_file, output_file, threads,
+                                             copy_video=copy_video, copy_audio=copy_audio)
+            return ConversionJob(input_file, output_file, cmd)
+        # Per-job passlog so concurrent encodes never share statistics files
+        temp_dir = tempfile.mkdtemp(prefix='ffpass_')
+        passlog = os.path.join(temp_dir, 'ffmpeg2pass')
+        try:
+            passes = [self._build_ffmpeg_command(input_file, output_file, threads, n, passlog) for n in (1, 2)]
+        except Exception:
+            # e.g. rejected custom options; the job never owns the directory
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+        return ConversionJob(input_file, output_file, passes[-1], passes=passes, temp_dir=temp_dir)
+    
+    def _build_segmented_job(self, input_file, output_file, threads):
+        """Chunked encode of one long file, or None when it does not apply.
+        
+        The video is cut at keyframes into segments that are encoded side by
+        side; the audio is encoded once as its own track, in parallel with
+        them, so there are no seams. The concat demuxer then joins everything
+        without re-encoding.
+        """
+        settings = self.conversion_settings
+        codec = settings.get('video_codec')
+        if (settings['output_format'] not in VIDEO_FORMATS or codec not in SOFTWARE_ENCODERS
+                or settings.get('custom_options')):
+            return None
+        if select_video_encoder(codec, settings.get('hw_accel', False))[1]:
+            return None  # hardware encoders limit concurrent sessions
+        workers = max(1, (threads or threads_per_job(1)) // SEGMENT_THREADS)
+        duration = probe_duration(input_file)
+        if workers < 2 or not duration or duration < MIN_CHUNKED_DURATION:
+            return None
+        try:
+            segments = plan_segments(keyframe_times(input_file), duration, workers * SEGMENTS_PER_WORKER)
+        except Exception as e:
+            logging.info('Chunked encode not possible for %s: %s', input_file, e)
+            return None
+        if len(segments) < 2:
+            return None
+        
+        # Created on the pool thread (see _prepare_job); the pool removes it when the job ends
+        temp_dir = tempfile.mkdtemp(prefix='ffseg_')
+        try:
+            parts = [os.path.join(temp_dir, f"segment{i:04d}.mkv") for i in range(len(segments))]
+            commands = [self._build_ffmpeg_command(input_file, part, SEGMENT_THREADS, segment=segment,
+                                                   streams='video', preset_threads=threads)
+                        for part, segment in zip(parts, segments)]
+            durations = segment_durations(segments, duration)
+            audio_file = None
+            streams = (probe(input_file) or {}).get('streams') or []
+            if any(s.get('codec_type') == 'audio' for s in streams):
+                audio_file = os.path.join(temp_dir, 'audio.mka')
+                commands.append(self._build_ffmpeg_command(input_file, audio_file, streams='audio'))
+                durations.append(duration)
+            tag = 'hvc1' if codec == 'h265' and settings['output_format'] in ('mp4', 'mov') else None
+            concat = concat_command(parts, os.path.join(temp_dir, 'segments.txt'), output_file, audio_file, tag)
+            # Encoding is nearly all of the work; joining only copies packets
+            return ConversionJob(input_file, output_file, concat,
+                                 passes=[ParallelStep(commands, durations, max_workers=workers + 1), concat],
+                                 temp_dir=temp_dir, weights=[95, 5])
+        except Exception:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+    
+
+    
     def cancel(self):
-        """Cancel the conversion process"""
+        """Cancel the conversion: running ffmpeg processes are stopped, queued files skipped"""
         self.is_cancelled = True
+        if self.pool is not None:
+            self.pool.cancel()
+    
+    def pause(self):
+        """Suspend the running ffmpeg processes and hold back queued files"""
+        self.is_paused = True
+        if self.pool is not None:
+            self.pool.pause()
+    
+    def resume(self):
+        self.is_paused = False
+        if self.pool is not None:
+            self.pool.resume()
+
+def _conversion_cache_for(dialog):
+    """ConversionCache in the main window's history DB, or None when the dialog runs standalone"""
+    db_path = getattr(dialog.parent(), 'history_db_path', None)
+    if not db_path:
+        return None
+    try:
+        return ConversionCache(db_path)
+    except Exception:
+        logging.exception('Conversion cache unavailable at %s', db_path)
+        return None
 
 class BasicConverterDialog(QDialog):
     """Basic converter dialog with simple options"""
@@ -373,7 +583,7 @@ class BasicConverterDialog(QDialog):
                 })
         
         # Start conversion
-        self.worker = AdvancedConverterWorker(input_files, settings)
+        self.worker = AdvancedConverterWorker(input_files, settings, cache=_conversion_cache_for(self))
         self.worker.progress_updated.connect(self._on_progress_updated)
         self.worker.conversion_completed.connect(self._on_conversion_completed)
         self.worker.conversion_failed.connect(self._on_conversion_failed)
@@ -398,13 +608,11 @@ class BasicConverterDialog(QDialog):
             return 'medium'
     
     def _cancel_conversion(self):
-        """Cancel the conversion process"""
+        """Cancel the conversion process; the worker reports back once ffmpeg has exited"""
         if self.worker:
             self.worker.cancel()
-            self.worker.quit()
-            self.worker.wait()
-        
-        self._on_worker_finished()
+            self.cancel_btn.setEnabled(False)
+            self.progress_label.setText("Cancelling...")
     
     def _on_progress_updated(self, message, percentage):
         """Handle progress updates"""
@@ -421,9 +629,10 @@ class BasicConverterDialog(QDialog):
     
     def _on_worker_finished(self):
         """Handle worker completion"""
+        cancelled = self.worker is not None and self.worker.is_cancelled
         self.convert_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
-        self.progress_label.setText("Conversion completed")
+        self.progress_label.setText("Conversion cancelled" if cancelled else "Conversion completed")
         self.worker = None
 
 class AdvancedConverterDialog(QDialog):
@@ -436,6 +645,7 @@ class AdvancedConverterDialog(QDialog):
         self.resize(900, 800)
         
         self.worker = None
+        self._metadata_tasks = []
         self._setup_ui()
     
     def _setup_ui(self):
@@ -509,6 +719,11 @@ class AdvancedConverterDialog(QDialog):
         """)
         button_layout.addWidget(self.convert_btn)
         
+        self.pause_btn = QPushButton("Pause")
+        self.pause_btn.clicked.connect(self._toggle_pause)
+        self.pause_btn.setEnabled(False)
+        button_layout.addWidget(self.pause_btn)
+        
         self.cancel_btn = QPushButton("Cancel")
         self.cancel_btn.clicked.connect(self._cancel_conversion)
         self.cancel_btn.setEnabled(False)
@@ -613,7 +828,8 @@ class AdvancedConverterDialog(QDialog):
         
         # Quality preset
         self.preset_combo = QComboBox()
-        self.preset_combo.addItems(['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'slower', 'veryslow'])
+        # 'auto' tunes the preset to the cores each concurrent job gets
+        self.preset_combo.addItems(['auto', 'ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'slower', 'veryslow'])
         self.preset_combo.setCurrentText('medium')
         codec_layout.addRow("Encoding Preset:", self.preset_combo)
         
@@ -733,6 +949,11 @@ class AdvancedConverterDialog(QDialog):
         self.hw_accel_check = QCheckBox("Hardware acceleration (if available)")
         advanced_layout.addWidget(self.hw_accel_check)
         
+        self.chunked_check = QCheckBox("Split long videos into segments and encode them in parallel")
+        self.chunked_check.setToolTip("Files over 10 minutes are cut at keyframes and their segments "
+                                      "encoded on all cores, then joined without re-encoding")
+        advanced_layout.addWidget(self.chunked_check)
+        
         # Custom FFmpeg options
         custom_layout = QFormLayout()
         self.custom_options_edit = QLineEdit()
@@ -749,16 +970,23 @@ class AdvancedConverterDialog(QDialog):
         
         # Thread count
         self.threads_spin = QSpinBox()
-        self.threads_spin.setRange(1, 16)
-        self.threads_spin.setValue(4)
+        self.threads_spin.setRange(0, 16)
+        # 0 sizes the pool from the core count and the selected codecs
+        self.threads_spin.setSpecialValueText("Auto")
+        self.threads_spin.setValue(0)
         batch_layout.addRow("Processing Threads:", self.threads_spin)
         
         # Priority
         self.priority_combo = QComboBox()
-        self.priority_combo.addItems(['Low', 'Normal', 'High'])
+        self.priority_combo.addItems(list(PRIORITIES))
         self.priority_combo.setCurrentText('Normal')
         batch_layout.addRow("Process Priority:", self.priority_combo)
         
+        # Re-running a batch only converts what changed
+        self.skip_current_check = QCheckBox("Skip files already converted with these settings")
+        self.skip_current_check.setChecked(True)
+        batch_layout.addRow(self.skip_current_check)
+        
         layout.addWidget(batch_group)
         
         layout.addStretch()
@@ -773,23 +1001,76 @@ class AdvancedConverterDialog(QDialog):
             "Media Files (*.mp4 *.avi *.mkv *.mov *.wmv *.flv *.webm *.m4v *.mp3 *.wav *.m4a *.aac *.ogg *.flac);;All Files (*)"
         )
         
-        for file_path in files:
-            if file_path not in [self.file_list.item(i).text() for i in range(self.file_list.count())]:
-                self.file_list.addItem(file_path)
+        self._load_metadata(self._append_files(files))
     
     def _add_folder(self):
         """Add all media files from a folder"""
         folder = QFileDialog.getExistingDirectory(self, "Select Folder")
-        if folder:
-            media_extensions = ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v', 
-                              '.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac']
-            
-            for root, dirs, files in os.walk(folder):
-                for file in files:
-                    if any(file.lower().endswith(ext) for ext in media_extensions):
-                        file_path = os.path.join(root, file)
-                        if file_path not in [self.file_list.item(i).text() for i in range(self.file_list.count())]:
-                            self.file_list.addItem(file_path)
+        if not folder:
+            return
+        scanner = getattr(self.parent(), 'folder_scanner', None) or FolderScanner()
+        
+        def _scan(worker):
+            files = scanner.scan(folder, on_chunk=lambda chunk: worker.data_signal.emit((False, chunk)),
+                                 suffixes=MEDIA_SUFFIXES)
+            worker.data_signal.emit((True, files))
+        
+        task = BackgroundTask(_scan)
+        task.data_signal.connect(self._add_scanned)
+        self._metadata_tasks.append(task)
+        task.finished.connect(lambda: self._metadata_tasks.remove(task))
+        task.start()
+    
+    def _add_scanned(self, data):
+        """(complete, files) from a folder scan: chunks are listed as found, the total is probed once"""
+        complete, files = data
+        self._append_files(files)
+        if complete:
+            self._load_metadata(files)
+    
+    def _append_files(self, files):
+        """Add the ``files`` not listed yet; returns those that were added"""
+        listed = set(self._listed_files())
+        added = []
+        for file_path in files:
+            if file_path not in listed:
+                listed.add(file_path)
+                self._add_list_item(file_path)
+                added.append(file_path)
+        return added
+    
+    def _add_list_item(self, file_path):
+        item = QListWidgetItem(file_path)
+        item.setData(QtCore.Qt.UserRole, file_path)
+        self.file_list.addItem(item)
+    
+    def _listed_files(self):
+        """Paths in the file list (item text may also carry media metadata)"""
+        return [self.file_list.item(i).data(QtCore.Qt.UserRole) or self.file_list.item(i).text()
+                for i in range(self.file_list.count())]
+    
+    def _load_metadata(self, paths):
+        """Show duration, codecs, resolution and bitrate next to ``paths`` once probed"""
+        db_path = getattr(self.parent(), 'history_db_path', None)
+        if not paths or not db_path:
+            return
+        
+        def _probe(worker):
+            worker.data_signal.emit(MediaMetadataCache(db_path).metadata(paths))
+        
+        task = BackgroundTask(_probe)
+        task.data_signal.connect(self._annotate_files)
+        self._metadata_tasks.append(task)
+        task.finished.connect(lambda: self._metadata_tasks.remove(task))
+        task.start()
+    
+    def _annotate_files(self, metas):
+        for i in range(self.file_list.count()):
+            item = self.file_list.item(i)
+            path = item.data(QtCore.Qt.UserRole)
+            label = describe(metas.get(path)) if path else ''
+            if label:
+                item.setText(f"{path}    [{label}]")
     
     def _remove_selected(self):
         """Remove selected files from the list"""
@@ -830,7 +1111,7 @@ class AdvancedConverterDialog(QDialog):
             return
         
         # Get input files
-        input_files = [self.file_list.item(i).text() for i in range(self.file_list.count())]
+        input_files = self._listed_files()
         
         # Build advanced conversion settings
         settings = {
@@ -865,8 +1146,21 @@ class AdvancedConverterDialog(QDialog):
         if self.hw_accel_check.isChecked():
             settings['hw_accel'] = True
         
+        if self.chunked_check.isChecked():
+            settings['chunked'] = True
+        
         if self.custom_options_edit.text().strip():
             settings['custom_options'] = self.custom_options_edit.text().strip()
+            try:
+                parse_custom_options(settings['custom_options'])
+            except ValueError as e:
+                QMessageBox.warning(self, "Invalid Options", f"Custom FFmpeg options could not be used:\n{e}")
+                return
+        
+        # Batch processing
+        settings['threads'] = self.threads_spin.value()
+        settings['priority'] = self.priority_combo.currentText()
+        settings['skip_up_to_date'] = self.skip_current_check.isChecked()
         
         # Confirm conversion
         reply = QMessageBox.question(
@@ -878,27 +1172,42 @@ class AdvancedConverterDialog(QDialog):
         
         if reply == QMessageBox.Yes:
             # Start conversion
-            self.worker = AdvancedConverterWorker(input_files, settings)
+            self.worker = AdvancedConverterWorker(input_files, settings, cache=_conversion_cache_for(self))
             self.worker.progress_updated.connect(self._on_progress_updated)
             self.worker.conversion_completed.connect(self._on_conversion_completed)
+            self.worker.conversion_skipped.connect(self._on_conversion_skipped)
             self.worker.conversion_failed.connect(self._on_conversion_failed)
             self.worker.finished.connect(self._on_worker_finished)
             
             self.convert_btn.setEnabled(False)
             self.cancel_btn.setEnabled(True)
+            self.pause_btn.setEnabled(True)
+            self.pause_btn.setText("Pause")
             self.progress_bar.setValue(0)
             
             self.log_text.clear()
             self.worker.start()
     
     def _cancel_conversion(self):
-        """Cancel the conversion process"""
+        """Cancel the conversion process; the worker reports back once ffmpeg has exited"""
         if self.worker:
             self.worker.cancel()
-            self.worker.quit()
-            self.worker.wait()
-        
-        self._on_worker_finished()
+            self.cancel_btn.setEnabled(False)
+            self.pause_btn.setEnabled(False)
+            self.progress_label.setText("Cancelling...")
+    
+    def _toggle_pause(self):
+        """Pause or resume the running ffmpeg processes"""
+        if not self.worker:
+            return
+        if self.worker.is_paused:
+            self.worker.resume()
+            self.pause_btn.setText("Pause")
+            self.progress_label.setText("Resuming...")
+        else:
+            self.worker.pause()
+            self.pause_btn.setText("Resume")
+            self.progress_label.setText("Paused")
     
     def _on_progress_updated(self, message, percentage):
         """Handle progress updates"""
@@ -910,6 +1219,10 @@ class AdvancedConverterDialog(QDialog):
         message = f"✓ Converted: {os.path.basename(input_file)} → {os.path.basename(output_file)}"
         self.log_text.append(message)
     
+    def _on_conversion_skipped(self, input_file, output_file):
+        """Handle a file whose output is already up to date"""
+        self.log_text.append(f"= Up to date: {os.path.basename(input_file)} → {os.path.basename(output_file)}")
+    
     def _on_conversion_failed(self, input_file, error):
         """Handle conversion failure"""
         message = f"✗ Failed: {os.path.basename(input_file)} - {error}"
@@ -917,9 +1230,12 @@ class AdvancedConverterDialog(QDialog):
     
     def _on_worker_finished(self):
         """Handle worker completion"""
+        cancelled = self.worker is not None and self.worker.is_cancelled
         self.convert_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
-        self.progress_label.setText("Conversion completed")
+        self.pause_btn.setEnabled(False)
+        self.pause_btn.setText("Pause")
+        self.progress_label.setText("Conversion cancelled" if cancelled else "Conversion completed")
         self.worker = None
 
 # For backward compatibility, keep the original ConverterDialog as BasicConverterDialog
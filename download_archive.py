@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Indexed download archive for Enhanced YouTube Downloader
+Keeps yt-dlp's downloaded_videos.txt in memory (or in SQLite) for O(1) lookups
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+
+# Bytes hashed at each end of the part of the file already read, to tell an
+# append from a rewrite that kept (or grew past) the old size
+HASH_WINDOW = 4096
+
+
+def archive_key(extractor, video_id):
+    """Normalize an (extractor, id) pair the way yt-dlp writes archive lines"""
+    return ((extractor or '').lower(), str(video_id or ''))
+
+
+def _read_digest(f, length):
+    """Hash of the first and last HASH_WINDOW bytes of the first ``length`` bytes of ``f``"""
+    h = hashlib.sha1()
+    f.seek(0)
+    h.update(f.read(min(length, HASH_WINDOW)))
+    if length > HASH_WINDOW:
+        tail = max(HASH_WINDOW, length - HASH_WINDOW)
+        f.seek(tail)
+        h.update(f.read(length - tail))
+    return h.hexdigest()
+
+
+class DownloadArchive:
+    """Lookup service over a yt-dlp download archive file.
+
+    Entries are held as a set of (extractor, id) pairs plus a set of bare ids
+    for callers that do not know the extractor. The file is read once; later
+    calls only stat it and, when yt-dlp appended to it, read the new tail.
+    A replaced (new inode), truncated or rewritten (the already read part
+    hashes differently) file triggers a full reload.
+
+    With ``db_path`` the entries live in an indexed ``download_archive``
+    table of that SQLite database instead of in memory, which keeps memory
+    flat for archives with millions of lines. Rows are keyed by the archive
+    path, and how far the file was read is stored alongside them so a new
+    instance only reads what was appended since.
+    """
+
+    def __init__(self, path, db_path=None):
+        self.path = path
+        self.db_path = db_path
+        self._archive = os.path.normcase(os.path.abspath(path))
+        self._lock = threading.Lock()
+        self._keys = set()
+        self._ids = set()
+        # (inode, mtime_ns, offset, digest) of the file as last read
+        self._state = None
+        if self.db_path:
+            self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(download_archive)')]
+            if columns and 'archive_path' not in columns:
+                # Unkeyed table from an older version; it is rebuilt from the file
+                conn.execute('DROP TABLE download_archive')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS download_archive (
+                    archive_path TEXT NOT NULL,
+                    extractor TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    PRIMARY KEY (archive_path, extractor, video_id)
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('DROP INDEX IF EXISTS idx_download_archive_id')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_download_archive_path_id '
+                         'ON download_archive (archive_path, video_id)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS download_archive_files (
+                    archive_path TEXT PRIMARY KEY,
+                    inode INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    digest TEXT NOT NULL
+                )
+            ''')
+            conn.commit()
+            row = conn.execute('SELECT inode, mtime_ns, offset, digest FROM download_archive_files '
+                               'WHERE archive_path = ?', (self._archive,)).fetchone()
+            self._state = tuple(row) if row else None
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _parse(lines):
+        for line in lines:
+            parts = line.strip().split(None, 1)
+            if len(parts) == 2:
+                yield archive_key(parts[0], parts[1])
+            elif len(parts) == 1:
+                yield archive_key('', parts[0])
+
+    def _store(self, keys, reset, state):
+        """Record newly read entries (after dropping the old ones if ``reset``) and the file state"""
+        keys = list(keys)
+        if self.db_path:
+            conn = self._connect()
+            try:
+                if reset:
+                    conn.execute('DELETE FROM download_archive WHERE archive_path = ?', (self._archive,))
+                conn.executemany('INSERT OR IGNORE INTO download_archive (archive_path, extractor, video_id) '
+                                 'VALUES (?, ?, ?)', ((self._archive,) + k for k in keys))
+                if state is None:
+                    conn.execute('DELETE FROM download_archive_files WHERE archive_path = ?', (self._archive,))
+                else:
+                    conn.execute('INSERT OR REPLACE INTO download_archive_files '
+                                 '(archive_path, inode, mtime_ns, offset, digest) VALUES (?, ?, ?, ?, ?)',
+                                 (self._archive,) + state)
+                conn.commit()
+            finally:
+                conn.close()
+        else:
+            if reset:
+                self._keys.clear()
+                self._ids.clear()
+            self._keys.update(keys)
+            self._ids.update(k[1] for k in keys)
+        self._state = state
+
+    def _refresh(self):
+        """Re-read the archive file if it changed since the last look (lock held)"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            if self._state is not None:
+                self._store([], True, None)
+            return
+        state = self._state
+        if state and state[:3] == (st.st_ino, st.st_mtime_ns, st.st_size):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                append = (state is not None and state[0] == st.st_ino and st.st_size >= state[2]
+                          and _read_digest(f, state[2]) == state[3])
+                start = state[2] if append else 0
+                f.seek(start)
+                data = f.read()
+                # Only consume complete lines; a partially written line is picked up next time
+                end = data.rfind(b'\n') + 1
+                offset = start + end
+                digest = _read_digest(f, offset)
+        except OSError:
+            logging.exception('Could not read download archive %s', self.path)
+            return
+        keys = self._parse(data[:end].decode('utf-8', errors='ignore').splitlines())
+        self._store(keys, not append, (st.st_ino, st.st_mtime_ns, offset, digest))
+
+    def contains(self, video_id, extractor=None) -> bool:
+        """True if the id (optionally for a given extractor) is in the archive"""
+        if not video_id:
+            return False
+        with self._lock:
+            self._refresh()
+            key = archive_key(extractor, video_id)
+            if self.db_path:
+                conn = self._connect()
+                try:
+                    cur = conn.cursor()
+                    if extractor:
+                        cur.execute('SELECT 1 FROM download_archive '
+                                    'WHERE archive_path = ? AND extractor = ? AND video_id = ?',
+                                    (self._archive,) + key)
+                    else:
+                        cur.execute('SELECT 1 FROM download_archive WHERE archive_path = ? AND video_id = ? LIMIT 1',
+                                    (self._archive, key[1]))
+                    return cur.fetchone() is not None
+                finally:
+                    conn.close()
+            if extractor:
+                return key in self._keys
+            return key[1] in self._ids
+
+    def add(self, extractor, video_id):
+        """Append an entry to the archive file and the index"""
+        key = archive_key(extractor, video_id)
+        if not key[1]:
+            return
+        with self._lock:
+            self._refresh()
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            line = f"{key[0]} {key[1]}\n" if key[0] else f"{key[1]}\n"
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            # Picks up the line just written (and anything appended before it)
+            self._refresh()
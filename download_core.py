@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Download core for Enhanced YouTube Downloader
+GUI-free download options, batch runner and history records shared by the window and the CLI
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from batch_queue import BatchJobQueue, RUNNING, DONE, FAILED
+from download_result import DownloadResult
+from download_scheduler import DownloadJob
+from format_prefetcher import common_heights
+from history_db import DATE_FORMAT, log_download
+from url_resolver import USER_AGENT
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DOWNLOAD_DIR = os.path.join(APP_DIR, 'YouTube_Downloads')
+SETTINGS_FILE = os.path.join(APP_DIR, 'settings.json')
+ARCHIVE_NAME = 'downloaded_videos.txt'
+MODES = ('Video', 'Audio', 'Captions')
+# Attempts per playlist item before it is counted as failed
+DEFAULT_RETRIES = 5
+# Flat, safe output template used when there is no playlist folder: title (truncated), id, ext
+FLAT_OUTTMPL = '%(title).60s [%(id)s].%(ext)s'
+_URL_RE = re.compile(r'^https?://')
+
+
+def default_history_db_path() -> str:
+    """Per-user history DB location (AppData on Windows, ~/.local/share on Linux)"""
+    try:
+        if sys.platform == 'win32':
+            appdata = os.environ.get('APPDATA') or str(Path.home())
+            base = os.path.join(appdata, 'YouTubeDownloader')
+        elif sys.platform == 'linux':
+            base = os.path.join(str(Path.home()), '.local', 'share', 'youtubedownloader')
+        else:
+            base = os.path.join(str(Path.home()), '.youtubedownloader')
+        os.makedirs(base, exist_ok=True)
+        return os.path.join(base, 'download_history.db')
+    except Exception:
+        return os.path.join(APP_DIR, 'download_history.db')
+
+
+def read_url_list(path) -> list:
+    """http(s) URLs of a text file, one per line; other lines are ignored"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return [line.strip() for line in f if _URL_RE.match(line.strip())]
+
+
+def height_selector(height) -> str:
+    return f"bestvideo[height<={int(height)}]+bestaudio/best"
+
+
+def quality_choices(infos) -> list:
+    """(selector, label) pairs offered for a selection: 'best' plus every common height"""
+    choices = [('best', 'best (auto)')]
+    for h in common_heights(infos):
+        choices.append((height_selector(h), f"<= {h}p (video+bestaudio)"))
+    # Fallback if no heights found
+    if len(choices) == 1:
+        choices.extend([('best', 'best'), ('worst', 'worst')])
+    return choices
+
+
+def hook_percent(d) -> float:
+    """Completion (0-100) of a yt-dlp 'downloading' progress hook dict"""
+    total = d.get('total_bytes') or d.get('total_bytes_estimate')
+    done = d.get('downloaded_bytes') or 0
+    if total:
+        return done * 100.0 / total
+    try:
+        return float(d.get('_percent_str', '').strip().rstrip('%'))
+    except ValueError:
+        return 0
+
+
+def download_options(mode, quality, target_dir, outtmpl, referer=None, cookies_path=None,
+                     archive_file=None, ratelimit=None, progress_hooks=(), postprocessor_hooks=()) -> dict:
+    """yt-dlp options for one Video/Audio download"""
+    opts = {
+        'format': quality,
+        'outtmpl': outtmpl,
+        'paths': {
+            'home': target_dir,
+            'temp': target_dir,
+        },
+        'ignoreerrors': False,
+        'progress_hooks': list(progress_hooks),
+        'postprocessor_hooks': list(postprocessor_hooks),
+        'retries': 10,
+        'fragment_retries': 10,
+        'concurrent_fragment_downloads': 3,
+        'windowsfilenames': False,
+        'restrictfilenames': False,
+        'http_headers': {'User-Agent': USER_AGENT},
+    }
+    if referer:
+        opts['http_headers']['Referer'] = referer
+    if cookies_path:
+        opts['cookiefile'] = cookies_path
+    if archive_file:
+        opts['download_archive'] = archive_file
+    if ratelimit:
+        opts['ratelimit'] = ratelimit
+    if mode == 'Audio':
+        opts['extractaudio'] = True
+        opts['postprocessors'] = [
+            {
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+                'preferredquality': '192',
+            }
+        ]
+    else:  # Video
+        opts['postprocessors'] = [
+            {
+                'key': 'FFmpegVideoRemuxer',
+                'preferedformat': 'mkv'
+            }
+        ]
+    return opts
+
+
+def captions_options(target_dir, lang='en', cookies_path=None) -> dict:
+    """yt-dlp options that only fetch subtitles (manual or automatic) as VTT"""
+    opts = {
+        'skip_download': True,
+        'writeautomaticsub': True,
+        'writesubtitles': True,
+        'subtitleslangs': [lang],
+        'outtmpl': os.path.join(target_dir, '%(title)s.%(ext)s'),
+        'subtitle_format': 'vtt',
+        'quiet': False,
+        'ignoreerrors': True,
+    }
+    if cookies_path:
+        opts['cookiefile'] = cookies_path
+    return opts
+
+
+def with_retries(action, attempts=DEFAULT_RETRIES, on_error=None):
+    """Call ``action()`` until it succeeds, at most ``attempts`` times; the last error is re-raised"""
+    attempt = 0
+    while True:
+        try:
+            return action()
+        except Exception as e:
+            attempt += 1
+            if on_error is not None:
+                on_error(attempt, e)
+            if attempt >= attempts:
+                raise
+
+
+def history_record(url, title, fmt, status, quality='', result=None, duration=0, platform='Unknown') -> dict:
+    """Row for the downloads table; size, path and duration come from ``result`` when given"""
+    return {
+        'url': url,
+        'title': title,
+        'format': fmt,
+        'quality': quality or '',
+        'status': status,
+        'download_date': datetime.now().strftime(DATE_FORMAT),
+        'file_size': result.file_size() if result is not None else 0,
+        'duration': (result.duration if result is not None else 0) or int(duration or 0),
+        'platform': platform or 'Unknown',
+        'file_path': result.filepath if result is not None else '',
+    }
+
+
+def _emit(on_event, event, **fields):
+    if on_event is not None:
+        fields['event'] = event
+        on_event(fields)
+
+
+def run_batch(urls, batch_key, db_path, download_dir, scheduler, ydl_pool, resolver=None,
+              cookies_path=None, on_event=None, log=None) -> dict:
+    """Download ``urls`` as one resumable batch and return its counts.
+
+    Jobs live in the history DB (see BatchJobQueue), so running the same
+    batch again only retries what did not finish. ``on_event(dict)`` gets
+    'resume', 'start', 'done' and 'failed' events from scheduler threads.
+    History records go to ``log(record)`` (default: written to ``db_path``).
+    """
+    log = log or (lambda record: log_download(db_path, record))
+    queue = BatchJobQueue(db_path)
+    remaining = queue.enqueue(batch_key, urls)
+    # Jobs of the batch as it is now (duplicate URLs collapse, removed ones are dropped)
+    total = sum(queue.counts(batch_key).values())
+    counts = {'ok': 0, 'fail': 0, 'started': total - remaining}
+    counts_lock = threading.Lock()
+    os.makedirs(download_dir, exist_ok=True)
+    if remaining < total:
+        _emit(on_event, 'resume', remaining=remaining, total=total)
+
+    def _download(job):
+        job_id, url = job.key, job.url
+        queue.mark(job_id, RUNNING)
+        with counts_lock:
+            counts['started'] += 1
+            idx = counts['started']
+        _emit(on_event, 'start', index=idx, total=total, url=url)
+        result = DownloadResult()
+        ydl_opts = {
+            'quiet': True,
+            'progress_hooks': [scheduler.bandwidth_hook(), result.progress_hook],
+            'postprocessor_hooks': [result.postprocessor_hook],
+            'paths': {'home': download_dir, 'temp': download_dir},
+            'outtmpl': {'default': FLAT_OUTTMPL},
+            'restrictfilenames': True,
+            'windowsfilenames': True,
+        }
+        if cookies_path:
+            ydl_opts['cookiefile'] = cookies_path
+        try:
+            with ydl_pool.session(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=True)
+            # Final path/size/duration as reported by yt-dlp's own hooks
+            result.update_from_info(info)
+        except Exception as e:
+            queue.mark(job_id, FAILED, str(e))
+            with counts_lock:
+                counts['fail'] += 1
+            logging.error(f"Batch download failed for {url}: {e}")
+            log(history_record(url, '', 'Video', 'Failed'))
+            _emit(on_event, 'failed', url=url, error=str(e))
+            return
+        queue.mark(job_id, DONE)
+        with counts_lock:
+            counts['ok'] += 1
+        info = info or {}
+        log(history_record(url, info.get('title') or '', 'Video', 'Completed', result=result,
+                           platform=info.get('extractor')))
+        _emit(on_event, 'done', url=url, title=info.get('title') or '', file=result.filepath)
+
+    # Resolve share/redirect URLs (Facebook share links etc.) up front and in
+    # parallel, so per-host limits apply to the real hosts
+    pending = queue.pending(batch_key)
+    resolved = [u for _, u in pending]
+    if resolver is not None:
+        resolved = resolver.resolve_many(resolved)
+    jobs = [DownloadJob(job_id, job_url) for (job_id, _), job_url in zip(pending, resolved)]
+    scheduler.run(jobs, _download)
+    return {'ok': counts['ok'], 'fail': counts['fail'], 'total': total,
+            'done': queue.counts(batch_key).get(DONE, 0)}
+
+
+def download_urls(urls, mode, quality, download_dir, scheduler, ydl_pool, db_path, resolver=None,
+                  cookies_path=None, archive_file=None, lang='en', retries=DEFAULT_RETRIES, on_event=None,
+                  log=None) -> dict:
+    """Download each URL (a video or a whole playlist) with the window's Video/Audio/Captions options.
+
+    Returns {'ok', 'fail', 'total'}. Per-item progress goes to the
+    scheduler, events ('start', 'retry', 'done', 'failed') to ``on_event``
+    and history records to ``log(record)`` as in :func:`run_batch`.
+    """
+    log = log or (lambda record: log_download(db_path, record))
+    counts = {'ok': 0, 'fail': 0, 'total': len(urls)}
+    counts_lock = threading.Lock()
+    fmt = mode if mode in MODES else 'Video'
+    target_dir = os.path.join(download_dir, 'captions') if fmt == 'Captions' else download_dir
+    os.makedirs(target_dir, exist_ok=True)
+
+    def _download(job):
+        url = job.url
+        result = DownloadResult()
+
+        def progress_hook(d):
+            if d['status'] == 'downloading':
+                scheduler.report(job, hook_percent(d))
+            elif d['status'] == 'finished':
+                scheduler.report(job, 100)
+
+        if fmt == 'Captions':
+            opts = captions_options(target_dir, lang, cookies_path)
+        else:
+            opts = download_options(fmt, quality, target_dir, FLAT_OUTTMPL, referer=url, cookies_path=cookies_path,
+                                    archive_file=archive_file,
+                                    progress_hooks=[progress_hook, scheduler.bandwidth_hook(), result.progress_hook],
+                                    postprocessor_hooks=[result.postprocessor_hook])
+
+        def attempt():
+            scheduler.report(job, 0)
+            _emit(on_event, 'start', index=job.key + 1, total=counts['total'], url=url)
+            with ydl_pool.session(opts) as ydl:
+                return ydl.extract_info(url, download=True)
+
+        def on_error(count, error):
+            logging.error(f"Download failed for '{url}' attempt {count}: {error}")
+            if count < retries:
+                _emit(on_event, 'retry', url=url, attempt=count, error=str(error))
+
+        try:
+            info = with_retries(attempt, retries, on_error) or {}
+        except Exception as e:
+            with counts_lock:
+                counts['fail'] += 1
+            log(history_record(url, '', fmt, 'Failed', quality))
+            _emit(on_event, 'failed', url=url, error=str(e))
+            return
+        result.update_from_info(info)
+        scheduler.report(job, 100)
+        with counts_lock:
+            counts['ok'] += 1
+        title = info.get('title') or ''
+        log(history_record(url, title, fmt, 'Completed', quality, result=result,
+                           platform=info.get('extractor') or info.get('webpage_url')))
+        _emit(on_event, 'done', url=url, title=title, file=result.filepath)
+
+    resolved = list(urls)
+    if resolver is not None:
+        resolved = resolver.resolve_many(resolved)
+    scheduler.run([DownloadJob(i, u) for i, u in enumerate(resolved)], _download)
+    return counts
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Download result collection for Enhanced YouTube Downloader
+Captures the final output file reported by yt-dlp instead of scanning folders
+"""
+
+import os
+
+
+class DownloadResult:
+    """Collect the final file path, size and duration of one yt-dlp download.
+
+    Register :meth:`progress_hook` and :meth:`postprocessor_hook` with yt-dlp
+    (``progress_hooks`` / ``postprocessor_hooks``). The post-processor hook
+    fires after remuxing/extraction, so the last path it reports is the file
+    that actually stays on disk. :meth:`update_from_info` covers the info dict
+    returned by ``extract_info(download=True)``.
+    """
+
+    def __init__(self):
+        self.filepath = ''
+        self.duration = 0
+        self.filesize = 0
+
+    def _take_info(self, info):
+        if not isinstance(info, dict):
+            return
+        path = info.get('filepath') or info.get('_filename')
+        if path:
+            self.filepath = path
+        if info.get('duration'):
+            try:
+                self.duration = int(info['duration'])
+            except (TypeError, ValueError):
+                pass
+        size = info.get('filesize') or info.get('filesize_approx')
+        if size:
+            self.filesize = int(size)
+
+    def progress_hook(self, d):
+        if d.get('status') == 'finished':
+            if d.get('filename'):
+                self.filepath = d['filename']
+            if d.get('total_bytes'):
+                self.filesize = int(d['total_bytes'])
+            self._take_info(d.get('info_dict'))
+
+    def postprocessor_hook(self, d):
+        if d.get('status') == 'finished':
+            self._take_info(d.get('info_dict'))
+
+    def update_from_info(self, info):
+        """Take the final path from an info dict returned by yt-dlp"""
+        if not isinstance(info, dict):
+            return
+        requested = info.get('requested_downloads') or []
+        if requested:
+            self._take_info(requested[-1])
+        self._take_info({k: info.get(k) for k in ('filepath', 'duration')})
+
+    def file_size(self) -> int:
+        """Size of the final file on disk, falling back to the size yt-dlp reported"""
+        if self.filepath:
+            try:
+                return os.path.getsize(self.filepath)
+            except OSError:
+                pass
+        return self.filesize
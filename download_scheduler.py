@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Parallel download scheduler for Enhanced YouTube Downloader
+Keeps several items in flight with per-host and bandwidth limits
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_PER_HOST_LIMIT = 3
+
+
+def host_of(url: str) -> str:
+    """Return the lowercase host of a URL (empty string if it cannot be parsed)"""
+    try:
+        host = (urlparse(url).hostname or '').lower()
+    except Exception:
+        return ''
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+class BandwidthLimiter:
+    """Token bucket shared by every download of a scheduler.
+
+    Downloads report the bytes they received with :meth:`consume`, which
+    sleeps until the bucket has paid for them, so the combined rate stays
+    at ``rate`` bytes/s however many downloads are in flight. The bucket
+    starts empty and saves up at most one second of idle allowance.
+    """
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+
+    def consume(self, nbytes):
+        if nbytes <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            # Spend now and sleep off the debt; later callers queue behind it
+            self._tokens -= nbytes
+            wait = -self._tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+class DownloadJob:
+    """A single unit of work handed to the scheduler"""
+
+    def __init__(self, key, url, payload=None):
+        self.key = key
+        self.url = url
+        self.host = host_of(url)
+        self.payload = payload
+        self.percent = 0.0
+        self.result = None
+        self.error = None
+
+
+class DownloadScheduler:
+    """Run download jobs concurrently.
+
+    At most ``max_workers`` jobs run at once and at most ``per_host_limit`` of
+    them talk to the same host. ``bandwidth_limit`` (bytes/s, 0 = unlimited)
+    caps the jobs in flight together: each job adds :meth:`bandwidth_hook`
+    to its yt-dlp progress hooks, which throttles it against one shared
+    :class:`BandwidthLimiter`. Per-job percentages reported through
+    :meth:`report` are averaged over the whole batch and passed to
+    ``on_progress``.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                 bandwidth_limit=0, on_progress=None):
+        self.max_workers = max(1, int(max_workers or 1))
+        self.per_host_limit = max(1, int(per_host_limit or 1))
+        self.bandwidth_limit = max(0, int(bandwidth_limit or 0))
+        self.on_progress = on_progress
+        self._limiter = BandwidthLimiter(self.bandwidth_limit) if self.bandwidth_limit else None
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._active_per_host = {}
+        self._jobs = []
+        self._last_percent = -1
+        self._cancelled = False
+        self._paused = False
+
+    def bandwidth_hook(self):
+        """A yt-dlp progress hook for one job that throttles it to the shared bandwidth limit"""
+        received = {}
+
+        def hook(d):
+            if self._limiter is None or d.get('status') != 'downloading':
+                return
+            # downloaded_bytes counts per file; a job may fetch several (video + audio)
+            name = d.get('tmpfilename') or d.get('filename')
+            total = d.get('downloaded_bytes') or 0
+            delta = total - received.get(name, 0)
+            received[name] = total
+            self._limiter.consume(delta)
+
+        return hook
+
+    def report(self, job, percent):
+        """Record progress (0-100) for a job and publish the batch aggregate"""
+        try:
+            job.percent = max(0.0, min(100.0, float(percent)))
+        except (TypeError, ValueError):
+            return
+        self._publish()
+
+    def aggregate_percent(self):
+        """Average completion of all jobs in the current batch"""
+        with self._cond:
+            jobs = list(self._jobs)
+        if not jobs:
+            return 0
+        return int(sum(j.percent for j in jobs) / len(jobs))
+
+    def cancel(self):
+        """Stop dispatching new jobs; jobs already running finish normally"""
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+    def pause(self):
+        """Hold back pending jobs until :meth:`resume`; running jobs finish normally"""
+        with self._cond:
+            self._paused = True
+
+    def resume(self):
+        """Continue dispatching after :meth:`pause`"""
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def _publish(self):
+        if not self.on_progress:
+            return
+        value = self.aggregate_percent()
+        with self._cond:
+            if value == self._last_percent:
+                return
+            self._last_percent = value
+        try:
+            self.on_progress(value)
+        except Exception:
+            logging.exception('Download progress callback failed')
+
+    def _next_runnable(self, pending):
+        """Pick the first pending job whose host still has a free slot"""
+        for i, job in enumerate(pending):
+            if self._active_per_host.get(job.host, 0) < self.per_host_limit:
+                return pending.pop(i)
+        return None
+
+    def _finish(self, job):
+        with self._cond:
+            self._active -= 1
+            left = self._active_per_host.get(job.host, 1) - 1
+            if left > 0:
+                self._active_per_host[job.host] = left
+            else:
+                self._active_per_host.pop(job.host, None)
+            self._cond.notify_all()
+
+    def run(self, jobs, func):
+        """Run ``func(job)`` for every job and block until all have finished.
+
+        The return value of ``func`` is stored on ``job.result`` and any
+        exception on ``job.error``. Returns the list of jobs.
+        """
+        jobs = list(jobs)
+        with self._cond:
+            self._jobs = jobs
+            self._cancelled = False
+        self._last_percent = -1
+        pending = list(jobs)
+
+        def _wrapped(job):
+            try:
+                job.result = func(job)
+            except Exception as e:
+                logging.exception('Download job %s failed', job.key)
+                job.error = e
+            finally:
+                job.percent = 100.0
+                self._finish(job)
+                self._publish()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='download') as pool:
+            while True:
+                with self._cond:
+                    if self._cancelled or not pending:
+                        break
+                    job = None
+                    if not self._paused and self._active < self.max_workers:
+                        job = self._next_runnable(pending)
+                    if job is None:
+                        self._cond.wait()
+                        continue
+                    self._active += 1
+                    self._active_per_host[job.host] = self._active_per_host.get(job.host, 0) + 1
+                pool.submit(_wrapped, job)
+        return jobs
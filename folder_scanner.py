@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Folder scanner for Enhanced YouTube Downloader
+Finds media files with os.scandir and only re-reads directories that changed
+"""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+VIDEO_SUFFIXES = frozenset({'.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm'})
+MEDIA_SUFFIXES = VIDEO_SUFFIXES | frozenset({'.m4v', '.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac'})
+DEFAULT_SCAN_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_MAX_ROOTS = 16
+
+
+def has_suffix(name: str, suffixes=VIDEO_SUFFIXES) -> bool:
+    return os.path.splitext(name)[1].lower() in suffixes
+
+
+class FolderScanner:
+    """Recursive media file finder with a persisted snapshot of directory mtimes.
+
+    Each top-level subdirectory of the scanned folder is walked on its own
+    thread. For every directory the snapshot keeps its mtime, subdirectories
+    and matching files; on a rescan a directory whose mtime is unchanged is
+    only stat'ed, not listed again. Adding, removing or renaming entries
+    changes a directory's mtime, so the snapshot stays correct. Results can
+    be streamed through ``on_chunk(paths)``, which is called from worker
+    threads as files are found.
+    """
+
+    def __init__(self, snapshot_path=None, suffixes=VIDEO_SUFFIXES, max_workers=DEFAULT_SCAN_WORKERS,
+                 max_roots=DEFAULT_MAX_ROOTS):
+        self.snapshot_path = snapshot_path
+        self.suffixes = frozenset(s.lower() for s in suffixes)
+        self.max_workers = max(1, int(max_workers or 1))
+        self.max_roots = max_roots
+        self._lock = threading.Lock()
+        self._roots = {}
+        self._load()
+
+    def _load(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                self._roots = json.load(f)
+        except Exception:
+            logging.exception('Could not read scan snapshot %s', self.snapshot_path)
+            self._roots = {}
+
+    def _root_key(self, root, suffixes):
+        # Matches depend on the suffix set, so each set gets its own snapshot
+        return f"{os.path.normcase(os.path.abspath(root))}|{','.join(sorted(suffixes))}"
+
+    def _list_dir(self, path, old, suffixes):
+        """Snapshot entry of ``path`` (mtime, subdirs, matching files), reused from ``old`` when its mtime is unchanged"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        known = old.get(path)
+        if known is not None and known['mtime_ns'] == mtime_ns:
+            return known
+        subdirs, files = [], []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif has_suffix(entry.name, suffixes) and entry.is_file():
+                            files.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            return None  # unreadable, like os.walk we skip it
+        return {'mtime_ns': mtime_ns, 'dirs': subdirs, 'files': files}
+
+    def _walk(self, top, old, suffixes, emit):
+        """Walk ``top`` depth-first; returns the snapshot entries of the visited directories"""
+        seen = {}
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            listing = self._list_dir(path, old, suffixes)
+            if listing is None:
+                continue
+            seen[path] = listing
+            if listing['files']:
+                emit([os.path.join(path, name) for name in listing['files']])
+            stack.extend(os.path.join(path, name) for name in reversed(listing['dirs']))
+        return seen
+
+    def scan(self, root, on_chunk=None, chunk_size=DEFAULT_CHUNK_SIZE, suffixes=None) -> list:
+        """All files under ``root`` with a matching suffix (default: the scanner's), sorted"""
+        suffixes = self.suffixes if suffixes is None else frozenset(s.lower() for s in suffixes)
+        key = self._root_key(root, suffixes)
+        with self._lock:
+            old = self._roots.get(key) or {}
+        found = []
+        pending = []
+        emit_lock = threading.Lock()
+
+        def emit(paths):
+            chunk = None
+            with emit_lock:
+                found.extend(paths)
+                if on_chunk is not None:
+                    pending.extend(paths)
+                    if len(pending) >= chunk_size:
+                        chunk = pending[:]
+                        pending.clear()
+            if chunk:
+                on_chunk(chunk)
+
+        top = self._list_dir(root, old, suffixes)
+        if top is None:
+            return []
+        snapshot = {root: top}
+        if top['files']:
+            emit([os.path.join(root, name) for name in top['files']])
+        subdirs = [os.path.join(root, name) for name in top['dirs']]
+        if subdirs:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(subdirs)),
+                                    thread_name_prefix='scan') as pool:
+                for seen in pool.map(lambda d: self._walk(d, old, suffixes, emit), subdirs):
+                    snapshot.update(seen)
+        if pending and on_chunk is not None:
+            on_chunk(pending[:])
+
+        with self._lock:
+            self._roots.pop(key, None)
+            self._roots[key] = snapshot
+            while len(self._roots) > self.max_roots:
+                del self._roots[next(iter(self._roots))]
+        self.save()
+        return sorted(found)
+
+    def save(self):
+        """Write the snapshot to disk (atomically)"""
+        if not self.snapshot_path:
+            return
+        tmp = self.snapshot_path + '.tmp'
+        # Held while writing so concurrent scans do not share the temp file
+        with self._lock:
+            try:
+                d = os.path.dirname(self.snapshot_path)
+                if d:
+                    os.makedirs(d, exist_ok=True)
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self._roots, f)
+                os.replace(tmp, self.snapshot_path)
+            except Exception:
+                logging.exception('Could not write scan snapshot %s', self.snapshot_path)
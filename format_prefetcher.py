@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Format prefetcher for Enhanced YouTube Downloader
+Resolves formats for playlist entries in the background, selection first
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+
+PRIORITY_SELECTED = 0
+PRIORITY_VISIBLE = 1
+DEFAULT_PREFETCH_WORKERS = 2
+
+
+def available_heights(info: dict) -> set:
+    """Video heights offered by an info dict's formats"""
+    heights = set()
+    for f in (info or {}).get('formats') or []:
+        vcodec = f.get('vcodec')
+        height = f.get('height')
+        if vcodec and vcodec != 'none' and isinstance(height, int):
+            heights.add(height)
+    return heights
+
+
+def common_heights(infos) -> list:
+    """Heights available for every one of ``infos``, highest first"""
+    common = None
+    for info in infos:
+        heights = available_heights(info)
+        common = heights if common is None else common & heights
+    return sorted(common or (), reverse=True)
+
+
+class FormatPrefetcher:
+    """Bounded pool of threads resolving info dicts into an :class:`InfoCache`.
+
+    ``fetch(payload)`` performs the extraction and returns the info dict that
+    is stored under the request's key. Requests are served from a priority
+    queue: the current selection (:data:`PRIORITY_SELECTED`) jumps ahead of
+    entries that are merely visible. :meth:`fetch_now` lets a caller wait for
+    one key, raising its priority first.
+    """
+
+    def __init__(self, fetch, cache, max_workers=DEFAULT_PREFETCH_WORKERS, on_ready=None):
+        self.fetch = fetch
+        self.cache = cache
+        self.max_workers = max(1, int(max_workers or 1))
+        self.on_ready = on_ready
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._queued = {}    # key -> (priority, payload)
+        self._running = set()
+        self._errors = {}
+        self._threads = []
+        self._closed = False
+
+    def request(self, key, payload, priority=PRIORITY_VISIBLE):
+        """Queue ``key`` unless it is cached or running; a lower priority value moves it forward"""
+        if not key or key in self.cache:
+            return
+        with self._cond:
+            if self._closed or key in self._running:
+                return
+            queued = self._queued.get(key)
+            if queued is not None and queued[0] <= priority:
+                return
+            self._queued[key] = (priority, payload)
+            self._errors.pop(key, None)
+            heapq.heappush(self._heap, (priority, next(self._seq), key))
+            self._ensure_workers()
+            self._cond.notify()
+
+    def fetch_now(self, key, payload, timeout=None):
+        """Return the info dict for ``key``, fetching it ahead of everything else if needed"""
+        info = self.cache.get(key)
+        if info is not None:
+            return info
+        self.request(key, payload, PRIORITY_SELECTED)
+        with self._cond:
+            self._cond.wait_for(lambda: key not in self._queued and key not in self._running, timeout)
+            error = self._errors.pop(key, None)
+        if error is not None:
+            raise error
+        info = self.cache.get(key)
+        if info is None:
+            # Closed, timed out or evicted meanwhile: fetch directly
+            info = self.fetch(payload)
+            self.cache.put(key, info)
+        return info
+
+    def clear(self):
+        """Drop queued requests (running ones finish), e.g. when a new playlist is fetched"""
+        with self._cond:
+            self._heap.clear()
+            self._queued.clear()
+            self._errors.clear()
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._heap.clear()
+            self._queued.clear()
+            self._cond.notify_all()
+
+    def _ensure_workers(self):
+        # Lock held; workers remove themselves from _threads before exiting
+        if len(self._threads) < min(self.max_workers, len(self._queued) + len(self._running)):
+            t = threading.Thread(target=self._work, name='format-prefetch', daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _next(self):
+        """Pop the most urgent live request (lock held); stale heap items are skipped"""
+        while self._heap:
+            priority, _, key = heapq.heappop(self._heap)
+            queued = self._queued.get(key)
+            if queued is not None and queued[0] == priority:
+                del self._queued[key]
+                return key, queued[1]
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                item = None
+                while not self._closed:
+                    item = self._next()
+                    if item is not None:
+                        break
+                    # Idle workers exit; new requests start them again
+                    if not self._cond.wait(timeout=5) and not self._heap:
+                        break
+                if item is None:
+                    self._threads.remove(threading.current_thread())
+                    return
+                key, payload = item
+                self._running.add(key)
+            try:
+                info = self.fetch(payload)
+                self.cache.put(key, info)
+            except Exception as e:
+                logging.info('Format prefetch failed for %s: %s', key, e)
+                with self._cond:
+                    self._errors[key] = e
+            finally:
+                with self._cond:
+                    self._running.discard(key)
+                    self._cond.notify_all()
+            if self.on_ready is not None:
+                try:
+                    self.on_ready(key)
+                except Exception:
+                    logging.exception('Format prefetch callback failed')
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+History database for Enhanced YouTube Downloader
+Schema of the downloads table, its versioned migrations and the record writes/queries
+"""
+
+import logging
+import re
+import sqlite3
+import time
+import traceback
+from datetime import datetime
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Records per history_page call
+PAGE_SIZE = 200
+# Columns of the downloads_fts full-text index
+FTS_COLUMNS = ('title', 'url', 'platform')
+_WORD_RE = re.compile(r'\w+')
+# Columns history_page can order by
+SORT_COLUMNS = ('title', 'url', 'format', 'quality', 'status', 'file_size', 'duration', 'download_ts', 'platform')
+
+
+def _create_downloads(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS downloads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT,
+            title TEXT,
+            format TEXT,
+            quality TEXT,
+            status TEXT,
+            download_date TEXT,
+            file_size INTEGER,
+            duration INTEGER,
+            platform TEXT,
+            file_path TEXT
+        )
+    ''')
+
+
+def _add_download_ts(conn):
+    # Sortable epoch seconds next to the display text; the text is local time,
+    # which the 'utc' modifier converts like time.mktime does for new rows
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(downloads)')}
+    if 'download_ts' not in columns:
+        conn.execute('ALTER TABLE downloads ADD COLUMN download_ts INTEGER')
+    conn.execute("UPDATE downloads SET download_ts = CAST(strftime('%s', download_date, 'utc') AS INTEGER) "
+                 "WHERE download_ts IS NULL AND download_date IS NOT NULL")
+    for column in ('download_ts', 'status', 'format', 'platform', 'url'):
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_downloads_{column} ON downloads ({column})')
+
+
+def _sort_filter_indexes(conn):
+    # Equality filters are combined with the newest-first order, so these
+    # indexes also carry download_ts (and the rowid) to avoid a sort
+    for column in ('status', 'format'):
+        conn.execute(f'DROP INDEX IF EXISTS idx_downloads_{column}')
+        conn.execute(f'CREATE INDEX idx_downloads_{column} ON downloads ({column}, download_ts)')
+
+
+def _full_text_index(conn):
+    # External-content FTS5 index over downloads, kept in sync by triggers.
+    # Builds without FTS5 skip it (history_where falls back to LIKE) and
+    # init_history_db retries once SQLite supports it.
+    if not _create_full_text(conn):
+        logging.warning('SQLite has no FTS5; history search will scan the table')
+
+
+def _create_full_text(conn) -> bool:
+    columns = ', '.join(FTS_COLUMNS)
+    new = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+    old = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+    try:
+        conn.execute(f"CREATE VIRTUAL TABLE downloads_fts USING fts5({columns}, content='downloads', "
+                     "content_rowid='id', prefix='2 3')")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute(f'''CREATE TRIGGER downloads_fts_insert AFTER INSERT ON downloads BEGIN
+        INSERT INTO downloads_fts (rowid, {columns}) VALUES (new.id, {new});
+    END''')
+    conn.execute(f'''CREATE TRIGGER downloads_fts_delete AFTER DELETE ON downloads BEGIN
+        INSERT INTO downloads_fts (downloads_fts, rowid, {columns}) VALUES ('delete', old.id, {old});
+    END''')
+    conn.execute(f'''CREATE TRIGGER downloads_fts_update AFTER UPDATE OF {columns} ON downloads BEGIN
+        INSERT INTO downloads_fts (downloads_fts, rowid, {columns}) VALUES ('delete', old.id, {old});
+        INSERT INTO downloads_fts (rowid, {columns}) VALUES (new.id, {new});
+    END''')
+    conn.execute("INSERT INTO downloads_fts (downloads_fts) VALUES ('rebuild')")
+    return True
+
+
+# MIGRATIONS[n] upgrades a database from user_version n to n + 1. Append new
+# steps; never edit one that has shipped.
+MIGRATIONS = (
+    _create_downloads,
+    _add_download_ts,
+    _sort_filter_indexes,
+    _full_text_index,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn) -> int:
+    """Apply the pending migrations, each in its own transaction; returns the new version.
+
+    The version is re-read under a write lock, so two processes opening an
+    old database at once do not run a step twice.
+    """
+    isolation = conn.isolation_level
+    conn.isolation_level = None  # explicit transactions, DDL included
+    try:
+        while schema_version(conn) < SCHEMA_VERSION:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                version = schema_version(conn)
+                if version < SCHEMA_VERSION:
+                    MIGRATIONS[version](conn)
+                    conn.execute(f'PRAGMA user_version = {version + 1}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return schema_version(conn)
+    finally:
+        conn.isolation_level = isolation
+
+
+def init_history_db(db_path):
+    """Create the downloads table or bring an existing one up to SCHEMA_VERSION"""
+    try:
+        conn = sqlite3.connect(db_path, timeout=5)
+        try:
+            migrate(conn)
+            if not has_full_text(conn):
+                _add_missing_full_text(conn)
+        finally:
+            conn.close()
+    except Exception:
+        logging.exception('Could not create or migrate history DB %s', db_path)
+
+
+def _add_missing_full_text(conn):
+    """Build downloads_fts if migration 4 ran on a SQLite without FTS5"""
+    isolation = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if not has_full_text(conn):
+                _create_full_text(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    finally:
+        conn.isolation_level = isolation
+
+
+def date_to_ts(text):
+    """Epoch seconds of a local 'YYYY-MM-DD HH:MM:SS' date, or None"""
+    try:
+        return int(time.mktime(datetime.strptime(text, DATE_FORMAT).timetuple()))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+INSERT_SQL = '''
+    INSERT INTO downloads (url, title, format, quality, status, download_date, download_ts,
+                           file_size, duration, platform, file_path)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def record_values(record: dict) -> tuple:
+    """Parameters of INSERT_SQL for a history record"""
+    ts = record.get('download_ts')
+    if ts is None:
+        ts = date_to_ts(record.get('download_date'))
+    return (record.get('url'), record.get('title'), record.get('format'), record.get('quality'),
+            record.get('status'), record.get('download_date'), ts, record.get('file_size'),
+            record.get('duration'), record.get('platform'), record.get('file_path'))
+
+
+def log_download(db_path, record: dict):
+    """Insert a download record; a fresh connection per call keeps this usable from any thread"""
+    try:
+        conn = sqlite3.connect(db_path, timeout=5)
+        cur = conn.cursor()
+        cur.execute(INSERT_SQL, record_values(record))
+        conn.commit()
+        conn.close()
+    except Exception:
+        logging.exception('Failed to log download record: %s', traceback.format_exc())
+
+
+def has_full_text(conn) -> bool:
+    """True if the downloads_fts index exists (SQLite built with FTS5)"""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'downloads_fts'").fetchone() is not None
+
+
+def fts_query(text, columns=None):
+    """FTS5 MATCH expression finding records with words starting with each word of ``text``.
+
+    None if ``text`` has no words. ``columns`` limits the match to those
+    downloads_fts columns.
+    """
+    words = _WORD_RE.findall(str(text or ''))
+    if not words:
+        return None
+    query = ' AND '.join(f'"{word}"*' for word in words)
+    if columns:
+        query = '{%s} : (%s)' % (' '.join(columns), query)
+    return query
+
+
+def history_where(filters, fts=True) -> tuple:
+    """WHERE clause (without the keyword) and parameters for history ``filters``.
+
+    Keys: ``status`` and ``format`` (exact), ``title``, ``url`` and
+    ``search`` (title or URL), ``since`` and ``until`` (epoch seconds,
+    until exclusive). Missing or empty keys do not filter. Text filters
+    match word prefixes through downloads_fts when ``fts`` is true, and
+    are substring matches otherwise (or when the text has no words).
+    """
+    filters = filters or {}
+    where, params = [], []
+    for column in ('status', 'format'):
+        if filters.get(column):
+            where.append(f'{column} = ?')
+            params.append(filters[column])
+    for key, columns in (('title', ('title',)), ('url', ('url',)), ('search', ('title', 'url'))):
+        text = filters.get(key)
+        if not text:
+            continue
+        query = fts_query(text, columns) if fts else None
+        if query:
+            where.append('id IN (SELECT rowid FROM downloads_fts WHERE downloads_fts MATCH ?)')
+            params.append(query)
+        else:
+            where.append('(' + ' OR '.join(f"{c} LIKE ? ESCAPE '\\'" for c in columns) + ')')
+            params += [_like_pattern(text)] * len(columns)
+    if filters.get('since') is not None:
+        where.append('download_ts >= ?')
+        params.append(int(filters['since']))
+    if filters.get('until') is not None:
+        where.append('download_ts < ?')
+        params.append(int(filters['until']))
+    return ' AND '.join(where) or '1', params
+
+
+def _like_pattern(text) -> str:
+    escaped = str(text).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def history_page(db_path, filters=None, after=None, limit=PAGE_SIZE, sort='download_ts', descending=True) -> list:
+    """One page of records matching ``filters``, ordered by ``sort`` (newest first by default).
+
+    ``after`` is page_key() of the last record of the previous page; paging
+    by key instead of OFFSET keeps every page as fast as the first. Ties
+    are ordered by id. Records whose ``sort`` column is NULL come after
+    the others when descending and before them when ascending, as in
+    SQLite's own ordering.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f'Cannot sort history by {sort!r}')
+    direction, op = ('DESC', '<') if descending else ('ASC', '>')
+    # (is-NULL segment) in the order they are listed
+    segments = (False, True) if descending else (True, False)
+    first = 0 if after is None else segments.index(after[0] is None)
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        conn.row_factory = sqlite3.Row
+        where, params = history_where(filters, fts=has_full_text(conn))
+        rows = []
+        for i in range(first, len(segments)):
+            sql, args = f'SELECT * FROM downloads WHERE {where}', list(params)
+            if segments[i]:
+                sql += f' AND {sort} IS NULL'
+                if after is not None and i == first:
+                    sql += f' AND id {op} ?'
+                    args.append(after[1])
+                sql += f' ORDER BY id {direction}'
+            else:
+                sql += f' AND {sort} IS NOT NULL'
+                if after is not None and i == first:
+                    sql += f' AND ({sort}, id) {op} (?, ?)'
+                    args += [after[0], after[1]]
+                sql += f' ORDER BY {sort} {direction}, id {direction}'
+            rows += [dict(r) for r in conn.execute(sql + ' LIMIT ?', args + [limit - len(rows)])]
+            if len(rows) == limit:
+                break
+        return rows
+    finally:
+        conn.close()
+
+
+def history_count(db_path, filters=None) -> int:
+    """Number of records matching ``filters``, counted over the same indexes as history_page"""
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        where, params = history_where(filters, fts=has_full_text(conn))
+        return conn.execute(f'SELECT COUNT(*) FROM downloads WHERE {where}', params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def page_key(row, sort='download_ts') -> tuple:
+    """``after`` argument of history_page for the page ending with ``row``"""
+    return row[sort], row['id']
+
+
+def iter_history(db_path, filters=None, sort='download_ts', descending=True):
+    """Every record matching ``filters`` in history_page order, read a page at a time"""
+    key = None
+    while True:
+        rows = history_page(db_path, filters, after=key, sort=sort, descending=descending)
+        yield from rows
+        if len(rows) < PAGE_SIZE:
+            return
+        key = page_key(rows[-1], sort)
+
+
+def history_search(db_path, text, limit=50) -> list:
+    """Records matching the words of ``text``, best match first (title words weigh most)"""
+    query = fts_query(text)
+    if query is None:
+        return []
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        conn.row_factory = sqlite3.Row
+        if not has_full_text(conn):
+            return history_page(db_path, {'search': text}, limit=limit)
+        rows = conn.execute(
+            'SELECT downloads.* FROM downloads_fts JOIN downloads ON downloads.id = downloads_fts.rowid '
+            'WHERE downloads_fts MATCH ? ORDER BY bm25(downloads_fts, 10.0, 2.0, 1.0) LIMIT ?', (query, limit))
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def history_stats(db_path) -> list:
+    """(status, format, count, total size, total duration) for every status/format pair"""
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        return conn.execute(
+            'SELECT status, format, COUNT(*), SUM(COALESCE(file_size, 0)), SUM(COALESCE(duration, 0)) '
+            'FROM downloads GROUP BY status, format').fetchall()
+    finally:
+        conn.close()
+
+
+def history_rows(db_path, limit=50, status=None, search=None) -> list:
+    """Newest download records as dicts, optionally filtered by status and title/URL text"""
+    return history_page(db_path, {'status': status, 'search': search}, limit=limit)
@@ -6,12 +6,17 @@ Download History Dialog for Enhanced YouTube Downloader
 import os
 import sqlite3
 import subprocess
-from datetime import datetime
+from history_db import init_history_db, history_count, history_stats, iter_history, date_to_ts
+from history_model import (HistoryTableModel, COLUMNS, DATE_COLUMN, display_record, format_file_size,
+                           format_duration)
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-                            QPushButton, QTableWidget, QTableWidgetItem,
+                            QPushButton, QTableView, QTableWidgetItem,
                             QMessageBox, QHeaderView, QMenu, QAbstractItemView)
 
+# Typing in the search boxes re-queries once the user pauses this long
+FILTER_DELAY_MS = 250
+
 class HistoryDialog(QDialog):
     """Dialog for viewing and managing download history"""
     
@@ -42,14 +47,16 @@ class HistoryDialog(QDialog):
         filter_layout.addWidget(QLabel("Title:"))
         self.title_filter = QtWidgets.QLineEdit()
         self.title_filter.setPlaceholderText("Search by title...")
-        self.title_filter.textChanged.connect(self._apply_filters)
+        self.title_filter.setToolTip("Finds titles with words starting with each word typed")
+        self.title_filter.textChanged.connect(self._schedule_filter)
         filter_layout.addWidget(self.title_filter)
         
         # URL search
         filter_layout.addWidget(QLabel("URL:"))
         self.url_filter = QtWidgets.QLineEdit()
         self.url_filter.setPlaceholderText("Search by URL...")
-        self.url_filter.textChanged.connect(self._apply_filters)
+        self.url_filter.setToolTip("Finds URLs with parts starting with each word typed")
+        self.url_filter.textChanged.connect(self._schedule_filter)
         filter_layout.addWidget(self.url_filter)
         
         # Status filter
@@ -66,19 +73,22 @@ class HistoryDialog(QDialog):
         self.format_filter.currentTextChanged.connect(self._apply_filters)
         filter_layout.addWidget(self.format_filter)
         
-        # Date range
+        # Date range (off until a date is picked, so older history is listed too)
+        self.date_filter_check = QtWidgets.QCheckBox("Filter by date")
+        self.date_filter_check.toggled.connect(self._apply_filters)
+        filter_layout.addWidget(self.date_filter_check)
         filter_layout.addWidget(QLabel("From:"))
         self.date_from = QtWidgets.QDateEdit()
         self.date_from.setDate(QtCore.QDate.currentDate().addDays(-30))
         self.date_from.setCalendarPopup(True)
-        self.date_from.dateChanged.connect(self._apply_filters)
+        self.date_from.dateChanged.connect(self._on_date_changed)
         filter_layout.addWidget(self.date_from)
         
         filter_layout.addWidget(QLabel("To:"))
         self.date_to = QtWidgets.QDateEdit()
         self.date_to.setDate(QtCore.QDate.currentDate())
         self.date_to.setCalendarPopup(True)
-        self.date_to.dateChanged.connect(self._apply_filters)
+        self.date_to.dateChanged.connect(self._on_date_changed)
         filter_layout.addWidget(self.date_to)
         
         # Filter buttons
@@ -165,25 +175,24 @@ class HistoryDialog(QDialog):
         
         right_layout.addLayout(header_layout)
         
-        # History table
-        self.history_table = QTableWidget()
-        # There are 9 columns: Title, URL, Format, Quality, Status, File Size, Duration, Download Date, Platform
-        self.history_table.setColumnCount(9)
-        self.history_table.setHorizontalHeaderLabels([
-            "Title", "URL", "Format", "Quality", "Status", "File Size", "Duration", "Download Date", "Platform"
-        ])
+        # History table: a view over records fetched from the database as it scrolls
+        self.history_model = HistoryTableModel(self.db_path, self)
+        self._match_count = 0
+        self.history_model.modelReset.connect(self._update_found)
+        self.history_model.rowsInserted.connect(self._update_found)
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
         
         # Configure table
         header = self.history_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.Stretch)  # Title column stretches
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(7, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(8, QHeaderView.ResizeToContents)
+        for column in range(1, len(COLUMNS)):
+            header.setSectionResizeMode(column, QHeaderView.Interactive)
+        # Fixed row heights, so scrolling never measures rows
+        self.history_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.history_table.verticalHeader().hide()
+        header.setSortIndicator(DATE_COLUMN, QtCore.Qt.DescendingOrder)
+        self.history_table.setSortingEnabled(True)
         
         self.history_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.history_table.setAlternatingRowColors(True)
@@ -217,101 +226,65 @@ class HistoryDialog(QDialog):
         
         main_layout.addWidget(right_panel)
         
-        # Store all history data for filtering
-        self.all_history_data = []
+        self._filter_timer = QtCore.QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_DELAY_MS)
+        self._filter_timer.timeout.connect(self._apply_filters)
     
     def _load_history(self):
-        """Load download history from database"""
+        """Load statistics and the first page of records from the database"""
         try:
             if not os.path.exists(self.db_path):
                 self.status_label.setText("No history database found.")
                 return
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, url, title, format, quality, status, download_date, 
-                       file_size, duration, platform, file_path
-                FROM downloads 
-                ORDER BY download_date DESC 
-                LIMIT 1000
-            ''')
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # Store all data for filtering
-            self.all_history_data = []
-            
-            for row in rows:
-                (id_, url, title, format_, quality, status, download_date, 
-                 file_size, duration, platform, file_path) = row
-                
-                # Format date for storage
-                formatted_date = download_date or ""
-                if download_date:
-                    try:
-                        # Handle different date formats
-                        if isinstance(download_date, str):
-                            formatted_date = download_date
-                        else:
-                            formatted_date = str(download_date)
-                    except:
-                        formatted_date = download_date or ""
-                
-                item_data = {
-                    'id': id_,
-                    'url': url or '',
-                    'title': title or 'Unknown Title',
-                    'format': format_ or 'Unknown',
-                    'quality': quality or 'Unknown',
-                    'file_path': file_path or '',
-                    'file_size': file_size or 0,
-                    'duration': duration or 0,
-                    'status': status or 'Unknown',
-                    'platform': platform or 'Unknown',
-                    'download_date': formatted_date
-                }
-                
-                self.all_history_data.append(item_data)
-            
-            # Populate table with all data initially
-            self._populate_table(self.all_history_data)
-            self.status_label.setText(f"Showing {len(rows)} download(s)")
+            # Databases written by older versions are upgraded (indexes, download_ts) in place
+            init_history_db(self.db_path)
+            self._update_statistics()
+            self._apply_filters()
+            # Sized once from the first page; later pages and filters keep the widths
+            self.history_table.resizeColumnsToContents()
             
         except Exception as e:
             self.status_label.setText(f"Error loading history: {e}")
             QMessageBox.critical(self, "Database Error", f"Failed to load history:\n{e}")
     
+    def _current_filters(self):
+        """The filter widgets as history_db filters"""
+        filters = {
+            'title': self.title_filter.text().strip(),
+            'url': self.url_filter.text().strip(),
+            'status': '' if self.status_filter.currentText() == "All" else self.status_filter.currentText(),
+            'format': '' if self.format_filter.currentText() == "All" else self.format_filter.currentText(),
+        }
+        if self.date_filter_check.isChecked():
+            date_from = self.date_from.date().toPyDate()
+            date_to = self.date_to.date().toPyDate()
+            filters['since'] = date_to_ts(date_from.strftime('%Y-%m-%d 00:00:00'))
+            # Whole days: up to the start of the day after "To"
+            filters['until'] = date_to_ts(date_to.strftime('%Y-%m-%d 00:00:00')) + 24 * 60 * 60
+        return filters
+    
+    def _update_found(self):
+        self.found_label.setText(f"Found {self._match_count} downloads")
+        self.status_label.setText(f"Showing {self.history_model.rowCount()} download(s)")
+    
     def _format_file_size(self, size_bytes):
         """Format file size in human readable format"""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB", "TB"]
-        i = 0
-        while size_bytes >= 1024 and i < len(size_names) - 1:
-            size_bytes /= 1024.0
-            i += 1
-        
-        return f"{size_bytes:.1f} {size_names[i]}"
+        return format_file_size(size_bytes)
     
     def _format_duration(self, duration_seconds):
         """Format duration in HH:MM:SS format"""
-        hours = duration_seconds // 3600
-        minutes = (duration_seconds % 3600) // 60
-        seconds = duration_seconds % 60
-        
-        if hours > 0:
-            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        else:
-            return f"{minutes:02d}:{seconds:02d}"
+        return format_duration(duration_seconds)
+    
+    def _selected_records(self):
+        """Record dicts of the selected rows, in row order"""
+        rows = sorted(index.row() for index in self.history_table.selectionModel().selectedRows())
+        return [self.history_model.record(row) for row in rows]
     
     def _show_context_menu(self, position):
         """Show context menu for table items"""
-        item = self.history_table.itemAt(position)
-        if item is None:
+        if not self.history_table.indexAt(position).isValid():
             return
         
         menu = QMenu(self)
@@ -330,25 +303,17 @@ class HistoryDialog(QDialog):
         delete_action = menu.addAction("Delete from History")
         delete_action.triggered.connect(self._delete_selected)
         
-        menu.exec_(self.history_table.mapToGlobal(position))
+        menu.exec_(self.history_table.viewport().mapToGlobal(position))
     
     def _redownload_selected(self):
         """Re-download selected items"""
-        selected_rows = set()
-        for item in self.history_table.selectedItems():
-            selected_rows.add(item.row())
+        records = self._selected_records()
         
-        if not selected_rows:
+        if not records:
             QMessageBox.warning(self, "No Selection", "Please select items to re-download.")
             return
         
-        urls = []
-        for row in selected_rows:
-            title_item = self.history_table.item(row, 0)
-            if title_item:
-                data = title_item.data(QtCore.Qt.UserRole)
-                if data and data.get('url'):
-                    urls.append(data['url'])
+        urls = [data['url'] for data in records if data.get('url')]
         
         if urls:
             QMessageBox.information(
@@ -366,70 +331,56 @@ class HistoryDialog(QDialog):
     
     def _open_file_location(self):
         """Open file location in explorer"""
-        selected_rows = set()
-        for item in self.history_table.selectedItems():
-            selected_rows.add(item.row())
+        records = self._selected_records()
         
-        if not selected_rows:
+        if not records:
             QMessageBox.warning(self, "No Selection", "Please select an item to open its location.")
             return
         
-        row = list(selected_rows)[0]  # Take first selected row
-        title_item = self.history_table.item(row, 0)
-        
-        if title_item:
-            data = title_item.data(QtCore.Qt.UserRole)
-            if data and data.get('file_path'):
-                file_path = data['file_path']
-                if os.path.exists(file_path):
-                    try:
-                        if os.name == 'nt':  # Windows
-                            subprocess.run(['explorer', '/select,', file_path])
-                        elif os.name == 'posix':  # macOS/Linux
-                            if 'darwin' in os.sys.platform:  # macOS
-                                subprocess.run(['open', '-R', file_path])
-                            else:  # Linux
-                                subprocess.run(['xdg-open', os.path.dirname(file_path)])
-                    except Exception as e:
-                        QMessageBox.warning(self, "Error", f"Could not open file location:\n{e}")
-                else:
-                    QMessageBox.warning(self, "File Not Found", "The downloaded file no longer exists.")
+        data = records[0]  # Take first selected row
+        if data.get('file_path'):
+            file_path = data['file_path']
+            if os.path.exists(file_path):
+                try:
+                    if os.name == 'nt':  # Windows
+                        subprocess.run(['explorer', '/select,', file_path])
+                    elif os.name == 'posix':  # macOS/Linux
+                        if 'darwin' in os.sys.platform:  # macOS
+                            subprocess.run(['open', '-R', file_path])
+                        else:  # Linux
+                            subprocess.run(['xdg-open', os.path.dirname(file_path)])
+                except Exception as e:
+                    QMessageBox.warning(self, "Error", f"Could not open file location:\n{e}")
             else:
-                QMessageBox.warning(self, "No File Path", "No file path information available.")
+                QMessageBox.warning(self, "File Not Found", "The downloaded file no longer exists.")
+        else:
+            QMessageBox.warning(self, "No File Path", "No file path information available.")
     
     def _copy_url(self):
         """Copy URL to clipboard"""
-        selected_rows = set()
-        for item in self.history_table.selectedItems():
-            selected_rows.add(item.row())
+        records = self._selected_records()
         
-        if not selected_rows:
+        if not records:
             return
         
-        row = list(selected_rows)[0]
-        title_item = self.history_table.item(row, 0)
-        
-        if title_item:
-            data = title_item.data(QtCore.Qt.UserRole)
-            if data and data.get('url'):
-                clipboard = QtWidgets.QApplication.clipboard()
-                clipboard.setText(data['url'])
-                self.status_label.setText("URL copied to clipboard")
+        data = records[0]
+        if data.get('url'):
+            clipboard = QtWidgets.QApplication.clipboard()
+            clipboard.setText(data['url'])
+            self.status_label.setText("URL copied to clipboard")
     
     def _delete_selected(self):
         """Delete selected items from history"""
-        selected_rows = set()
-        for item in self.history_table.selectedItems():
-            selected_rows.add(item.row())
+        records = self._selected_records()
         
-        if not selected_rows:
+        if not records:
             QMessageBox.warning(self, "No Selection", "Please select items to delete.")
             return
         
         reply = QMessageBox.question(
             self,
             "Confirm Delete",
-            f"Delete {len(selected_rows)} item(s) from history?\n\nThis action cannot be undone.",
+            f"Delete {len(records)} item(s) from history?\n\nThis action cannot be undone.",
             QMessageBox.Yes | QMessageBox.No
         )
         
@@ -438,12 +389,9 @@ class HistoryDialog(QDialog):
                 conn = sqlite3.connect(self.db_path)
                 cursor = conn.cursor()
                 
-                for row in selected_rows:
-                    title_item = self.history_table.item(row, 0)
-                    if title_item:
-                        data = title_item.data(QtCore.Qt.UserRole)
-                        if data and data.get('id'):
-                            cursor.execute('DELETE FROM downloads WHERE id = ?', (data['id'],))
+                for data in records:
+                    if data.get('id'):
+                        cursor.execute('DELETE FROM downloads WHERE id = ?', (data['id'],))
                 
                 conn.commit()
                 conn.close()
@@ -475,44 +423,28 @@ class HistoryDialog(QDialog):
             except Exception as e:
                 QMessageBox.critical(self, "Database Error", f"Failed to clear history:\n{e}")
 
+    def _schedule_filter(self):
+        """Restart the debounce timer; the query runs once typing pauses"""
+        self._filter_timer.start()
+    
+    def _on_date_changed(self):
+        # Picking a date turns the date filter on
+        if self.date_filter_check.isChecked():
+            self._apply_filters()
+        else:
+            self.date_filter_check.setChecked(True)
+    
     def _apply_filters(self):
-        """Apply search and filter criteria"""
+        """Query the first page of records matching the filters"""
+        self._filter_timer.stop()
         try:
-            title_filter = self.title_filter.text().lower()
-            url_filter = self.url_filter.text().lower()
-            status_filter = self.status_filter.currentText()
-            format_filter = self.format_filter.currentText()
-            date_from = self.date_from.date().toPyDate()
-            date_to = self.date_to.date().toPyDate()
-            
-            filtered_data = []
-            
-            for item in self.all_history_data:
-                # Apply filters
-                if title_filter and title_filter not in item.get('title', '').lower():
-                    continue
-                if url_filter and url_filter not in item.get('url', '').lower():
-                    continue
-                if status_filter != "All" and item.get('status', '').lower() != status_filter.lower():
-                    continue
-                if format_filter != "All" and item.get('format', '').lower() != format_filter.lower():
-                    continue
-                
-                # Date filter
-                try:
-                    item_date = datetime.strptime(item.get('download_date', ''), '%Y-%m-%d %H:%M:%S').date()
-                    if item_date < date_from or item_date > date_to:
-                        continue
-                except:
-                    pass  # Skip date filtering if parsing fails
-                
-                filtered_data.append(item)
-            
-            self._populate_table(filtered_data)
-            self.found_label.setText(f"Found {len(filtered_data)} downloads")
-            
+            if os.path.exists(self.db_path):
+                filters = self._current_filters()
+                # Total matches, not just the rows loaded so far
+                self._match_count = history_count(self.db_path, filters)
+                self.history_model.set_filters(filters)
         except Exception as e:
-            print(f"Filter error: {e}")
+            self.status_label.setText(f"Filter error: {e}")
     
     def _clear_filters(self):
         """Clear all filters"""
@@ -520,8 +452,15 @@ class HistoryDialog(QDialog):
         self.url_filter.clear()
         self.status_filter.setCurrentText("All")
         self.format_filter.setCurrentText("All")
+        self.date_filter_check.blockSignals(True)
+        self.date_filter_check.setChecked(False)
+        self.date_filter_check.blockSignals(False)
+        self.date_from.blockSignals(True)
+        self.date_to.blockSignals(True)
         self.date_from.setDate(QtCore.QDate.currentDate().addDays(-30))
         self.date_to.setDate(QtCore.QDate.currentDate())
+        self.date_from.blockSignals(False)
+        self.date_to.blockSignals(False)
         self._apply_filters()
     
     def _export_csv(self):
@@ -544,8 +483,10 @@ class HistoryDialog(QDialog):
                         "File Size", "Duration", "Download Date", "Platform"
                     ])
                     
-                    # Write data
-                    for item in self.all_history_data:
+                    # Every record matching the filters, not only the loaded pages
+                    model = self.history_model
+                    for row in iter_history(self.db_path, model.filters, model.sort_column, model.descending):
+                        item = display_record(row)
                         writer.writerow([
                             item.get('title', ''),
                             item.get('url', ''),
@@ -563,46 +504,16 @@ class HistoryDialog(QDialog):
         except Exception as e:
             QMessageBox.warning(self, "Export Error", f"Failed to export history:\n{str(e)}")
 
-    def _populate_table(self, data: list):
-        """Populate the main history table from a list of record dicts.
-
-        Each record is expected to be a dict with keys: id, url, title, format, quality, status,
-        download_date, file_size, duration, platform, file_path
-        """
+    def _update_statistics(self):
+        """Totals and format breakdown over the whole history, aggregated in SQL"""
         try:
-            # Normalize
-            rows = data or []
-
-            # Clear existing table
-            self.history_table.setRowCount(0)
-
-            for i, item in enumerate(rows):
-                self.history_table.insertRow(i)
-                cols = [
-                    item.get('title', ''),
-                    item.get('url', ''),
-                    item.get('format', ''),
-                    item.get('quality', ''),
-                    item.get('status', ''),
-                    self._format_file_size(int(item.get('file_size', 0) or 0)),
-                    self._format_duration(int(item.get('duration', 0) or 0)),
-                    item.get('download_date', ''),
-                    item.get('platform', ''),
-                ]
-
-                for j, val in enumerate(cols):
-                    twi = QTableWidgetItem(str(val))
-                    # Attach the full item dict to the title column for context menu actions
-                    if j == 0:
-                        twi.setData(QtCore.Qt.UserRole, item)
-                    self.history_table.setItem(i, j, twi)
-
-            # Update summary labels based on all_history_data (not filtered subset)
-            total = len(self.all_history_data)
-            successful = sum(1 for it in self.all_history_data if str(it.get('status', '')).lower() in ('completed', 'success'))
-            failed = sum(1 for it in self.all_history_data if str(it.get('status', '')).lower() == 'failed')
-            total_size = sum(int(it.get('file_size', 0) or 0) for it in self.all_history_data)
-            total_duration = sum(int(it.get('duration', 0) or 0) for it in self.all_history_data)
+            stats = history_stats(self.db_path)
+            total = sum(count for _, _, count, _, _ in stats)
+            successful = sum(count for status, _, count, _, _ in stats
+                             if str(status or '').lower() in ('completed', 'success'))
+            failed = sum(count for status, _, count, _, _ in stats if str(status or '').lower() == 'failed')
+            total_size = sum(size or 0 for _, _, _, size, _ in stats)
+            total_duration = sum(duration or 0 for _, _, _, _, duration in stats)
 
             self.total_downloads_label.setText(f"Total Downloads: {total}")
             self.successful_downloads_label.setText(f"Successful: {successful}")
@@ -613,14 +524,10 @@ class HistoryDialog(QDialog):
             # Populate format breakdown
             self.format_table.setRowCount(0)
             format_counts = {}
-            for it in self.all_history_data:
-                fmt = it.get('format') or 'Unknown'
-                entry = format_counts.setdefault(fmt, {'count': 0, 'size': 0})
-                entry['count'] += 1
-                try:
-                    entry['size'] += int(it.get('file_size', 0) or 0)
-                except Exception:
-                    pass
+            for _, fmt, count, size, _ in stats:
+                entry = format_counts.setdefault(fmt or 'Unknown', {'count': 0, 'size': 0})
+                entry['count'] += count
+                entry['size'] += size or 0
 
             for r, (fmt, info) in enumerate(sorted(format_counts.items(), key=lambda x: x[0])):
                 self.format_table.insertRow(r)
@@ -628,11 +535,8 @@ class HistoryDialog(QDialog):
                 self.format_table.setItem(r, 1, QTableWidgetItem(str(info['count'])))
                 self.format_table.setItem(r, 2, QTableWidgetItem(self._format_file_size(info['size'])))
 
-            # Update found label
-            self.found_label.setText(f"Found {len(rows)} downloads")
-
         except Exception as e:
-            QMessageBox.critical(self, "Database Error", f"Failed to populate table:\n{e}")
+            QMessageBox.critical(self, "Database Error", f"Failed to load statistics:\n{e}")
 
 if __name__ == '__main__':
     import sys
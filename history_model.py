@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+History table model for Enhanced YouTube Downloader
+Lazily fetched, SQL-sorted view of the downloads table for the history dialog
+"""
+
+import logging
+
+from PyQt5 import QtCore
+
+from history_db import history_page, page_key, PAGE_SIZE
+
+# (header, downloads column it shows and is sorted by)
+COLUMNS = (
+    ("Title", 'title'),
+    ("URL", 'url'),
+    ("Format", 'format'),
+    ("Quality", 'quality'),
+    ("Status", 'status'),
+    ("File Size", 'file_size'),
+    ("Duration", 'duration'),
+    ("Download Date", 'download_ts'),
+    ("Platform", 'platform'),
+)
+DATE_COLUMN = 7
+# Role returning the record dict (see display_record) of a row
+RecordRole = QtCore.Qt.UserRole
+
+
+def format_file_size(size_bytes):
+    """Format file size in human readable format"""
+    if size_bytes == 0:
+        return "0 B"
+
+    size_names = ["B", "KB", "MB", "GB", "TB"]
+    i = 0
+    while size_bytes >= 1024 and i < len(size_names) - 1:
+        size_bytes /= 1024.0
+        i += 1
+
+    return f"{size_bytes:.1f} {size_names[i]}"
+
+
+def format_duration(duration_seconds):
+    """Format duration in HH:MM:SS format"""
+    hours = duration_seconds // 3600
+    minutes = (duration_seconds % 3600) // 60
+    seconds = duration_seconds % 60
+
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    else:
+        return f"{minutes:02d}:{seconds:02d}"
+
+
+def display_record(row):
+    """A downloads row with placeholders for missing values"""
+    return {
+        'id': row['id'],
+        'url': row['url'] or '',
+        'title': row['title'] or 'Unknown Title',
+        'format': row['format'] or 'Unknown',
+        'quality': row['quality'] or 'Unknown',
+        'file_path': row['file_path'] or '',
+        'file_size': row['file_size'] or 0,
+        'duration': row['duration'] or 0,
+        'status': row['status'] or 'Unknown',
+        'platform': row['platform'] or 'Unknown',
+        'download_date': row['download_date'] or '',
+    }
+
+
+class HistoryTableModel(QtCore.QAbstractTableModel):
+    """Download records matching a filter, fetched a page at a time as the view scrolls.
+
+    Rows are kept as the raw database rows and only formatted in
+    :meth:`data`, i.e. for the cells the view paints. Sorting re-queries
+    the database ordered by the column (see history_db.history_page).
+    """
+
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.filters = {}
+        self.sort_column = 'download_ts'
+        self.descending = True
+        self._rows = []
+        self._next_key = None
+        self._has_more = False
+        self._active = False
+
+    def set_filters(self, filters):
+        """Show the records matching ``filters`` (history_db.history_where keys) from the first page"""
+        self.filters = dict(filters or {})
+        self._active = True
+        self.beginResetModel()
+        self._rows = []
+        self._next_key = None
+        self._has_more = True
+        self.endResetModel()
+        self.fetchMore()
+
+    def refresh(self):
+        """Reload from the database, keeping filters and sort order"""
+        self.set_filters(self.filters)
+
+    def has_more(self) -> bool:
+        return self._has_more
+
+    def record(self, row) -> dict:
+        return display_record(self._rows[row])
+
+    # Qt model interface
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == RecordRole:
+            return self.record(index.row())
+        if role not in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole):
+            return None
+        item = self.record(index.row())
+        column = COLUMNS[index.column()][1]
+        if column == 'file_size':
+            return format_file_size(int(item['file_size']))
+        if column == 'duration':
+            return format_duration(int(item['duration']))
+        if column == 'download_ts':
+            return item['download_date']
+        return str(item[column])
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+        try:
+            rows = history_page(self.db_path, self.filters, after=self._next_key,
+                                sort=self.sort_column, descending=self.descending)
+        except Exception:
+            logging.exception('Failed to read history from %s', self.db_path)
+            rows = []
+        self._has_more = len(rows) == PAGE_SIZE
+        if not rows:
+            return
+        self._next_key = page_key(rows[-1], self.sort_column)
+        start = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), start, start + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.sort_column = COLUMNS[column][1]
+        self.descending = order == QtCore.Qt.DescendingOrder
+        # The view sorts once when sorting is enabled, before any filters are set
+        if self._active:
+            self.refresh()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+History writer for Enhanced YouTube Downloader
+Commits download records in batches from one thread over a single WAL connection
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from history_db import INSERT_SQL, record_values, log_download
+
+DEFAULT_BATCH_SIZE = 500
+# Seconds a record may wait for more records before its batch is committed
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+_FLUSH = object()
+_STOP = object()
+
+
+class HistoryWriter:
+    """Queue of history records written by a dedicated thread.
+
+    :meth:`submit` returns at once; the writer thread commits the queued
+    records in one transaction when ``batch_size`` of them are waiting or
+    ``flush_interval`` seconds after the first one arrived. The thread owns
+    one connection in WAL mode, so readers (the history dialog) are not
+    blocked while it writes. Call :meth:`flush` before reading records back
+    and :meth:`close` on shutdown.
+    """
+
+    def __init__(self, db_path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        # Transactions committed so far
+        self.transactions = 0
+        self._queue = queue.Queue()
+        self._cond = threading.Condition()
+        self._submitted = 0
+        self._written = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, record: dict):
+        """Queue one record for the downloads table"""
+        with self._cond:
+            if not self._closed:
+                self._submitted += 1
+                self._queue.put(record)
+                return
+        # Late records (e.g. a download finishing during shutdown) are still kept
+        log_download(self.db_path, record)
+
+    def flush(self, timeout=5.0) -> bool:
+        """Commit everything submitted so far; False if that did not finish within ``timeout``"""
+        with self._cond:
+            target = self._submitted
+            if self._written >= target:
+                return True
+            self._queue.put(_FLUSH)
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self, timeout=5.0):
+        """Commit the queued records and stop the writer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        # Readers keep working while a batch is written; NORMAL sync is safe with WAL
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _write(self, conn, batch):
+        values = [record_values(r) for r in batch]
+        # A failed batch (e.g. "database is locked" past the timeout) is retried
+        # once on a fresh connection, then written record by record
+        for attempt in range(2):
+            try:
+                if conn is None:
+                    conn = self._connect()
+                with conn:
+                    conn.executemany(INSERT_SQL, values)
+                self.transactions += 1
+                break
+            except Exception:
+                logging.exception('Failed to write %d history records (attempt %d)', len(batch), attempt + 1)
+                if conn is not None:
+                    conn.close()
+                conn = None
+        else:
+            for record in batch:
+                log_download(self.db_path, record)
+        with self._cond:
+            self._written += len(batch)
+            self._cond.notify_all()
+        return conn
+
+    def _run(self):
+        conn = None
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _FLUSH
+            if item is not _FLUSH and item is not _STOP:
+                batch.append(item)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.batch_size:
+                    continue
+            if batch:
+                conn = self._write(conn, batch)
+                batch = []
+            if item is _STOP:
+                break
+        if conn is not None:
+            conn.close()
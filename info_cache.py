@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Info-dict cache for Enhanced YouTube Downloader
+Keeps yt-dlp extraction results between fetch, format loading and download
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 30 * 60  # signed media URLs typically expire after a few hours
+DEFAULT_MAX_ENTRIES = 200
+# Session cookies yt-dlp copies into info dicts and formats (from cookies.txt
+# among others). They are kept in memory for the download but never written
+# to the cache file; the rest of a format's http_headers (User-Agent,
+# Referer, ...) is kept, since process_ie_result cannot rebuild it.
+COOKIE_FIELD = 'cookies'
+COOKIE_HEADER = 'cookie'
+
+
+def scrub_info(info):
+    """Copy of an info dict without its cookies at any level (formats, entries, ...)"""
+    if isinstance(info, dict):
+        clean = {}
+        for k, v in info.items():
+            if k == COOKIE_FIELD:
+                continue
+            if k == 'http_headers' and isinstance(v, dict):
+                v = {h: hv for h, hv in v.items() if str(h).lower() != COOKIE_HEADER}
+            clean[k] = scrub_info(v)
+        return clean
+    if isinstance(info, list):
+        return [scrub_info(v) for v in info]
+    return info
+
+
+def entry_key(entry: dict, fallback: str = '') -> str:
+    """Cache key for a playlist entry or info dict: '<extractor>:<id>', else its URL"""
+    if not isinstance(entry, dict):
+        return fallback
+    video_id = entry.get('id')
+    extractor = entry.get('extractor_key') or entry.get('ie_key') or entry.get('extractor') or ''
+    if video_id:
+        return f"{extractor.lower()}:{video_id}"
+    return entry.get('webpage_url') or entry.get('url') or fallback
+
+
+class InfoCache:
+    """Thread-safe LRU cache of info dicts with a time-to-live.
+
+    Entries older than ``ttl`` seconds are dropped on access, and the least
+    recently used ones are evicted beyond ``max_entries``. When ``path`` is
+    given the cache is loaded from and saved to that JSON file, so results
+    survive restarts of the application.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+        except Exception:
+            logging.exception('Could not read info cache %s', self.path)
+            return
+        now = time.time()
+        for key, (stamp, info) in raw.items():
+            if now - stamp < self.ttl:
+                clean = scrub_info(info)
+                # Files written by older versions still hold cookies; rewrite them on the next save
+                self._dirty = self._dirty or clean != info
+                self._data[key] = (stamp, clean)
+
+    def get(self, key):
+        """Return the cached info dict for ``key``, or None if missing or expired"""
+        if not key:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stamp, info = item
+            if time.time() - stamp >= self.ttl:
+                del self._data[key]
+                self._dirty = True
+                return None
+            self._data.move_to_end(key)
+            return info
+
+    def put(self, key, info):
+        """Store a JSON-serializable info dict"""
+        if not key or not isinstance(info, dict):
+            return
+        with self._lock:
+            self._data[key] = (time.time(), info)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            self._dirty = True
+
+    def discard(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._dirty = True
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def save(self):
+        """Write the cache to disk (atomically) if it changed"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._data)
+            self._dirty = False
+        snapshot = {key: (stamp, scrub_info(info)) for key, (stamp, info) in snapshot.items()}
+        tmp = self.path + '.tmp'
+        try:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, default=str)
+            os.replace(tmp, self.path)
+        except Exception:
+            logging.exception('Could not write info cache %s', self.path)
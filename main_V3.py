@@ -19,12 +19,13 @@ APP_VERSION = "2.0.0"
 import os
 import sys
 import threading
+import time
 import PyQt5.QtWidgets as QtWidgets
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QRadioButton, QComboBox,
-                             QListWidget, QProgressBar, QFileDialog, QMessageBox,
+                             QListWidget, QListWidgetItem, QProgressBar, QFileDialog, QMessageBox,
                              QScrollArea, QWidget, QGroupBox, QButtonGroup, QFrame, QDialog, QAction)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QMetaObject, Q_ARG
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QMetaObject, Q_ARG, QPoint
 from PyQt5.QtGui import QFont
 # Converter dialogs
 from converter_tool import BasicConverterDialog, AdvancedConverterDialog
@@ -53,9 +54,29 @@ import re
 import requests
 import subprocess
 import json
-import sqlite3
-import traceback
+import copy
 from history_dialog import HistoryDialog
+from background_tasks import BackgroundTask
+from conversion_engine import run_ffmpeg
+from media_probe import mp4_command, MP4_CONVERSION_SETTINGS
+from media_library import MediaMetadataCache, describe
+from folder_scanner import FolderScanner
+from conversion_cache import ConversionCache
+from download_scheduler import (DownloadScheduler, DownloadJob,
+                                DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT)
+from download_result import DownloadResult
+from download_core import (default_history_db_path, read_url_list, quality_choices, hook_percent,
+                           download_options, captions_options, with_retries, history_record,
+                           run_batch, DEFAULT_RETRIES)
+from history_db import init_history_db
+from batch_queue import BatchJobQueue
+from history_writer import HistoryWriter
+from download_archive import DownloadArchive
+from ydl_pool import YoutubeDLPool
+from info_cache import InfoCache, entry_key
+from url_resolver import UrlResolver
+from format_prefetcher import (FormatPrefetcher, PRIORITY_SELECTED, PRIORITY_VISIBLE,
+                               DEFAULT_PREFETCH_WORKERS)
 from preferences_dialog import PreferencesDialog
 
 # Simple translation table for English, Arabic and Japanese
@@ -79,7 +100,11 @@ TRANSLATIONS = {
         'load_cookies': 'Load Cookies.txt (optional)',
         'convert_selected': 'Convert Selected', 'convert_all': 'Convert All',
         'download_history': 'Download History',
-        'ready': 'Ready', 'preferences_title': 'Preferences', 'ok': 'OK', 'cancel': 'Cancel'
+        'ready': 'Ready', 'preferences_title': 'Preferences', 'ok': 'OK', 'cancel': 'Cancel',
+        'downloads': 'Downloads', 'max_concurrent_downloads': 'Parallel downloads:',
+        'per_host_limit': 'Per-site limit:', 'bandwidth_limit': 'Bandwidth limit:', 'unlimited': 'Unlimited',
+        'pause_batch': 'Pause Batch', 'resume_batch': 'Resume Batch',
+        'archive_in_db': 'Keep download archive in the history database'
     },
     'ar': {
         'file': 'ملف', 'edit': 'تحرير', 'tools': 'أدوات', 'help': 'مساعدة',
@@ -100,7 +125,11 @@ TRANSLATIONS = {
         'load_cookies': 'تحميل cookies.txt (اختياري)',
         'convert_selected': 'تحويل المحدد', 'convert_all': 'تحويل الكل',
         'download_history': 'سجل التنزيلات',
-        'ready': 'جاهز', 'preferences_title': 'التفضيلات', 'ok': 'موافق', 'cancel': 'إلغاء'
+        'ready': 'جاهز', 'preferences_title': 'التفضيلات', 'ok': 'موافق', 'cancel': 'إلغاء',
+        'downloads': 'التنزيلات', 'max_concurrent_downloads': 'التنزيلات المتوازية:',
+        'per_host_limit': 'الحد لكل موقع:', 'bandwidth_limit': 'حد سرعة التنزيل:', 'unlimited': 'غير محدود',
+        'pause_batch': 'إيقاف الدفعة مؤقتًا', 'resume_batch': 'استئناف الدفعة',
+        'archive_in_db': 'حفظ أرشيف التنزيلات في قاعدة بيانات السجل'
     },
     'ja': {
         # placeholder to keep structure; real strings are above
@@ -124,7 +153,11 @@ TRANSLATIONS = {
         'load_cookies': 'Cookies.txtを読み込む(オプション)',
         'convert_selected': '選択を変換', 'convert_all': 'すべて変換',
         'download_history': 'ダウンロード履歴',
-        'ready': '準備完了', 'preferences_title': '設定', 'ok': 'OK', 'cancel': 'キャンセル'
+        'ready': '準備完了', 'preferences_title': '設定', 'ok': 'OK', 'cancel': 'キャンセル',
+        'downloads': 'ダウンロード', 'max_concurrent_downloads': '同時ダウンロード数:',
+        'per_host_limit': 'サイトごとの上限:', 'bandwidth_limit': '帯域制限:', 'unlimited': '無制限',
+        'pause_batch': '一括を一時停止', 'resume_batch': '一括を再開',
+        'archive_in_db': 'ダウンロードアーカイブを履歴データベースに保存'
     }
 }
 
@@ -149,22 +182,11 @@ LOG_FILE = check_os("youtube_downloader.log")
 ARCHIVE_FILE = os.path.join(DOWNLOAD_DIR, 'downloaded_videos.txt')
 SETTINGS_FILE = check_os('settings.json')
 # Default history DB: put under a per-user persistent location (AppData on Windows, ~/.local/share on Linux)
-from pathlib import Path as _Path
-def _default_history_db_path():
-    try:
-        if sys.platform == 'win32':
-            appdata = os.environ.get('APPDATA') or str(_Path.home())
-            base = os.path.join(appdata, 'YouTubeDownloader')
-        elif sys.platform == 'linux':
-            base = os.path.join(str(_Path.home()), '.local', 'share', 'youtubedownloader')
-        else:
-            base = os.path.join(str(_Path.home()), '.youtubedownloader')
-        os.makedirs(base, exist_ok=True)
-        return os.path.join(base, 'download_history.db')
-    except Exception:
-        return check_os('download_history.db')
-
-HISTORY_DB = _default_history_db_path()
+HISTORY_DB = default_history_db_path()
+# extract_info results shared by fetch, format loading and download (kept next to the history DB)
+INFO_CACHE_FILE = os.path.join(os.path.dirname(HISTORY_DB), 'info_cache.json')
+# Directory listings of scanned folders, so rescans only re-read changed directories
+SCAN_SNAPSHOT_FILE = os.path.join(os.path.dirname(HISTORY_DB), 'scan_snapshot.json')
 
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 os.makedirs(AUDIO_COPY_DIR, exist_ok=True)
@@ -176,136 +198,70 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-class WorkerThread(QThread):
-    data_signal = pyqtSignal(object)
-    count_update = pyqtSignal(int, int)
-    warning_signal = pyqtSignal(str)
-    progress_update = pyqtSignal(str)
-    progress_value = pyqtSignal(int)
-    finished_signal = pyqtSignal(str)
-    error_signal = pyqtSignal(str)
-
-    def __init__(self, func, *args, **kwargs):
-        super().__init__()
-        self.func = func
-        self.args = args
-        self.kwargs = kwargs
-
-    def run(self):
-        try:
-            self.func(self)
-            self.finished_signal.emit("")
-        except Exception as e:
-            self.error_signal.emit(str(e))
-
 class YouTubeDownloader(QMainWindow):
     def batch_download_from_file(self):
         path, _ = QFileDialog.getOpenFileName(self, "Select URL list text file", "", "Text Files (*.txt);;All Files (*)")
         if not path:
             return
-        import re
-        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-            urls = [line.strip() for line in f if line.strip() and re.match(r'^https?://', line.strip())]
-        if not urls:
-            self.show_message("Batch Download", "No valid URLs found in the file.")
-            return
-        def _run(worker):
-            total = len(urls)
-            ok, fail = 0, 0
-            # Ensure download directory exists
-            os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-            for idx, url in enumerate(urls, 1):
-                # Resolve possible share/redirect URLs (Facebook share links etc.)
-                url = self.resolve_final_url(url)
-                self.progress_label.setText(f"Batch: {idx}/{total} - {url[:60]}")
-                ydl_opts = {
-                    'quiet': True,
-                    'progress_hooks': [lambda d: None],
-                    'paths': {'home': DOWNLOAD_DIR, 'temp': DOWNLOAD_DIR},
-                    # Flat, safe output template: title (truncated), id, ext
-                    'outtmpl': {'default': '%(title).60s [%(id)s].%(ext)s'},
-                    'restrictfilenames': True,
-                    'windowsfilenames': True,
-                }
-                if self.cookies_path:
-                    ydl_opts['cookiefile'] = self.cookies_path
-                try:
-                    with YoutubeDL(ydl_opts) as ydl:
-                        info = ydl.extract_info(url, download=True)
-
-                    # Best-effort file detection in DOWNLOAD_DIR using title or id
-                    title = sanitize_filename(info.get('title') or info.get('id') or 'Unknown')
-                    video_id = info.get('id') or ''
-                    file_path = ''
-                    file_size = 0
-                    try:
-                        candidates = []
-                        for root, _, files in os.walk(DOWNLOAD_DIR):
-                            for fn in files:
-                                if title.lower() in fn.lower() or (video_id and video_id in fn):
-                                    full = os.path.join(root, fn)
-                                    try:
-                                        m = os.path.getmtime(full)
-                                    except Exception:
-                                        m = 0
-                                    candidates.append((m, full))
-                        if candidates:
-                            candidates.sort(reverse=True)
-                            file_path = candidates[0][1]
-                            try:
-                                file_size = os.path.getsize(file_path)
-                            except Exception:
-                                file_size = 0
-                    except Exception:
-                        logging.exception('Error locating batch downloaded file')
-
-                    ok += 1
-
-                    try:
-                        rec = {
-                            'url': url,
-                            'title': info.get('title') or '',
-                            'format': 'Video',
-                            'quality': '',
-                            'status': 'Completed',
-                            'download_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'file_size': file_size,
-                            'duration': int(info.get('duration') or 0),
-                            'platform': info.get('extractor') or 'Unknown',
-                            'file_path': file_path
-                        }
-                        self._log_download(rec)
-                    except Exception:
-                        logging.exception('Failed to log batch download')
+        scheduler = DownloadScheduler(
+            max_workers=self.settings.get('max_concurrent_downloads', DEFAULT_MAX_WORKERS),
+            per_host_limit=self.settings.get('per_host_limit', DEFAULT_PER_HOST_LIMIT),
+            bandwidth_limit=int(self.settings.get('bandwidth_limit_kbps', 0) or 0) * 1024,
+        )
 
-                except Exception as e:
-                    fail += 1
-                    logging.error(f"Batch download failed for {url}: {e}")
-                    try:
-                        rec = {
-                            'url': url,
-                            'title': '',
-                            'format': 'Video',
-                            'quality': '',
-                            'status': 'Failed',
-                            'download_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'file_size': 0,
-                            'duration': 0,
-                            'platform': 'Unknown',
-                            'file_path': ''
-                        }
-                        self._log_download(rec)
-                    except Exception:
-                        logging.exception('Failed to log batch failure')
-            msg = f"Batch complete. Downloaded: {ok}, Failed: {fail}"
-            if fail:
-                msg += "\nCheck log for details."
+        def _run(worker):
+            urls = read_url_list(path)
+            if not urls:
+                worker.finished_signal.emit("No valid URLs found in the file.")
+                return
+            scheduler.on_progress = worker.progress_value.emit
+
+            def on_event(event):
+                if event['event'] == 'resume':
+                    worker.progress_update.emit(f"Resuming batch: {event['remaining']} of {event['total']} remaining")
+                elif event['event'] == 'start':
+                    worker.progress_update.emit(f"Batch: {event['index']}/{event['total']} - {event['url'][:60]}")
+
+            # Jobs live in the history DB so an interrupted batch resumes where it stopped
+            counts = run_batch(urls, BatchJobQueue.batch_key_for(path), self.history_db_path, DOWNLOAD_DIR,
+                               scheduler, self._ydl_pool, resolver=self._resolver,
+                               cookies_path=self.cookies_path, on_event=on_event, log=self._log_download)
+            msg = (f"Batch complete. Downloaded: {counts['ok']}, Failed: {counts['fail']} "
+                   f"({counts['done']}/{counts['total']} done in total)")
+            if counts['fail']:
+                msg += "\nCheck log for details. Run the same file again to retry the failed items."
             worker.finished_signal.emit(msg)
 
-        worker = WorkerThread(_run)
+        def _batch_done():
+            self._batch_scheduler = None
+            self.batch_pause_btn.hide()
+            self.batch_pause_btn.setText(self._tr('pause_batch'))
+
+        self._batch_scheduler = scheduler
+        self.batch_pause_btn.setText(self._tr('pause_batch'))
+        self.batch_pause_btn.show()
+        worker = BackgroundTask(_run)
+        worker.progress_update.connect(self.progress_label.setText)
+        worker.progress_value.connect(self.progress_bar.setValue)
         worker.finished_signal.connect(lambda msg: self.show_message("Batch Download", msg))
+        worker.finished.connect(_batch_done)
         self._track_thread(worker)
         worker.start()
+
+    def toggle_batch_pause(self):
+        """Pause or resume the running batch; items already downloading finish first."""
+        scheduler = getattr(self, '_batch_scheduler', None)
+        if scheduler is None:
+            return
+        if scheduler.paused:
+            scheduler.resume()
+            self.batch_pause_btn.setText(self._tr('pause_batch'))
+            self.progress_label.setText("Batch resumed")
+        else:
+            scheduler.pause()
+            self.batch_pause_btn.setText(self._tr('resume_batch'))
+            self.progress_label.setText("Batch paused (running items will finish)")
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("YouTube Playlist Downloader")
@@ -318,6 +274,14 @@ class YouTubeDownloader(QMainWindow):
         self.success_count = 0
         self.failure_count = 0
         self.total_items = 0
+        self._batch_scheduler = None
+        self._archive = None
+        # YoutubeDL objects are reused across items so extractors, cookies and
+        # HTTP connections survive between downloads (resolved lazily so tests can patch YoutubeDL)
+        self._ydl_pool = YoutubeDLPool(factory=lambda opts: YoutubeDL(opts))
+        self._info_cache = InfoCache(INFO_CACHE_FILE)
+        self._resolver = UrlResolver()
+        self.folder_scanner = FolderScanner(SCAN_SNAPSHOT_FILE)
 
         # Track running threads to prevent premature destruction
         self.threads = set()
@@ -338,6 +302,20 @@ class YouTubeDownloader(QMainWindow):
             self._init_history_db()
         except Exception:
             logging.exception('Failed to initialize history DB')
+        # Download records are queued and committed in batches by one writer thread
+        self._history_writer = HistoryWriter(self.history_db_path)
+        # Shared by every conversion; rebuilt if the history DB moves
+        self._conversion_cache = None
+        self._conversion_cache_lock = threading.Lock()
+
+        # Formats of visible/selected playlist entries are resolved in the background
+        self._playlist_url = ''
+        self._prefetch_enabled = False
+        self._scan_rows = {}
+        self._scan_id = 0
+        self._prefetcher = FormatPrefetcher(
+            lambda payload: self._extract_item_info(*payload), self._info_cache,
+            max_workers=self.settings.get('prefetch_workers', DEFAULT_PREFETCH_WORKERS))
 
         self._heartbeat_timer = QTimer(self)
         self._heartbeat_timer.setInterval(1000)
@@ -478,54 +456,13 @@ class YouTubeDownloader(QMainWindow):
             pass
 
     def _init_history_db(self):
-        """Create history database and table if missing. Use file-level sqlite (safe across threads if using separate connections)."""
-        try:
-            conn = sqlite3.connect(self.history_db_path, timeout=5)
-            cur = conn.cursor()
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS downloads (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT,
-                    title TEXT,
-                    format TEXT,
-                    quality TEXT,
-                    status TEXT,
-                    download_date TEXT,
-                    file_size INTEGER,
-                    duration INTEGER,
-                    platform TEXT,
-                    file_path TEXT
-                )
-            ''')
-            conn.commit()
-            conn.close()
-        except Exception:
-            logging.exception('Could not create or access history DB')
+        """Create history database and table if missing."""
+        init_history_db(self.history_db_path)
 
     def _log_download(self, record: dict):
-        """Insert a download record into history DB. This opens a fresh sqlite connection per-call for thread-safety."""
-        try:
-            conn = sqlite3.connect(self.history_db_path, timeout=5)
-            cur = conn.cursor()
-            cur.execute('''
-                INSERT INTO downloads (url, title, format, quality, status, download_date, file_size, duration, platform, file_path)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                record.get('url'),
-                record.get('title'),
-                record.get('format'),
-                record.get('quality'),
-                record.get('status'),
-                record.get('download_date'),
-                record.get('file_size'),
-                record.get('duration'),
-                record.get('platform'),
-                record.get('file_path')
-            ))
-            conn.commit()
-            conn.close()
-        except Exception:
-            logging.exception('Failed to log download record: %s', traceback.format_exc())
+        """Queue a download record for the history DB (safe from worker threads)."""
+        self._history_writer.submit(record)
+
     def _show_about(self):
         """Show about dialog"""
         about_text = f"""
@@ -554,7 +491,7 @@ class YouTubeDownloader(QMainWindow):
             import requests
             self.status.showMessage("Checking for updates...")
             
-            def check_update():
+            def check_update(worker):
                 try:
                     response = requests.get(UPDATE_URL, timeout=10)
                     if response.status_code == 200:
@@ -568,18 +505,19 @@ class YouTubeDownloader(QMainWindow):
                         
                         # Compare versions
                         if self._is_newer_version(latest_version, APP_VERSION):
-                            QMetaObject.invokeMethod(self, '_show_update_available', 
-                                Qt.QueuedConnection, Q_ARG(str, latest_version))
+                            worker.data_signal.emit(latest_version)
                         else:
-                            QMetaObject.invokeMethod(self, '_show_no_update', Qt.QueuedConnection)
+                            worker.data_signal.emit(None)
                     else:
-                        QMetaObject.invokeMethod(self, '_show_update_error', 
-                            Qt.QueuedConnection, Q_ARG(str, f"HTTP {response.status_code}"))
+                        worker.error_signal.emit(f"HTTP {response.status_code}")
                 except Exception as e:
-                    QMetaObject.invokeMethod(self, '_show_update_error', 
-                        Qt.QueuedConnection, Q_ARG(str, str(e)))
+                    worker.error_signal.emit(str(e))
             
-            threading.Thread(target=check_update, daemon=True).start()
+            worker = BackgroundTask(check_update)
+            worker.data_signal.connect(lambda v: self._show_update_available(v) if v else self._show_no_update())
+            worker.error_signal.connect(self._show_update_error)
+            self._track_thread(worker)
+            worker.start()
             
         except ImportError:
             QtWidgets.QMessageBox.warning(self, "Update Check", "Update checking requires the 'requests' library.\n\nInstall it with: pip install requests")
@@ -626,6 +564,8 @@ class YouTubeDownloader(QMainWindow):
 
     def _open_history(self):
         try:
+            # Show records that are still waiting in the writer's queue
+            self._history_writer.flush()
             dlg = HistoryDialog(self.history_db_path, self)
             dlg.exec_()
         except Exception as e:
@@ -647,29 +587,11 @@ class YouTubeDownloader(QMainWindow):
                 self._save_settings()
             except Exception:
                 logging.exception('Failed to persist history_db to settings')
-            # initialize DB file and tables
-            try:
-                conn = sqlite3.connect(self.history_db_path, timeout=5)
-                cur = conn.cursor()
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS downloads (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        url TEXT,
-                        title TEXT,
-                        format TEXT,
-                        quality TEXT,
-                        status TEXT,
-                        download_date TEXT,
-                        file_size INTEGER,
-                        duration INTEGER,
-                        platform TEXT,
-                        file_path TEXT
-                    )
-                ''')
-                conn.commit()
-                conn.close()
-            except Exception:
-                logging.exception('Failed to initialize new history DB at %s', self.history_db_path)
+            # initialize DB file and tables (or migrate an existing one)
+            init_history_db(self.history_db_path)
+            # Records queued for the old database are committed there first
+            self._history_writer.close()
+            self._history_writer = HistoryWriter(self.history_db_path)
         except Exception:
             logging.exception('Invalid path provided for history DB: %s', path)
 
@@ -696,11 +618,19 @@ class YouTubeDownloader(QMainWindow):
         worker.finished.connect(lambda: self.threads.discard(worker))
 
     def closeEvent(self, event):
+        # Stop dispatching queued batch items; unfinished jobs resume next time
+        if getattr(self, '_batch_scheduler', None) is not None:
+            self._batch_scheduler.cancel()
         # Wait for all threads to finish before closing
         for thread in list(self.threads):
             if thread.isRunning():
                 thread.quit()
                 thread.wait(3000)  # Wait up to 3 seconds per thread
+        self._prefetcher.close()
+        self._ydl_pool.close()
+        self._resolver.close()
+        self._info_cache.save()
+        self._history_writer.close()
         event.accept()
 
     def setup_ui(self):
@@ -795,6 +725,10 @@ class YouTubeDownloader(QMainWindow):
         self.batch_btn = QPushButton(self._tr('batch_download'))
         self.batch_btn.clicked.connect(self.batch_download_from_file)
         self.content_layout.addWidget(self.batch_btn)
+        self.batch_pause_btn = QPushButton(self._tr('pause_batch'))
+        self.batch_pause_btn.clicked.connect(self.toggle_batch_pause)
+        self.batch_pause_btn.hide()
+        self.content_layout.addWidget(self.batch_pause_btn)
 
         # URL Entry
         url_layout = QHBoxLayout()
@@ -860,6 +794,8 @@ class YouTubeDownloader(QMainWindow):
         list_layout = QHBoxLayout()
         self.video_listbox = QListWidget()
         self.video_listbox.setSelectionMode(QListWidget.ExtendedSelection)
+        self.video_listbox.verticalScrollBar().valueChanged.connect(lambda *_: self._prefetch_visible())
+        self.video_listbox.itemSelectionChanged.connect(self._prefetch_selection)
         list_layout.addWidget(self.video_listbox)
         self.content_layout.addLayout(list_layout)
 
@@ -979,14 +915,117 @@ class YouTubeDownloader(QMainWindow):
     def _populate_videos(self, data):
         titles, entries = data
         self.playlist_entries = entries
+        self._prefetcher.clear()
+        self._prefetch_enabled = True
         self.video_listbox.clear()
         for t in titles:
             self.video_listbox.addItem(t)
+        # Start resolving formats once the list has been laid out
+        QTimer.singleShot(0, self._prefetch_visible)
 
-    def _populate_scan(self, files):
+    def _prefetch_payload(self, idx):
+        """(cache key, fetch payload) for playlist row ``idx``"""
+        try:
+            entry = self.playlist_entries[idx]
+        except Exception:
+            entry = None
+        return entry_key(entry), (self._playlist_url, idx, entry)
+
+    def _prefetch_visible(self):
+        """Queue format discovery for the rows currently shown in the list"""
+        if not self._prefetch_enabled or not self.settings.get('prefetch_formats', True):
+            return
+        count = min(self.video_listbox.count(), len(self.playlist_entries))
+        if not count:
+            return
+        viewport = self.video_listbox.viewport()
+        first = self.video_listbox.indexAt(QPoint(0, 0)).row()
+        last = self.video_listbox.indexAt(QPoint(0, max(0, viewport.height() - 1))).row()
+        first = max(first, 0)
+        last = count - 1 if last < 0 else min(last, count - 1)
+        for idx in range(first, last + 1):
+            self._prefetcher.request(*self._prefetch_payload(idx), priority=PRIORITY_VISIBLE)
+
+    def _prefetch_selection(self):
+        """Move the selected rows to the front of the prefetch queue"""
+        if not self._prefetch_enabled or not self.settings.get('prefetch_formats', True):
+            return
+        for index in self.video_listbox.selectedIndexes():
+            if index.row() < len(self.playlist_entries):
+                self._prefetcher.request(*self._prefetch_payload(index.row()), priority=PRIORITY_SELECTED)
+
+    def _begin_scan(self):
+        """Empty the list for a folder scan; returns the id tagging that scan's results"""
+        self._prefetch_enabled = False
+        self._prefetcher.clear()
         self.video_listbox.clear()
+        self._scan_rows = {}
+        self._scan_id += 1
+        return self._scan_id
+
+    def _append_scan(self, files):
         for p in files:
-            self.video_listbox.addItem(p)
+            if p in self._scan_rows:
+                continue
+            item = QListWidgetItem(p)
+            item.setData(Qt.UserRole, p)
+            self.video_listbox.addItem(item)
+            self._scan_rows[p] = self.video_listbox.count() - 1
+
+    def _on_scan_data(self, data):
+        """(scan id, complete, files) from a folder scan: a streamed chunk or the final sorted list"""
+        scan_id, complete, files = data
+        if scan_id != self._scan_id:
+            return  # a newer scan replaced the list
+        if not complete:
+            self._append_scan(files)
+            self.progress_label.setText(f"Scanning... {len(self._scan_rows)} videos found")
+            return
+        # Chunks arrive in discovery order; show the final list sorted
+        self._append_scan(files)
+        self.video_listbox.sortItems()
+        self._scan_rows = {self.video_listbox.item(row).data(Qt.UserRole): row
+                           for row in range(self.video_listbox.count())}
+        self.progress_label.setText(f"Found {len(files)} videos.")
+        self._load_scan_metadata(files)
+
+    def _load_scan_metadata(self, files):
+        """Fill in duration, codecs, resolution and bitrate for scanned files in the background"""
+        db_path = self.history_db_path
+
+        def _probe(worker):
+            batch = {}
+            last = time.monotonic()
+
+            def _collect(path, meta):
+                nonlocal batch, last
+                batch[path] = meta
+                # Hand results to the UI in batches rather than one signal per file
+                if len(batch) >= 200 or time.monotonic() - last > 0.25:
+                    worker.data_signal.emit(batch)
+                    batch, last = {}, time.monotonic()
+
+            MediaMetadataCache(db_path).metadata(files, on_result=_collect)
+            if batch:
+                worker.data_signal.emit(batch)
+
+        worker = BackgroundTask(_probe)
+        worker.data_signal.connect(self._annotate_scan)
+        self._track_thread(worker)
+        worker.start()
+
+    def _annotate_scan(self, metas):
+        for path, meta in metas.items():
+            row = self._scan_rows.get(path)
+            label = describe(meta)
+            item = self.video_listbox.item(row) if row is not None else None
+            if item is not None and label and item.data(Qt.UserRole) == path:
+                item.setText(f"{path}    [{label}]")
+
+    def _listed_file(self, row):
+        """File path shown in scan row ``row`` (the text also carries metadata)"""
+        item = self.video_listbox.item(row)
+        return item.data(Qt.UserRole) or item.text()
 
     def _update_quality_combo(self, choices):
         self.current_formats = choices
@@ -1022,39 +1061,41 @@ class YouTubeDownloader(QMainWindow):
             self.captions_lang_combo.show()
 
     def resolve_final_url(self, input_url: str) -> str:
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
-            }
-            resp = requests.get(input_url, headers=headers, allow_redirects=True, timeout=15)
-            if resp.url:
-                return resp.url
-            return input_url
-        except Exception:
-            return input_url
+        # HEAD/streamed GET over a pooled session; cached, canonical hosts skipped
+        return self._resolver.resolve(input_url)
 
-    def find_video_files(self, folder_path: str):
-        video_extensions = ['.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm']
-        matches = []
-        for dirpath, dirnames, filenames in os.walk(folder_path):
-            for filename in filenames:
-                if any(filename.lower().endswith(ext) for ext in video_extensions):
-                    matches.append(os.path.join(dirpath, filename))
-        return matches
+    def find_video_files(self, folder_path: str, on_chunk=None):
+        # scandir walk; unchanged directories come from the snapshot of the last scan
+        return self.folder_scanner.scan(folder_path, on_chunk=on_chunk)
+
+    def _get_conversion_cache(self):
+        """ConversionCache for the current history DB, created once per window"""
+        with self._conversion_cache_lock:
+            if self._conversion_cache is None or self._conversion_cache.db_path != self.history_db_path:
+                self._conversion_cache = ConversionCache(self.history_db_path)
+            return self._conversion_cache
 
     def convert_to_mp4(self, input_file: str):
         base, ext = os.path.splitext(input_file)
         output_file = f"{base}.mp4"
         if os.path.normpath(input_file).lower() == os.path.normpath(output_file).lower():
             return True, "Already MP4"
-        cmd = ['ffmpeg', '-y', '-i', input_file, '-c:v', 'copy', '-c:a', 'copy', output_file]
         try:
-            proc = subprocess.run(cmd, check=True, text=True, capture_output=True, encoding='utf-8')
+            cache = self._get_conversion_cache()
+            # Converted earlier from this exact input and nothing changed since
+            if cache.is_current(input_file, output_file, MP4_CONVERSION_SETTINGS):
+                return True, "Up to date"
+            # Copy what MP4 can hold; re-encode only incompatible streams
+            cmd, plan = mp4_command(input_file, output_file)
+            logging.info('Converting %s to MP4 (%s)', input_file, plan.mode)
+            # Streams progress and keeps only the tail of stderr for the error report
+            returncode, stderr_tail = run_ffmpeg(cmd)
+            if returncode != 0:
+                return False, stderr_tail or f"ffmpeg exited with code {returncode}"
+            cache.record(input_file, output_file, MP4_CONVERSION_SETTINGS)
             return True, output_file
         except FileNotFoundError:
             return False, "FFmpeg not found. Install and add to PATH."
-        except subprocess.CalledProcessError as e:
-            return False, e.stderr or str(e)
         except Exception as e:
             return False, str(e)
 
@@ -1074,7 +1115,6 @@ class YouTubeDownloader(QMainWindow):
         self.convert_all_btn.hide()
 
         url = self.url_entry.text().strip()
-        url = self.resolve_final_url(url)
 
         if not url:
             self.show_message("Input Error", "Please enter a playlist URL.")
@@ -1083,6 +1123,9 @@ class YouTubeDownloader(QMainWindow):
         self.progress_label.setText("Fetching videos...")
 
         def _fetch(worker):
+            nonlocal url
+            url = self.resolve_final_url(url)
+            self._playlist_url = url
             ydl_opts = {
                 'extract_flat': True,
                 'quiet': True,
@@ -1095,7 +1138,7 @@ class YouTubeDownloader(QMainWindow):
             if self.cookies_path:
                 ydl_opts['cookiefile'] = self.cookies_path
             try:
-                with YoutubeDL(ydl_opts) as ydl:
+                with self._ydl_pool.session(ydl_opts) as ydl:
                     info = ydl.extract_info(url, download=False)
                     # Handle playlists and generic post pages with multiple entries
                     titles = []
@@ -1112,7 +1155,9 @@ class YouTubeDownloader(QMainWindow):
                             worker.error_signal.emit("No videos found at the provided URL.")
                             return
                     elif isinstance(info, dict):
-                        # Single media item
+                        # Single media item; extract_flat still returns its formats, keep them
+                        if info.get('formats'):
+                            self._info_cache.put(entry_key(info, url), ydl.sanitize_info(info, True))
                         title = info.get('title') or info.get('id', 'Unknown')
                         titles.append(f"001. {title}")
                         entries.append(info)
@@ -1120,24 +1165,68 @@ class YouTubeDownloader(QMainWindow):
                         worker.error_signal.emit("No downloadable media found at the provided URL.")
                         return
                 worker.data_signal.emit((titles, entries))
+                # Entries resolved before (formats loaded, downloaded) are served from the cache
+                new_count = sum(1 for e in entries if entry_key(e) not in self._info_cache)
+                worker.progress_update.emit(f"Fetched {len(entries)} item(s), {new_count} not cached yet.")
             except Exception as e:
                 worker.error_signal.emit(f"Could not fetch info from URL. If this is Facebook, try loading cookies.txt and retry.\n\n{e}")
 
-        worker = WorkerThread(_fetch)
+        worker = BackgroundTask(_fetch)
         worker.data_signal.connect(self._populate_videos)
+        worker.progress_update.connect(self.progress_label.setText)
         worker.error_signal.connect(lambda msg: self.show_message("Error", msg, QMessageBox.Critical))
         self._track_thread(worker)
         worker.start()
 
+    @staticmethod
+    def _entry_url(entry) -> str:
+        """The entry's own http(s) URL from the flat playlist listing, if it has one."""
+        if not isinstance(entry, dict):
+            return ''
+        for key in ('webpage_url', 'url'):
+            value = entry.get(key)
+            if isinstance(value, str) and re.match(r'^https?://', value):
+                return value
+        return ''
+
+    def _extract_item_info(self, url: str, idx: int, entry: dict = None) -> dict:
+        """Fully extract one playlist item and return its JSON-safe info dict.
+
+        The entry's own URL (or its flat url result) is used when available so the
+        playlist is not enumerated again; ``playlist_items`` is only the fallback.
+        """
+        item_url = self._entry_url(entry)
+        base_opts = {
+            'quiet': True,
+            'http_headers': {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
+                'Referer': url,
+            }
+        }
+        if self.cookies_path:
+            base_opts['cookiefile'] = self.cookies_path
+        is_url_result = isinstance(entry, dict) and entry.get('_type') in ('url', 'url_transparent') and entry.get('url')
+        if not item_url and not is_url_result:
+            base_opts['playlist_items'] = str(idx + 1)
+        with self._ydl_pool.session(base_opts) as ydl:
+            if item_url:
+                info = ydl.extract_info(item_url, download=False)
+            elif is_url_result:
+                info = ydl.process_ie_result(copy.deepcopy(entry), download=False)
+            else:
+                info = ydl.extract_info(url, download=False)
+            # A playlist URL yields the playlist with the single requested entry
+            if isinstance(info, dict) and info.get('entries') is not None:
+                info = next((e for e in info['entries'] if isinstance(e, dict)), {})
+            return ydl.sanitize_info(info, True) if isinstance(info, dict) else {}
+
     def load_formats_for_selection(self):
         selected = self.video_listbox.selectedIndexes()
         if not selected:
             self.show_message("Selection Error", "Please select a video to load formats.")
             return
-        # Use the first selected index to discover formats
-        idx = selected[0].row()
+        rows = sorted(i.row() for i in selected)
         url = self.url_entry.text().strip()
-        url = self.resolve_final_url(url)
         if not url:
             self.show_message("Input Error", "Please enter a URL first.")
             return
@@ -1145,72 +1234,46 @@ class YouTubeDownloader(QMainWindow):
         self.progress_label.setText("Loading formats...")
 
         def _load(worker):
-            try:
-                base_opts = {
-                    'quiet': True,
-                    'playlist_items': str(idx + 1),
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
-                        'Referer': url,
-                    }
-                }
-                if self.cookies_path:
-                    base_opts['cookiefile'] = self.cookies_path
-                with YoutubeDL(base_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-            except Exception as e:
-                worker.error_signal.emit(f"Failed to load formats:\n{e}")
+            self._playlist_url = self.resolve_final_url(url)
+            pending = [self._prefetch_payload(idx) for idx in rows]
+            # Usually answered from the cache filled by the background prefetcher
+            infos = []
+            last_error = None
+            for key, payload in pending:
+                try:
+                    infos.append(self._prefetcher.fetch_now(key, payload))
+                except Exception as e:
+                    last_error = e
+            if not infos:
+                worker.error_signal.emit(f"Failed to load formats:\n{last_error}")
                 return
+            self._info_cache.save()
 
-            # info may be playlist entry or a single video dict
-            # Ensure we have a dict with 'formats'
-            if isinstance(info, dict) and 'formats' in info:
-                formats = info['formats']
-            elif isinstance(info, list) and info:
-                candidate = info[0]
-                formats = candidate.get('formats', [])
-            else:
-                formats = []
-
-            # Build human-friendly choices, focusing on video heights
-            heights = []
-            for f in formats:
-                vcodec = f.get('vcodec')
-                height = f.get('height')
-                if vcodec and vcodec != 'none' and height:
-                    heights.append(height)
-            heights = sorted(set(h for h in heights if isinstance(h, int)), reverse=True)
-
-            choices = []
-            choices.append(('best', 'best (auto)'))
-            for h in heights:
-                selector = f"bestvideo[height<={h}]+bestaudio/best"
-                label = f"<= {h}p (video+bestaudio)"
-                choices.append((selector, label))
-
-            # Fallback if no heights found
-            if len(choices) == 1:
-                choices.extend([
-                    ('best', 'best'),
-                    ('worst', 'worst')
-                ])
+            # 'best' plus the heights that every selected item offers
+            choices = quality_choices(infos)
 
             worker.data_signal.emit(choices)
 
-        worker = WorkerThread(_load)
+        worker = BackgroundTask(_load)
         worker.data_signal.connect(self._update_quality_combo)
         worker.error_signal.connect(lambda msg: self.show_message("Error", msg, QMessageBox.Critical))
         self._track_thread(worker)
         worker.start()
 
-    def is_in_archive(self, video_id: str) -> bool:
+    def _get_archive(self):
+        """Archive lookup service for the current ARCHIVE_FILE (rebuilt when the folder changes)."""
+        archive = getattr(self, '_archive', None)
+        if archive is None or archive.path != ARCHIVE_FILE:
+            db_path = self.history_db_path if self.settings.get('archive_in_db') else None
+            archive = DownloadArchive(ARCHIVE_FILE, db_path=db_path)
+            self._archive = archive
+        return archive
+
+    def is_in_archive(self, video_id: str, extractor: str = None) -> bool:
         try:
-            if not os.path.exists(ARCHIVE_FILE):
-                return False
-            with open(ARCHIVE_FILE, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                return video_id in content
+            return self._get_archive().contains(video_id, extractor)
         except Exception:
+            logging.exception('Download archive lookup failed')
             return False
 
     def download_selected(self):
@@ -1220,9 +1283,8 @@ class YouTubeDownloader(QMainWindow):
             return
 
         url = self.url_entry.text().strip()
-        # follow share/redirect links to the real target so yt_dlp receives a usable URL
-        url = self.resolve_final_url(url)
         mode = self.radio_group.checkedButton().text()
+        lang = self.captions_lang_combo.currentText() or 'en'
         # Resolve selected quality when in Video/Audio mode
         selected_label = self.q_combo.currentText()
         quality = None
@@ -1243,22 +1305,15 @@ class YouTubeDownloader(QMainWindow):
         self.progress_label.setText("Starting download...")
 
         def run_download(worker):
+            nonlocal url
+            # follow share/redirect links to the real target so yt_dlp receives a usable URL
+            url = self.resolve_final_url(url)
             # Captions mode: use a streamlined captions flow
             if mode == 'Captions':
-                lang = self.captions_lang_combo.currentText() or 'en'
                 target_dir = os.path.join(DOWNLOAD_DIR, 'captions')
                 os.makedirs(target_dir, exist_ok=True)
                 try:
-                    opts = {
-                        'skip_download': True,
-                        'writeautomaticsub': True,
-                        'writesubtitles': True,
-                        'subtitleslangs': [lang],
-                        'outtmpl': os.path.join(target_dir, '%(title)s.%(ext)s'),
-                        'subtitle_format': 'vtt',
-                        'quiet': False,
-                        'ignoreerrors': True,
-                    }
+                    opts = captions_options(target_dir, lang)
                     with YoutubeDL(opts) as ydl:
                         ydl.download([url])
                     worker.finished_signal.emit(f"Captions downloaded to:\n{target_dir}")
@@ -1267,32 +1322,58 @@ class YouTubeDownloader(QMainWindow):
                     worker.error_signal.emit(f"Failed to download captions:\n{e}")
                 return
 
-            def progress_hook(d):
-                if d['status'] == 'downloading':
-                    percent = d.get('_percent_str', '').strip()
-                    worker.progress_update.emit(f"Downloading: {percent}")
-                    try:
-                        p_val = int(float(percent.rstrip('%')))
-                        worker.progress_value.emit(p_val)
-                    except:
-                        worker.progress_value.emit(0)
-                elif d['status'] == 'finished':
-                    worker.progress_update.emit(f"Finished: {d.get('filename')}")
-                    worker.progress_value.emit(100)
+            # Items run concurrently; per-item progress is averaged by the scheduler
+            # and counters are shared between worker threads.
+            scheduler = DownloadScheduler(
+                max_workers=self.settings.get('max_concurrent_downloads', DEFAULT_MAX_WORKERS),
+                per_host_limit=self.settings.get('per_host_limit', DEFAULT_PER_HOST_LIMIT),
+                bandwidth_limit=int(self.settings.get('bandwidth_limit_kbps', 0) or 0) * 1024,
+                on_progress=worker.progress_value.emit,
+            )
+            counts_lock = threading.Lock()
+
+            def count_result(succeeded):
+                with counts_lock:
+                    if succeeded:
+                        self.success_count += 1
+                    else:
+                        self.failure_count += 1
+                    worker.count_update.emit(self.success_count, self.failure_count)
 
+            jobs = []
             for offset, idx in enumerate(selected_indices, start=1):
                 try:
                     entry = self.playlist_entries[idx]
                 except Exception:
-                    self.failure_count += 1
-                    worker.count_update.emit(self.success_count, self.failure_count)
+                    count_result(False)
                     continue
+                item_url = self._entry_url(entry) or url
+                jobs.append(DownloadJob((offset, idx), item_url, entry))
+
+            def download_item(job):
+                offset, idx = job.key
+                entry = job.payload
 
                 # Sanitize title and subdir for safe Windows paths
                 title = sanitize_filename(entry.get('title', 'Unknown Title'))
+
+                def progress_hook(d):
+                    if d['status'] == 'downloading':
+                        p_val = hook_percent(d)
+                        worker.progress_update.emit(f"Downloading: {title} {p_val:.1f}%")
+                        scheduler.report(job, p_val)
+                    elif d['status'] == 'finished':
+                        worker.progress_update.emit(f"Finished: {d.get('filename')}")
+                        scheduler.report(job, 100)
+
+                cache_key = entry_key(entry)
+                # Each item is downloaded by its own URL; the playlist page was fetched
+                # once by fetch_videos and is only re-read for entries without one
+                item_url = self._entry_url(entry)
+                is_url_result = entry.get('_type') in ('url', 'url_transparent') and entry.get('url')
                 video_id = entry.get('id') or ''
                 use_archive = True
-                if video_id and self.is_in_archive(video_id):
+                if video_id and self.is_in_archive(video_id, entry.get('ie_key') or entry.get('extractor_key')):
                     use_archive = False
 
                 raw_subdir = entry.get('playlist') or 'NA'
@@ -1300,133 +1381,59 @@ class YouTubeDownloader(QMainWindow):
                 target_dir = os.path.join(DOWNLOAD_DIR, safe_subdir)
                 os.makedirs(target_dir, exist_ok=True)
 
-                # Use sanitized title in outtmpl
-                ydl_opts_item = {
-                    'format': quality,
-                    # Use sanitized title only (avoid 'NA - ' prefix when playlist_index is missing)
-                    'outtmpl': f'{title}.%(ext)s',
-                    'paths': {
-                        'home': target_dir,
-                        'temp': target_dir,
-                    },
-                    'ignoreerrors': False,
-                    'progress_hooks': [progress_hook],
-                    'playlist_items': str(idx + 1),
-                    'retries': 10,
-                    'fragment_retries': 10,
-                    'concurrent_fragment_downloads': 3,
-                    'windowsfilenames': False,
-                    'restrictfilenames': False,
-                    'http_headers': {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36',
-                        'Referer': url,
-                    }
-                }
-                if self.cookies_path:
-                    ydl_opts_item['cookiefile'] = self.cookies_path
-                if use_archive:
-                    ydl_opts_item['download_archive'] = ARCHIVE_FILE
-
-                if mode == 'Audio':
-                    ydl_opts_item['extractaudio'] = True
-                    ydl_opts_item['postprocessors'] = [
-                        {
-                            'key': 'FFmpegExtractAudio',
-                            'preferredcodec': 'mp3',
-                            'preferredquality': '192',
-                        }
-                    ]
-                else:  # Video
-                    ydl_opts_item['postprocessors'] = [
-                        {
-                            'key': 'FFmpegVideoRemuxer',
-                            'preferedformat': 'mkv'
-                        }
-                    ]
-
-                attempts = 0
-                local_max = 5
-                while True:
-                    try:
-                        worker.progress_value.emit(0)
-                        worker.progress_update.emit(f"Starting: {title} ({offset}/{self.total_items})")
-                        with YoutubeDL(ydl_opts_item) as ydl:
+                # Use sanitized title only (avoid 'NA - ' prefix when playlist_index is missing)
+                result = DownloadResult()
+                ydl_opts_item = download_options(
+                    mode, quality, target_dir, f'{title}.%(ext)s', referer=url, cookies_path=self.cookies_path,
+                    archive_file=ARCHIVE_FILE if use_archive else None,
+                    progress_hooks=[progress_hook, scheduler.bandwidth_hook(), result.progress_hook],
+                    postprocessor_hooks=[result.postprocessor_hook])
+                if not item_url and not is_url_result:
+                    ydl_opts_item['playlist_items'] = str(idx + 1)
+                fmt = 'Audio' if mode == 'Audio' else 'Video' if mode == 'Video' else 'Captions'
+                platform = entry.get('extractor') or entry.get('webpage_url') or 'Unknown'
+
+                def attempt():
+                    scheduler.report(job, 0)
+                    worker.progress_update.emit(f"Starting: {title} ({offset}/{self.total_items})")
+                    cached = self._info_cache.get(cache_key)
+                    with self._ydl_pool.session(ydl_opts_item) as ydl:
+                        if cached and cached.get('formats'):
+                            # Reuse the extraction done by fetch/Load Formats
+                            ydl.process_ie_result(copy.deepcopy(cached), download=True)
+                        elif item_url:
+                            ydl.download([item_url])
+                        elif is_url_result:
+                            ydl.process_ie_result(copy.deepcopy(entry), download=True)
+                        else:
                             ydl.download([url])
-                        self.success_count += 1
-                        worker.count_update.emit(self.success_count, self.failure_count)
-                        # Attempt to find the downloaded file in target_dir (best-effort)
-                        try:
-                            file_path = ''
-                            file_size = 0
-                            candidates = []
-                            for root, _, files in os.walk(target_dir):
-                                for fn in files:
-                                    # match by title or video id if present
-                                    if title.lower() in fn.lower() or (video_id and video_id in fn):
-                                        full = os.path.join(root, fn)
-                                        candidates.append((os.path.getmtime(full), full))
-                            if candidates:
-                                # choose most recently modified match
-                                candidates.sort(reverse=True)
-                                file_path = candidates[0][1]
-                                try:
-                                    file_size = os.path.getsize(file_path)
-                                except Exception:
-                                    file_size = 0
-                        except Exception:
-                            logging.exception('Failed to locate downloaded file')
-
-                        # Log successful download (non-blocking safe sqlite write)
-                        try:
-                            rec = {
-                                'url': url,
-                                'title': title,
-                                'format': 'Audio' if mode == 'Audio' else 'Video' if mode == 'Video' else 'Captions',
-                                'quality': quality or '',
-                                'status': 'Completed',
-                                'download_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                                'file_size': file_size,
-                                'duration': 0,
-                                'platform': entry.get('extractor') or entry.get('webpage_url') or 'Unknown',
-                                'file_path': file_path
-                            }
-                            self._log_download(rec)
-                        except Exception:
-                            logging.exception('Failed to log success record')
-
-                        break
-                    except Exception as e:
-                        attempts += 1
-                        logging.error(f"Download failed for '{title}' attempt {attempts}: {e}")
-                        worker.progress_update.emit(f"Error: {title} (attempt {attempts}/{local_max})")
-                        if attempts >= local_max:
-                            self.failure_count += 1
-                            worker.count_update.emit(self.success_count, self.failure_count)
-                            # Log failed record
-                            try:
-                                rec = {
-                                    'url': url,
-                                    'title': title,
-                                    'format': 'Audio' if mode == 'Audio' else 'Video' if mode == 'Video' else 'Captions',
-                                    'quality': quality or '',
-                                    'status': 'Failed',
-                                    'download_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                                    'file_size': 0,
-                                    'duration': 0,
-                                    'platform': entry.get('extractor') or entry.get('webpage_url') or 'Unknown',
-                                    'file_path': ''
-                                }
-                                self._log_download(rec)
-                            except Exception:
-                                logging.exception('Failed to log failure record')
-                            break
+
+                def on_error(attempts, e):
+                    # Cached media URLs may have expired; re-extract on the next attempt
+                    self._info_cache.discard(cache_key)
+                    logging.error(f"Download failed for '{title}' attempt {attempts}: {e}")
+                    worker.progress_update.emit(f"Error: {title} (attempt {attempts}/{DEFAULT_RETRIES})")
+
+                try:
+                    with_retries(attempt, DEFAULT_RETRIES, on_error)
+                except Exception:
+                    count_result(False)
+                    self._log_download(history_record(item_url or url, title, fmt, 'Failed', quality,
+                                                      platform=platform))
+                    return
+                count_result(True)
+                self._log_download(history_record(item_url or url, title, fmt, 'Completed', quality, result=result,
+                                                  duration=entry.get('duration'), platform=platform))
+
+            worker.progress_value.emit(0)
+            scheduler.run(jobs, download_item)
 
             if self.failure_count == 0:
                 worker.finished_signal.emit(f"All {self.success_count} items downloaded successfully.")
             else:
                 worker.warning_signal.emit(f"Downloaded {self.success_count} items with {self.failure_count} error(s). Check logs.")
 
-        worker = WorkerThread(run_download)
+        worker = BackgroundTask(run_download)
         worker.progress_update.connect(self.progress_label.setText)
         worker.progress_value.connect(self.progress_bar.setValue)
         worker.count_update.connect(self._update_counts)
@@ -1454,31 +1461,39 @@ class YouTubeDownloader(QMainWindow):
             self.cookies_path = path
             self.show_message("Cookies Loaded", f"Using cookies from:\n{self.cookies_path}")
 
-    def convert_mkv_button(self):
-        paths, _ = QFileDialog.getOpenFileNames(self, "Choose MKV/Video files",
-                                                "", "Video Files (*.mkv *.mp4 *.avi *.mov *.wmv *.flv *.webm);;All Files (*)")
-        if not paths:
-            return
-
+    def _convert_files(self, files, title):
+        """Convert ``files`` to MP4 on a worker thread and report the counts in a message box"""
         def _run(worker):
-            ok, fail = 0, 0
-            for f in paths:
+            ok, fail, current = 0, 0, 0
+            for f in files:
                 success, msg = self.convert_to_mp4(f)
-                if success:
+                if success and msg == "Up to date":
+                    current += 1
+                elif success:
                     ok += 1
                 else:
                     fail += 1
                     logging.error(f"Convert failed for {f}: {msg}")
             message = f"Converted: {ok}, Failed: {fail}"
+            if current:
+                message += f", Up to date: {current}"
             if fail:
                 message += "\nCheck log for details."
             worker.finished_signal.emit(message)
 
-        worker = WorkerThread(_run)
-        worker.finished_signal.connect(lambda msg: self.show_message("Convert", msg))
+        worker = BackgroundTask(_run)
+        worker.finished_signal.connect(lambda msg: self.show_message(title, msg))
         self._track_thread(worker)
         worker.start()
 
+    def convert_mkv_button(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, "Choose MKV/Video files",
+                                                "", "Video Files (*.mkv *.mp4 *.avi *.mov *.wmv *.flv *.webm);;All Files (*)")
+        if not paths:
+            return
+
+        self._convert_files(paths, "Convert")
+
     def scan_folder_button(self):
         path = QFileDialog.getExistingDirectory(self, "Choose folder to scan for videos", DOWNLOAD_DIR)
         if not path:
@@ -1489,16 +1504,20 @@ class YouTubeDownloader(QMainWindow):
             self.convert_selected_btn.show()
             self.convert_all_btn.show()
 
+        scan_id = self._begin_scan()
+
         def _scan(worker):
-            files = self.find_video_files(path)
+            # Stream files to the list as they are found, then send the complete sorted list
+            files = self.find_video_files(
+                path, on_chunk=lambda chunk: worker.data_signal.emit((scan_id, False, chunk)))
             if not files:
                 worker.error_signal.emit("No videos found in the selected folder.")
                 return
-            worker.data_signal.emit(files)
+            worker.data_signal.emit((scan_id, True, files))
 
-        worker = WorkerThread(_scan)
+        worker = BackgroundTask(_scan)
         worker.error_signal.connect(lambda msg: self.show_message("Scan", msg))
-        worker.data_signal.connect(self._populate_scan)
+        worker.data_signal.connect(self._on_scan_data)
         self._track_thread(worker)
         worker.start()
         _post()
@@ -1508,56 +1527,18 @@ class YouTubeDownloader(QMainWindow):
         if not sel:
             self.show_message("Convert", "Select one or more files to convert.")
             return
-        files = [self.video_listbox.item(i.row()).text() for i in sel]
+        files = [self._listed_file(i.row()) for i in sel]
 
-        def _run(worker):
-            ok, fail = 0, 0
-            for f in files:
-                success, msg = self.convert_to_mp4(f)
-                if success:
-                    ok += 1
-                else:
-                    fail += 1
-                    logging.error(f"Convert failed for {f}: {msg}")
-            message = f"Converted: {ok}, Failed: {fail}"
-            if fail:
-                message += "\nCheck log for details."
-            worker.finished_signal.emit(message)
-
-        worker = WorkerThread(_run)
-        worker.finished_signal.connect(lambda msg: self.show_message("Convert Selected", msg))
-        self._track_thread(worker)
-        worker.start()
+        self._convert_files(files, "Convert Selected")
 
     def convert_all_action_inline(self):
         count = self.video_listbox.count()
         if count == 0:
             self.show_message("Convert", "No files to convert. Run Scan first.")
             return
-        files = [self.video_listbox.item(i).text() for i in range(count)]
-
-        def _run(worker):
-            ok, fail = 0, 0
-            for f in files:
-                success, msg = self.convert_to_mp4(f)
-                if success:
-                    ok += 1
-                else:
-                    fail += 1
-                    logging.error(f"Convert failed for {f}: {msg}")
-            message = f"Converted: {ok}, Failed: {fail}"
-            if fail:
-                message += "\nCheck log for details."
-            worker.finished_signal.emit(message)
+        files = [self._listed_file(i) for i in range(count)]
 
-        worker = WorkerThread(_run)
-        worker.finished_signal.connect(lambda msg: self.show_message("Convert All", msg))
-        self._track_thread(worker)
-        worker.start()
-        worker = WorkerThread(_run)
-        worker.finished_signal.connect(lambda msg: self.show_message("Convert All", msg))
-        self._track_thread(worker)
-        worker.start()
+        self._convert_files(files, "Convert All")
 
 
 # PreferencesDialog moved to preferences_dialog.py
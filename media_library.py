@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Media metadata cache for Enhanced YouTube Downloader
+Keeps ffprobe summaries in SQLite so re-scans only probe new or changed files
+"""
+
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from media_probe import run_ffprobe, stream_bit_rate
+
+DEFAULT_PROBE_WORKERS = min(8, os.cpu_count() or 1)
+# Stay well below SQLite's limit on host parameters per statement
+_CHUNK = 500
+_FIELDS = ('duration', 'video_codec', 'audio_codec', 'width', 'height', 'bit_rate')
+
+
+def summarize(info) -> dict:
+    """Duration, first video/audio codec, resolution and bitrate of an ffprobe result"""
+    meta = dict.fromkeys(_FIELDS)
+    if not info:
+        return meta
+    fmt = info.get('format') or {}
+    try:
+        meta['duration'] = float(fmt.get('duration')) or None
+    except (TypeError, ValueError):
+        pass
+    try:
+        meta['bit_rate'] = int(fmt.get('bit_rate')) or None
+    except (TypeError, ValueError):
+        pass
+    for stream in info.get('streams') or []:
+        kind = stream.get('codec_type')
+        if kind == 'video' and meta['video_codec'] is None \
+                and not (stream.get('disposition') or {}).get('attached_pic'):
+            meta['video_codec'] = stream.get('codec_name')
+            meta['width'] = stream.get('width')
+            meta['height'] = stream.get('height')
+        elif kind == 'audio' and meta['audio_codec'] is None:
+            meta['audio_codec'] = stream.get('codec_name')
+    if meta['bit_rate'] is None:
+        rates = [stream_bit_rate(s) for s in info.get('streams') or []]
+        meta['bit_rate'] = sum(r for r in rates if r) or None
+    return meta
+
+
+def _format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def describe(meta) -> str:
+    """Short one-line label, e.g. ``3:25 | h264 1920x1080 | aac | 4.2 Mb/s``"""
+    if not meta or not any(meta.get(f) for f in _FIELDS):
+        return ''
+    parts = []
+    if meta.get('duration'):
+        parts.append(_format_duration(meta['duration']))
+    if meta.get('video_codec'):
+        video = meta['video_codec']
+        if meta.get('width') and meta.get('height'):
+            video += f" {meta['width']}x{meta['height']}"
+        parts.append(video)
+    if meta.get('audio_codec'):
+        parts.append(meta['audio_codec'])
+    if meta.get('bit_rate'):
+        rate = meta['bit_rate']
+        parts.append(f"{rate / 1e6:.1f} Mb/s" if rate >= 1e6 else f"{rate // 1000} kb/s")
+    return ' | '.join(parts)
+
+
+class MediaMetadataCache:
+    """SQLite table of ffprobe summaries keyed by (path, size, mtime).
+
+    :meth:`metadata` stats every path once and answers from the table when
+    size and mtime still match; only new or changed files are handed to
+    ffprobe, several processes at a time. Files ffprobe cannot read are
+    recorded too, so they are not retried until they change. A fresh
+    connection is opened per call so the cache can be used from worker threads.
+    """
+
+    def __init__(self, db_path, max_workers=DEFAULT_PROBE_WORKERS, probe=run_ffprobe):
+        self.db_path = db_path
+        self.max_workers = max(1, int(max_workers or 1))
+        self.probe = probe
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS media_metadata (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    duration REAL,
+                    video_codec TEXT,
+                    audio_codec TEXT,
+                    width INTEGER,
+                    height INTEGER,
+                    bit_rate INTEGER,
+                    probed_at TEXT
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def lookup(self, paths):
+        """Split ``paths`` into ({path: metadata} still valid, [(path, size, mtime_ns)] to probe)"""
+        stats = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats[os.path.abspath(path)] = (path, st.st_size, st.st_mtime_ns)
+        rows = {}
+        keys = list(stats)
+        conn = self._connect()
+        try:
+            for start in range(0, len(keys), _CHUNK):
+                chunk = keys[start:start + _CHUNK]
+                cur = conn.execute(
+                    f"SELECT path, size, mtime_ns, {', '.join(_FIELDS)} FROM media_metadata "
+                    f"WHERE path IN ({', '.join('?' * len(chunk))})", chunk)
+                for row in cur:
+                    rows[row[0]] = row
+        finally:
+            conn.close()
+        found, stale = {}, []
+        for key, (path, size, mtime_ns) in stats.items():
+            row = rows.get(key)
+            if row is not None and row[1] == size and row[2] == mtime_ns:
+                found[path] = dict(zip(_FIELDS, row[3:]))
+            else:
+                stale.append((path, size, mtime_ns))
+        return found, stale
+
+    def _probe_one(self, path):
+        try:
+            return summarize(self.probe(path))
+        except FileNotFoundError:
+            raise  # ffprobe itself is missing; nothing is worth recording
+        except Exception as e:
+            logging.info('ffprobe failed for %s: %s', path, e)
+            return summarize(None)
+
+    def _store(self, records):
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            conn = self._connect()
+            try:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO media_metadata (path, size, mtime_ns, {', '.join(_FIELDS)}, probed_at) "
+                    f"VALUES ({', '.join('?' * (len(_FIELDS) + 4))})",
+                    [(os.path.abspath(path), size, mtime_ns) + tuple(meta[f] for f in _FIELDS) + (now,)
+                     for path, size, mtime_ns, meta in records])
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception:
+            logging.exception('Failed to store media metadata')
+
+    def metadata(self, paths, on_result=None) -> dict:
+        """{path: metadata} for ``paths``, probing only new or changed files.
+
+        ``on_result(path, meta)`` is called for cached files first and then
+        for each probed file as soon as ffprobe returns. Paths that no longer
+        exist are left out.
+        """
+        found, stale = self.lookup(paths)
+        if on_result is not None:
+            for path, meta in found.items():
+                on_result(path, meta)
+        if not stale:
+            return found
+        records = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(stale)), thread_name_prefix='ffprobe') as pool:
+            futures = {pool.submit(self._probe_one, path): (path, size, mtime_ns) for path, size, mtime_ns in stale}
+            for future in as_completed(futures):
+                path, size, mtime_ns = futures[future]
+                try:
+                    meta = future.result()
+                except FileNotFoundError:
+                    logging.warning('ffprobe not found; media metadata is unavailable')
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                records.append((path, size, mtime_ns, meta))
+                found[path] = meta
+                if on_result is not None:
+                    on_result(path, meta)
+                if len(records) >= _CHUNK:
+                    self._store(records)
+                    records = []
+        if records:
+            self._store(records)
+        return found
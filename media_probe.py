@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Media probing for Enhanced YouTube Downloader
+Runs ffprobe once per file and decides per stream whether to copy or re-encode
+"""
+
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+
+# Codecs that play back from an MP4 container in common players
+MP4_VIDEO_CODECS = frozenset({'h264', 'hevc', 'av1', 'mpeg4'})
+MP4_AUDIO_CODECS = frozenset({'aac', 'mp3', 'ac3', 'eac3', 'alac'})
+# Text subtitles can become mov_text; bitmap ones (PGS, VobSub) cannot go into MP4
+TEXT_SUBTITLE_CODECS = frozenset({'subrip', 'srt', 'ass', 'ssa', 'webvtt', 'mov_text', 'text'})
+# Advanced converter codec names -> ffprobe codec names
+CODEC_NAMES = {'h264': 'h264', 'h265': 'hevc', 'vp9': 'vp9', 'aac': 'aac', 'mp3': 'mp3', 'vorbis': 'vorbis'}
+
+REMUX = 'remux'
+AUDIO_ONLY = 'audio'
+TRANSCODE = 'transcode'
+# Conversion-cache settings of the "convert to MP4" action (see plan_mp4)
+MP4_CONVERSION_SETTINGS = {'output_format': 'mp4', 'plan': 'mp4_remux'}
+
+# Files whose probe results are kept; least recently used ones are dropped first
+PROBE_CACHE_SIZE = 512
+# abspath -> ((size, mtime_ns), ffprobe result); one entry per file, however often it changes
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _file_key(path):
+    st = os.stat(path)
+    return os.path.abspath(path), (st.st_size, st.st_mtime_ns)
+
+
+def run_ffprobe(path) -> dict:
+    """ffprobe's JSON description (format + streams) of ``path``"""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', path],
+        capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=60,
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"ffprobe exited with code {result.returncode}")
+    return json.loads(result.stdout or '{}')
+
+
+def probe(path):
+    """Cached ffprobe result for ``path`` (re-probed when size or mtime change), or None"""
+    try:
+        key, state = _file_key(path)
+    except OSError:
+        return None
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == state:
+            _cache.move_to_end(key)
+            return cached[1]
+    try:
+        info = run_ffprobe(path)
+    except Exception:
+        info = None
+    with _cache_lock:
+        _cache[key] = (state, info)
+        _cache.move_to_end(key)
+        while len(_cache) > PROBE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return info
+
+
+def probe_duration(path):
+    """Media duration in seconds, or None"""
+    info = probe(path)
+    try:
+        return float(info['format']['duration']) or None
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+def frame_rate(stream):
+    """Average frame rate of a video stream as a float, or None"""
+    value = stream.get('avg_frame_rate') or stream.get('r_frame_rate') or ''
+    try:
+        num, _, den = value.partition('/')
+        return float(num) / float(den or 1) if float(den or 1) else None
+    except ValueError:
+        return None
+
+
+def stream_bit_rate(stream):
+    """Bitrate of a stream in bit/s, or None"""
+    # Matroska keeps per-stream bitrates in the BPS statistics tags
+    tags = stream.get('tags') or {}
+    try:
+        return int(stream.get('bit_rate') or tags.get('BPS') or tags.get('BPS-eng') or 0) or None
+    except (TypeError, ValueError):
+        return None
+
+
+class ConversionPlan:
+    """ffmpeg output arguments for one file plus how much work they imply"""
+
+    def __init__(self, mode, args):
+        self.mode = mode
+        self.args = args
+
+    def __repr__(self):
+        return f"ConversionPlan({self.mode!r}, {self.args!r})"
+
+
+def plan_mp4(info) -> ConversionPlan:
+    """Per-stream copy/re-encode plan for putting ``info``'s streams into MP4.
+
+    Compatible video and audio are copied; other audio is re-encoded to AAC
+    and other video to H.264. Text subtitles become mov_text, while bitmap
+    subtitles, attachments and data streams are dropped.
+    """
+    args = []
+    out = 0
+    video_encoded = audio_encoded = False
+    for stream in (info or {}).get('streams') or []:
+        kind = stream.get('codec_type')
+        codec = stream.get('codec_name')
+        index = stream.get('index')
+        if kind == 'video':
+            if (stream.get('disposition') or {}).get('attached_pic'):
+                continue  # cover art
+            args += ['-map', f'0:{index}']
+            if codec in MP4_VIDEO_CODECS:
+                args += [f'-c:{out}', 'copy']
+                if codec == 'hevc':
+                    args += [f'-tag:{out}', 'hvc1']  # needed by Apple players
+            else:
+                args += [f'-c:{out}', 'libx264', '-preset', 'veryfast', '-crf', '20']
+                video_encoded = True
+        elif kind == 'audio':
+            args += ['-map', f'0:{index}']
+            if codec in MP4_AUDIO_CODECS:
+                args += [f'-c:{out}', 'copy']
+            else:
+                args += [f'-c:{out}', 'aac', f'-b:{out}', '192k']
+                audio_encoded = True
+        elif kind == 'subtitle' and codec in TEXT_SUBTITLE_CODECS:
+            args += ['-map', f'0:{index}', f'-c:{out}', 'mov_text']
+        else:
+            continue
+        out += 1
+    if not out:
+        # Nothing recognizable was probed: let ffmpeg pick streams and copy them
+        return ConversionPlan(REMUX, ['-c:v', 'copy', '-c:a', 'copy'])
+    mode = TRANSCODE if video_encoded else AUDIO_ONLY if audio_encoded else REMUX
+    return ConversionPlan(mode, args)
+
+
+def mp4_command(input_file, output_file, overwrite=True):
+    """ffmpeg command converting ``input_file`` to MP4 with as little re-encoding as possible.
+
+    Without ``overwrite`` ffmpeg asks before replacing an existing output.
+    """
+    plan = plan_mp4(probe(input_file))
+    overwrite_flag = ['-y'] if overwrite else []
+    return ['ffmpeg', *overwrite_flag, '-i', input_file] + plan.args + [output_file], plan
+
+
+def copyable_streams(info, settings):
+    """(copy_video, copy_audio) for the Advanced converter's ``settings``.
+
+    A stream is copied instead of re-encoded when it already has the
+    requested codec, fits the output container, needs no scaling, frame-rate
+    or sample-rate change, and is not above the requested bitrate.
+    """
+    if not info or settings.get('two_pass') or settings.get('custom_options'):
+        return False, False
+    streams = info.get('streams') or []
+    videos = [s for s in streams if s.get('codec_type') == 'video'
+              and not (s.get('disposition') or {}).get('attached_pic')]
+    audios = [s for s in streams if s.get('codec_type') == 'audio']
+    mp4 = settings.get('output_format') in ('mp4', 'mov')
+
+    copy_video = bool(videos) and not settings.get('resolution')
+    for s in videos:
+        wanted = CODEC_NAMES.get(settings.get('video_codec'))
+        rate, fps = stream_bit_rate(s), frame_rate(s)
+        requested = settings.get('video_bitrate')
+        if (s.get('codec_name') != wanted
+                or (mp4 and s.get('codec_name') not in MP4_VIDEO_CODECS)
+                or (settings.get('framerate') and (fps is None or abs(fps - settings['framerate']) > 0.01))
+                or (requested and (rate is None or rate > requested * 1000))):
+            copy_video = False
+
+    copy_audio = bool(audios) and not settings.get('sample_rate')
+    for s in audios:
+        wanted = CODEC_NAMES.get(settings.get('audio_codec'))
+        rate = stream_bit_rate(s)
+        requested = settings.get('audio_bitrate')
+        if (s.get('codec_name') != wanted
+                or (mp4 and s.get('codec_name') not in MP4_AUDIO_CODECS)
+                or (requested and (rate is None or rate > requested * 1000))):
+            copy_audio = False
+    return copy_video, copy_audio
@@ -2,6 +2,9 @@ import subprocess
 import os
 import re
 
+from media_probe import mp4_command
+from folder_scanner import FolderScanner
+
 def find_video_files(folder_path: str) -> list[str]:
     """
     Scans a folder and its subfolders to find all video files.
@@ -12,15 +15,7 @@ def find_video_files(folder_path: str) -> list[str]:
     Returns:
         list[str]: A list of full paths to all found video files.
     """
-    video_extensions = ['.mkv', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm']
-    video_files = []
-    
-    for dirpath, dirnames, filenames in os.walk(folder_path):
-        for filename in filenames:
-            if any(filename.lower().endswith(ext) for ext in video_extensions):
-                video_files.append(os.path.join(dirpath, filename))
-                
-    return video_files
+    return FolderScanner().scan(folder_path)
 
 def convert_to_mp4(input_file: str) -> None:
     """
@@ -43,19 +38,13 @@ def convert_to_mp4(input_file: str) -> None:
         return
     
     # FFmpeg command to convert the video to MP4
-    # -i: specifies the input file
-    # -c:v copy: copies the video stream without re-encoding
-    # -c:a copy: copies the audio stream without re-encoding
-    # This is the fastest and best-quality method, as it only changes the container.
-    command = [
-        'ffmpeg',
-        '-i', input_file,
-        '-c:v', 'copy',
-        '-c:a', 'copy',
-        output_file
-    ]
+    # ffprobe decides per stream: streams MP4 can hold are copied without
+    # re-encoding (the fastest and best-quality method, as it only changes the
+    # container); only incompatible audio/video is re-encoded.
+    # No -y: as before, ffmpeg asks before replacing an existing MP4
+    command, plan = mp4_command(input_file, output_file, overwrite=False)
 
-    print(f"\nStarting conversion of '{os.path.basename(input_file)}'...")
+    print(f"\nStarting conversion of '{os.path.basename(input_file)}' ({plan.mode})...")
     
     try:
         # Use subprocess.run to execute the FFmpeg command
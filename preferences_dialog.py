@@ -1,7 +1,8 @@
 from PyQt5 import QtWidgets
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QGroupBox, QHBoxLayout,
                              QLabel, QPushButton, QComboBox, QRadioButton,
-                             QFileDialog, QLineEdit)
+                             QFileDialog, QLineEdit, QFormLayout, QSpinBox, QCheckBox)
+from download_scheduler import DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT
 
 class PreferencesDialog(QDialog):
     """Preferences dialog moved out of main file. Expects a parent with methods:
@@ -70,6 +71,29 @@ class PreferencesDialog(QDialog):
         db_layout.addWidget(browse_btn)
         layout.addWidget(db_group)
 
+        # Parallel download limits
+        dl_group = QGroupBox(parent._tr('downloads') if hasattr(parent, '_tr') else 'Downloads')
+        dl_layout = QFormLayout(dl_group)
+        settings = getattr(parent, 'settings', None) or {}
+        self.max_downloads_spin = QSpinBox()
+        self.max_downloads_spin.setRange(1, 16)
+        self.max_downloads_spin.setValue(int(settings.get('max_concurrent_downloads', DEFAULT_MAX_WORKERS)))
+        dl_layout.addRow(parent._tr('max_concurrent_downloads'), self.max_downloads_spin)
+        self.per_host_spin = QSpinBox()
+        self.per_host_spin.setRange(1, 16)
+        self.per_host_spin.setValue(int(settings.get('per_host_limit', DEFAULT_PER_HOST_LIMIT)))
+        dl_layout.addRow(parent._tr('per_host_limit'), self.per_host_spin)
+        self.bandwidth_spin = QSpinBox()
+        self.bandwidth_spin.setRange(0, 1000000)
+        self.bandwidth_spin.setSuffix(" KB/s")
+        self.bandwidth_spin.setSpecialValueText(parent._tr('unlimited'))
+        self.bandwidth_spin.setValue(int(settings.get('bandwidth_limit_kbps', 0) or 0))
+        dl_layout.addRow(parent._tr('bandwidth_limit'), self.bandwidth_spin)
+        self.archive_db_check = QCheckBox(parent._tr('archive_in_db'))
+        self.archive_db_check.setChecked(bool(settings.get('archive_in_db', False)))
+        dl_layout.addRow(self.archive_db_check)
+        layout.addWidget(dl_group)
+
         # Buttons
         btn_layout = QHBoxLayout()
         ok_btn = QPushButton(parent._tr('ok'))
@@ -120,6 +144,17 @@ class PreferencesDialog(QDialog):
             except Exception:
                 pass
 
+            # Save parallel download limits
+            try:
+                self.parent.settings['max_concurrent_downloads'] = self.max_downloads_spin.value()
+                self.parent.settings['per_host_limit'] = self.per_host_spin.value()
+                self.parent.settings['bandwidth_limit_kbps'] = self.bandwidth_spin.value()
+                self.parent.settings['archive_in_db'] = self.archive_db_check.isChecked()
+                self.parent._archive = None
+                self.parent._save_settings()
+            except Exception:
+                pass
+
             try:
                 self.parent._refresh_ui_texts()
             except Exception:
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Segment planning for Enhanced YouTube Downloader
+Splits long inputs at keyframes so their video can be encoded in parallel and joined losslessly
+"""
+
+import bisect
+import os
+import subprocess
+
+# Inputs shorter than this are encoded in one piece
+MIN_CHUNKED_DURATION = 10 * 60
+MIN_SEGMENT_SECONDS = 30
+# -threads per segment encode; parallelism comes from running many segments
+SEGMENT_THREADS = 2
+# Segments per parallel worker, so a slow segment does not leave cores idle at the end
+SEGMENTS_PER_WORKER = 2
+
+
+def keyframe_times(path) -> list:
+    """Presentation times (seconds) of the first video stream's keyframes.
+
+    Reads packet flags only, so nothing is decoded.
+    """
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'packet=pts_time,flags',
+         '-of', 'csv=p=0', path],
+        capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=600,
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"ffprobe exited with code {result.returncode}")
+    times = []
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.partition(',')
+        if 'K' in flags:
+            try:
+                times.append(float(pts))
+            except ValueError:
+                continue
+    return sorted(times)
+
+
+def plan_segments(keyframes, duration, count, min_length=MIN_SEGMENT_SECONDS) -> list:
+    """Split ``duration`` into up to ``count`` (start, end) ranges cut at keyframes.
+
+    Cuts go to the keyframe nearest each equal share; segments shorter than
+    ``min_length`` are merged into their neighbour. The last range ends at
+    None, meaning "to the end of the input".
+    """
+    count = max(1, min(int(count), int(duration // max(min_length, 1))))
+    bounds = [0.0]
+    if count > 1 and keyframes:
+        for i in range(1, count):
+            target = duration * i / count
+            k = bisect.bisect_left(keyframes, target)
+            candidates = keyframes[max(0, k - 1):k + 1]
+            cut = min(candidates, key=lambda t: abs(t - target))
+            if cut - bounds[-1] >= min_length and duration - cut >= min_length:
+                bounds.append(cut)
+    ends = bounds[1:] + [None]
+    return list(zip(bounds, ends))
+
+
+def segment_durations(segments, duration) -> list:
+    return [(duration if end is None else end) - start for start, end in segments]
+
+
+def concat_command(segment_files, list_path, output_file, audio_file=None, video_tag=None) -> list:
+    """Write the concat demuxer list and return the ffmpeg command joining the parts without re-encoding"""
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in segment_files:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    cmd = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', list_path]
+    if audio_file:
+        cmd += ['-i', audio_file]
+    cmd += ['-map', '0:v']
+    if audio_file:
+        cmd += ['-map', '1:a']
+    cmd += ['-c', 'copy']
+    if video_tag:
+        cmd += ['-tag:v', video_tag]
+    return cmd + [output_file]
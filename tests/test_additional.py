@@ -36,8 +36,9 @@ def test_log_download_writes_row(tmp_path, monkeypatch, qapp, qtbot):
         'file_path': 'C:/Videos/test.mp4'
     }
 
-    # Call the internal logger
+    # Call the internal logger; records are committed in batches by the writer thread
     win._log_download(record)
+    assert win._history_writer.flush()
 
     # Verify row exists
     conn = sqlite3.connect(dbp)
@@ -75,11 +76,11 @@ def test_convert_to_mp4_ffmpeg_missing(tmp_path, monkeypatch):
     inp = tmp_path / 'video.mkv'
     inp.write_text('dummy')
 
-    # Force subprocess.run to raise FileNotFoundError to simulate missing ffmpeg
-    def _bad_run(*args, **kwargs):
+    # Force subprocess.Popen to raise FileNotFoundError to simulate missing ffmpeg
+    def _bad_popen(*args, **kwargs):
         raise FileNotFoundError()
 
-    monkeypatch.setattr(subprocess, 'run', _bad_run)
+    monkeypatch.setattr(subprocess, 'Popen', _bad_popen)
 
     ok, msg = main_V3.YouTubeDownloader().convert_to_mp4(str(inp))
     assert not ok
@@ -91,16 +92,97 @@ def test_convert_to_mp4_success(tmp_path, monkeypatch):
     inp = tmp_path / 'video.mkv'
     outp = tmp_path / 'video.mp4'
     inp.write_text('dummy')
-    # Simulate ffmpeg creating the output file
-    def _good_run(*args, **kwargs):
-        # create the output file to simulate successful conversion
-        outp.write_text('mp4')
-        class CP:
-            returncode = 0
-        return CP()
+    # Simulate ffmpeg creating the output file while streaming -progress output
+    class _GoodPopen:
+        def __init__(self, cmd, *args, **kwargs):
+            assert '-progress' in cmd
+            # create the output file to simulate successful conversion
+            outp.write_text('mp4')
+            self.stdout = iter(['out_time_us=1000000\n', 'speed=2.0x\n', 'progress=end\n'])
+            self.stderr = iter(['ffmpeg version n\n'])
+            self.returncode = 0
+
+        def wait(self, timeout=None):
+            return self.returncode
 
-    monkeypatch.setattr(subprocess, 'run', _good_run)
+    monkeypatch.setattr(subprocess, 'Popen', _GoodPopen)
 
     ok, result = main_V3.YouTubeDownloader().convert_to_mp4(str(inp))
     assert ok
     assert str(outp) == result
+
+
+def test_convert_to_mp4_skips_up_to_date_output(tmp_path, tmp_db, monkeypatch):
+    inp = tmp_path / 'video.mkv'
+    outp = tmp_path / 'video.mp4'
+    inp.write_text('dummy')
+    runs = []
+
+    def _fake_run_ffmpeg(cmd, *args, **kwargs):
+        runs.append(cmd)
+        outp.write_text('mp4')
+        return 0, ''
+
+    monkeypatch.setattr(main_V3, 'run_ffmpeg', _fake_run_ffmpeg)
+    from media_probe import ConversionPlan, REMUX
+    monkeypatch.setattr(main_V3, 'mp4_command', lambda i, o: (['ffmpeg', '-i', i, o], ConversionPlan(REMUX, [])))
+    win = main_V3.YouTubeDownloader()
+    win.history_db_path = tmp_db
+
+    assert win.convert_to_mp4(str(inp)) == (True, str(outp))
+    assert win.convert_to_mp4(str(inp)) == (True, 'Up to date')
+    assert len(runs) == 1
+
+
+def test_convert_all_runs_one_pass_over_the_listed_files(tmp_path, monkeypatch, qtbot):
+    monkeypatch.setattr(main_V3, 'HISTORY_DB', str(tmp_path / 'hist.db'))
+    win = YouTubeDownloader()
+    qtbot.addWidget(win)
+    files = [str(tmp_path / 'a.mkv'), str(tmp_path / 'b.mkv')]
+    win.video_listbox.addItems(files)
+    calls, messages = [], []
+    monkeypatch.setattr(win, 'convert_to_mp4', lambda f: calls.append(f) or (True, f))
+    monkeypatch.setattr(win, 'show_message', lambda title, msg, *a: messages.append(msg))
+
+    win.convert_all_action_inline()
+    qtbot.waitUntil(lambda: bool(messages), timeout=5000)
+    qtbot.wait(200)
+    assert calls == files
+    assert messages == ["Converted: 2, Failed: 0"]
+
+
+def test_convert_button_reports_up_to_date_files_separately(tmp_path, monkeypatch, qtbot):
+    monkeypatch.setattr(main_V3, 'HISTORY_DB', str(tmp_path / 'hist.db'))
+    win = YouTubeDownloader()
+    qtbot.addWidget(win)
+    files = [str(tmp_path / 'a.mkv'), str(tmp_path / 'b.mkv'), str(tmp_path / 'c.mkv')]
+    results = {files[0]: (True, 'a.mp4'), files[1]: (True, 'Up to date'), files[2]: (False, 'boom')}
+    messages = []
+    monkeypatch.setattr(main_V3.QFileDialog, 'getOpenFileNames', lambda *a, **k: (files, ''))
+    monkeypatch.setattr(win, 'convert_to_mp4', results.get)
+    monkeypatch.setattr(win, 'show_message', lambda title, msg, *a: messages.append((title, msg)))
+
+    win.convert_mkv_button()
+    qtbot.waitUntil(lambda: bool(messages), timeout=5000)
+    assert messages == [("Convert", "Converted: 1, Failed: 1, Up to date: 1\nCheck log for details.")]
+
+
+def test_conversion_cache_is_created_once_per_window(tmp_path, tmp_db, monkeypatch):
+    created = []
+
+    class CountingCache(main_V3.ConversionCache):
+        def __init__(self, db_path):
+            created.append(db_path)
+            super().__init__(db_path)
+
+    monkeypatch.setattr(main_V3, 'ConversionCache', CountingCache)
+    monkeypatch.setattr(main_V3, 'run_ffmpeg', lambda cmd, *a, **k: (0, ''))
+    from media_probe import ConversionPlan, REMUX
+    monkeypatch.setattr(main_V3, 'mp4_command', lambda i, o: (['ffmpeg', '-i', i, o], ConversionPlan(REMUX, [])))
+    win = main_V3.YouTubeDownloader()
+    win.history_db_path = tmp_db
+    for name in ('a', 'b', 'c'):
+        (tmp_path / f'{name}.mkv').write_text('x')
+        (tmp_path / f'{name}.mp4').write_text('mp4')
+        assert win.convert_to_mp4(str(tmp_path / f'{name}.mkv'))[0]
+    assert created == [tmp_db]
@@ -0,0 +1,54 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from batch_queue import BatchJobQueue, RUNNING, DONE, FAILED, PENDING
+
+
+def test_interrupted_batch_resumes_remaining_jobs(tmp_db):
+    q = BatchJobQueue(tmp_db)
+    key = BatchJobQueue.batch_key_for('urls.txt')
+    urls = ['http://a/1', 'http://a/2', 'http://a/3']
+
+    assert q.enqueue(key, urls) == 3
+    jobs = q.pending(key)
+    assert [u for _, u in jobs] == urls
+
+    # first done, second interrupted while running, third failed
+    q.mark(jobs[0][0], RUNNING)
+    q.mark(jobs[0][0], DONE)
+    q.mark(jobs[1][0], RUNNING)
+    q.mark(jobs[2][0], FAILED, 'boom')
+
+    # re-opening the same file only re-queues the unfinished work
+    assert q.enqueue(key, urls) == 2
+    assert [u for _, u in q.pending(key)] == urls[1:]
+    assert q.counts(key) == {DONE: 1, PENDING: 2}
+
+
+def test_completed_batch_starts_over(tmp_db):
+    q = BatchJobQueue(tmp_db)
+    key = BatchJobQueue.batch_key_for('urls.txt')
+    q.enqueue(key, ['http://a/1'])
+    for job_id, _ in q.pending(key):
+        q.mark(job_id, DONE)
+
+    assert q.enqueue(key, ['http://a/1', 'http://a/2']) == 2
+
+
+def test_edited_list_drops_removed_urls_and_follows_the_new_order(tmp_db):
+    q = BatchJobQueue(tmp_db)
+    key = BatchJobQueue.batch_key_for('urls.txt')
+    q.enqueue(key, ['http://a/1', 'http://a/2', 'http://a/3'])
+    jobs = dict((u, i) for i, u in q.pending(key))
+    q.mark(jobs['http://a/1'], DONE)
+    q.mark(jobs['http://a/2'], FAILED, 'boom')
+
+    # 2 was deleted from the file, 4 added, 3 moved to the end
+    assert q.enqueue(key, ['http://a/1', 'http://a/4', 'http://a/3', 'http://a/4']) == 2
+    assert [u for _, u in q.pending(key)] == ['http://a/4', 'http://a/3']
+    assert q.counts(key) == {DONE: 1, PENDING: 2}
@@ -0,0 +1,51 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from conversion_cache import ConversionCache
+
+SETTINGS = {'output_format': 'mp4', 'video_codec': 'h264', 'crf': 23, 'output_dir': '/out', 'threads': 4}
+
+
+def _touch(path, data=b'x', bump=0):
+    with open(path, 'wb') as f:
+        f.write(data)
+    if bump:
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))
+
+
+def test_recorded_output_is_current_until_something_changes(tmp_db, tmp_path):
+    src, out = str(tmp_path / 'in.mkv'), str(tmp_path / 'in.mp4')
+    _touch(src)
+    cache = ConversionCache(tmp_db)
+    assert not cache.is_current(src, out, SETTINGS)  # nothing converted yet
+
+    _touch(out, b'mp4')
+    cache.record(src, out, SETTINGS)
+    assert cache.is_current(src, out, SETTINGS)
+    # Speed/placement settings do not matter; output-affecting ones do
+    assert cache.is_current(src, out, dict(SETTINGS, threads=0, priority='Low', output_dir='/elsewhere'))
+    assert not cache.is_current(src, out, dict(SETTINGS, crf=28))
+
+    _touch(src, bump=1_000_000)  # input re-downloaded
+    assert not cache.is_current(src, out, SETTINGS)
+
+
+def test_partial_or_removed_output_is_not_current(tmp_db, tmp_path):
+    cache = ConversionCache(tmp_db)
+    pairs = []
+    for name in ('a', 'b', 'c'):
+        src, out = str(tmp_path / f'{name}.mkv'), str(tmp_path / f'{name}.mp4')
+        _touch(src)
+        _touch(out, b'mp4')
+        cache.record(src, out, SETTINGS)
+        pairs.append((src, out))
+
+    _touch(pairs[1][1], b'truncated by a crash')
+    os.remove(pairs[2][1])
+    assert cache.up_to_date(pairs, SETTINGS) == {pairs[0][1]}
@@ -0,0 +1,276 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import conversion_engine
+from conversion_engine import ConversionJob, ConversionPool, auto_workers, priority_kwargs
+
+
+def test_auto_workers_follows_codec_mix():
+    video = {'output_format': 'mp4'}
+    assert auto_workers(dict(video, video_codec='copy'), 100, cpu_count=16) == 16
+    assert auto_workers({'output_format': 'mp3'}, 100, cpu_count=16) == 16
+    assert auto_workers(dict(video, video_codec='h264'), 100, cpu_count=16) == 8
+    assert auto_workers(dict(video, video_codec='h265'), 100, cpu_count=16) == 4
+    assert auto_workers(dict(video, video_codec='h265'), 100, cpu_count=2) == 1
+    # explicit setting wins, capped by the number of files
+    assert auto_workers(dict(video, video_codec='h265', threads=6), 3, cpu_count=16) == 3
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='nice is POSIX only')
+def test_low_priority_renices_after_start_on_posix():
+    import subprocess
+    # No preexec_fn: forking with one is unsafe from a threaded process
+    assert priority_kwargs('Low') == {}
+    proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)'])
+    try:
+        conversion_engine.renice(proc, 'Low')
+        expected = min(19, os.getpriority(os.PRIO_PROCESS, 0) + 10)
+        assert os.getpriority(os.PRIO_PROCESS, proc.pid) == expected
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def test_pool_runs_jobs_in_parallel_and_reports_progress(monkeypatch):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fake_run_ffmpeg(cmd, duration, on_progress, **kwargs):
+        barrier.wait()  # only passes if three conversions run at once
+        return (1, 'broken input') if cmd[-1] == 'bad' else (0, '')
+
+    monkeypatch.setattr(conversion_engine, 'probe_duration', lambda path: 10.0)
+    monkeypatch.setattr(conversion_engine, 'run_ffmpeg', fake_run_ffmpeg)
+    seen, done = [], []
+    pool = ConversionPool(max_workers=3, on_progress=lambda job, agg: seen.append(agg), on_job_done=done.append)
+    jobs = [ConversionJob(f'in{i}', out, ['ffmpeg', out]) for i, out in enumerate(['a', 'b', 'bad'])]
+    pool.run(jobs)
+
+    assert len(done) == 3
+    assert [j.ok for j in jobs] == [True, True, False]
+    assert jobs[2].error == 'broken input'
+    assert seen[-1] == 100
+    assert pool.aggregate_percent() == 100
+
+
+def test_progress_parser_tracks_time_speed_and_end():
+    from conversion_engine import FFmpegProgress
+    p = FFmpegProgress(duration=20)
+    for line in ['frame=10', 'fps=48.5', 'out_time_us=5000000', 'speed=3.5x']:
+        assert p.feed(line) is False
+    assert p.feed('progress=continue') is True
+    assert (p.percent, p.speed, p.fps) == (25.0, 3.5, 48.5)
+    p.feed('out_time=00:00:15.000000')
+    assert p.percent == 75.0
+    p.feed('progress=end')
+    assert p.percent == 100.0
+
+
+def test_run_ffmpeg_keeps_only_stderr_tail(monkeypatch):
+    class FakePopen:
+        def __init__(self, cmd, **kwargs):
+            self.stdout = iter(['out_time_us=1000000\n', 'progress=continue\n', 'progress=end\n'])
+            self.stderr = iter(['  Duration: 00:00:04.00, start: 0\n'] + [f'line {i}\n' for i in range(500)])
+            self.returncode = 1
+
+        def wait(self, timeout=None):
+            return self.returncode
+
+    monkeypatch.setattr(conversion_engine.subprocess, 'Popen', FakePopen)
+    seen = []
+    code, tail = conversion_engine.run_ffmpeg(['ffmpeg', '-i', 'x', 'y'], on_progress=lambda p: seen.append(p.percent))
+    assert code == 1
+    assert tail.splitlines() == [f'line {i}' for i in range(500 - conversion_engine.STDERR_TAIL_LINES, 500)]
+    assert seen[-1] == 100.0
+
+
+def test_parse_custom_options_uses_shell_quoting_and_rejects_managed_flags():
+    from conversion_engine import parse_custom_options
+    assert parse_custom_options('-tune film -metadata "title=My Film"') == ['-tune', 'film', '-metadata', 'title=My Film']
+    with pytest.raises(ValueError):
+        parse_custom_options('-i other.mkv')
+    with pytest.raises(ValueError):
+        parse_custom_options('-metadata "unterminated')
+
+
+@pytest.mark.parametrize('windows', [False, True])
+def test_parse_custom_options_strips_quotes_on_every_platform(windows):
+    from conversion_engine import parse_custom_options
+    text = '-metadata "title=My Film" -metadata comment=\'a b\''
+    assert parse_custom_options(text, windows=windows) == ['-metadata', 'title=My Film', '-metadata', 'comment=a b']
+    if windows:
+        # backslashes in Windows paths are not escapes
+        assert parse_custom_options('-attach "C:\\subs\\my film.srt"', windows=True) == \
+            ['-attach', 'C:\\subs\\my film.srt']
+
+
+def test_hw_encoder_falls_back_to_software(monkeypatch):
+    monkeypatch.setattr(conversion_engine, 'available_encoders', lambda: frozenset({'libx264', 'h264_nvenc'}))
+    monkeypatch.setattr(conversion_engine, 'encoder_works', lambda name: False)
+    assert conversion_engine.select_video_encoder('h264', hw_accel=True) == ('libx264', False)
+    monkeypatch.setattr(conversion_engine, 'encoder_works', lambda name: name == 'h264_nvenc')
+    assert conversion_engine.select_video_encoder('h264', hw_accel=True) == ('h264_nvenc', True)
+    assert conversion_engine.select_video_encoder('h264') == ('libx264', False)
+
+
+def _sleeping_ffmpeg(output_file, started):
+    """run_ffmpeg stand-in: a real child process that writes part of the output and sleeps"""
+    import subprocess
+
+    def fake_run_ffmpeg(cmd, duration=None, on_progress=None, on_start=None, **kwargs):
+        with open(output_file, 'wb') as f:
+            f.write(b'partial')
+        proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+        on_start(proc)
+        started.set()
+        return proc.wait(), 'terminated'
+    return fake_run_ffmpeg
+
+
+def _state(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        return f.read().rsplit(')', 1)[1].split()[0]
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='reads process state from /proc')
+def test_pool_pauses_resumes_and_cancels_running_ffmpeg(tmp_path, monkeypatch):
+    import time
+    output = str(tmp_path / 'out.mp4')
+    started = threading.Event()
+    monkeypatch.setattr(conversion_engine, 'probe_duration', lambda path: 10.0)
+    monkeypatch.setattr(conversion_engine, 'run_ffmpeg', _sleeping_ffmpeg(output, started))
+
+    job = ConversionJob('in.mkv', output, ['ffmpeg'])
+    pool = ConversionPool(max_workers=1)
+    runner = threading.Thread(target=pool.run, args=([job],))
+    runner.start()
+    assert started.wait(5)
+    pid = job.processes[0].pid
+
+    pool.pause()
+    deadline = time.time() + 5
+    while _state(pid) != 'T' and time.time() < deadline:
+        time.sleep(0.01)
+    assert _state(pid) == 'T' and job.paused
+    pool.resume()
+    assert not job.paused and not pool.paused
+
+    t0 = time.monotonic()
+    pool.cancel()
+    assert time.monotonic() - t0 < 0.5  # never waits for the process
+    runner.join(5)
+    assert not runner.is_alive()
+    assert job.ok is False and job.error == 'Cancelled'
+    assert not os.path.exists(output)  # partial output removed
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='SIGTERM handling is POSIX only')
+def test_stop_process_kills_after_grace():
+    import subprocess
+    import time
+    code = 'import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print(1, flush=True); time.sleep(60)'
+    proc = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE)
+    proc.stdout.readline()  # handler installed
+    t0 = time.monotonic()
+    conversion_engine.stop_process(proc, grace=0.2)
+    assert time.monotonic() - t0 < 0.2
+    assert proc.wait(5) != 0
+
+
+def test_parallel_step_runs_side_by_side_and_weights_progress(monkeypatch):
+    from conversion_engine import FFmpegProgress, ParallelStep
+    barrier = threading.Barrier(3, timeout=5)
+    reported = []
+
+    def fake_run_ffmpeg(cmd, duration=None, on_progress=None, on_start=None, **kwargs):
+        barrier.wait()  # all three commands are running at once
+        progress = FFmpegProgress(duration)
+        progress.finished = True
+        on_progress(progress)
+        return 0, ''
+
+    monkeypatch.setattr(conversion_engine, 'probe_duration', lambda path: 60.0)
+    monkeypatch.setattr(conversion_engine, 'run_ffmpeg', fake_run_ffmpeg)
+    step = ParallelStep([['ffmpeg', 'a'], ['ffmpeg', 'b'], ['ffmpeg', 'c']], [30.0, 30.0, 60.0])
+    job = ConversionJob('in.mkv', 'out.mp4', ['ffmpeg', 'concat'], passes=[step], weights=[1])
+    pool = ConversionPool(on_progress=lambda j, agg: reported.append(j.percent))
+    pool.run([job])
+    assert job.ok, job.error
+    assert reported[1:4] == sorted(reported[1:4]) and 100.0 in reported
+
+
+def test_parallel_step_failure_stops_the_other_commands(monkeypatch):
+    from conversion_engine import ParallelStep
+    ran = []
+
+    def fake_run_ffmpeg(cmd, duration=None, on_progress=None, on_start=None, **kwargs):
+        ran.append(cmd[-1])
+        if cmd[-1] == 'bad':
+            return 1, 'Invalid data found'
+        return 0, ''
+
+    monkeypatch.setattr(conversion_engine, 'probe_duration', lambda path: None)
+    monkeypatch.setattr(conversion_engine, 'run_ffmpeg', fake_run_ffmpeg)
+    step = ParallelStep([['ffmpeg', 'bad'], ['ffmpeg', 'ok']], max_workers=1)
+    job = ConversionJob('in.mkv', 'out.mp4', ['ffmpeg', 'concat'], passes=[step, ['ffmpeg', 'concat']])
+    ConversionPool().run([job])
+    assert job.ok is False and job.error == 'Invalid data found'
+    assert ran == ['bad']  # neither the queued segment nor the next step started
+
+
+def test_parallel_step_reports_the_failing_command_not_the_killed_ones(monkeypatch):
+    from conversion_engine import ParallelStep
+    started = threading.Barrier(3, timeout=5)
+
+    class FakeProc:
+        pid = os.getpid()  # SIGCONT from stop_process is harmless here
+
+        def __init__(self):
+            self.stopped = threading.Event()
+        def poll(self):
+            return 0 if self.stopped.is_set() else None
+        def terminate(self):
+            self.stopped.set()
+        kill = terminate
+
+    def fake_run_ffmpeg(cmd, duration=None, on_progress=None, on_start=None, **kwargs):
+        proc = FakeProc()
+        on_start(proc)
+        started.wait()
+        if cmd[-1] == 'bad':
+            return 1, 'Invalid data found'
+        assert proc.stopped.wait(5)
+        return 255, 'Exiting normally, received signal 15.'
+
+    monkeypatch.setattr(conversion_engine, 'probe_duration', lambda path: None)
+    monkeypatch.setattr(conversion_engine, 'run_ffmpeg', fake_run_ffmpeg)
+    step = ParallelStep([['ffmpeg', 'a'], ['ffmpeg', 'b'], ['ffmpeg', 'bad']])
+    job = ConversionJob('in.mkv', 'out.mp4', ['ffmpeg', 'concat'], passes=[step, ['ffmpeg', 'concat']])
+    ConversionPool().run([job])
+    assert job.ok is False and job.error == 'Invalid data found'
+
+
+def test_temp_dir_is_removed_when_the_job_is_skipped_or_prepare_fails(tmp_path):
+    skipped = ConversionJob('a.mkv', 'a.mp4', ['ffmpeg'], temp_dir=str(tmp_path / 'skipped'))
+    os.mkdir(skipped.temp_dir)
+    pool = ConversionPool()
+    pool.cancel()
+    pool.run([skipped])
+    assert not (tmp_path / 'skipped').exists()
+
+    def prepare(job):
+        job.temp_dir = str(tmp_path / 'prepared')
+        os.mkdir(job.temp_dir)
+        raise ValueError('bad option')
+
+    failed = ConversionJob('b.mkv', 'b.mp4', prepare=prepare)
+    ConversionPool().run([failed])
+    assert failed.ok is False and failed.error == 'bad option'
+    assert not (tmp_path / 'prepared').exists()
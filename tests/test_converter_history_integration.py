@@ -19,6 +19,7 @@ import main_V3
 from main_V3 import YouTubeDownloader, HISTORY_DB
 from converter_tool import BasicConverterDialog, AdvancedConverterDialog
 from history_dialog import HistoryDialog
+from history_db import init_history_db, PAGE_SIZE
 
 
 def test_basic_converter_ffmpeg_missing(qtbot, tmp_path, monkeypatch):
@@ -77,6 +78,19 @@ def test_advanced_converter_flow(qtbot, tmp_path, monkeypatch):
 
     monkeypatch.setattr(subprocess, 'run', fake_run)
 
+    # conversions stream -progress output through Popen
+    class FakePopen:
+        def __init__(self, cmd, *a, **k):
+            Path(cmd[-1]).write_text('mp4')
+            self.stdout = iter(['out_time_us=500000\n', 'progress=continue\n', 'progress=end\n'])
+            self.stderr = iter([])
+            self.returncode = 0
+
+        def wait(self, timeout=None):
+            return self.returncode
+
+    monkeypatch.setattr(subprocess, 'Popen', FakePopen)
+
     # start conversion and wait for completion
     dlg._start_conversion()
 
@@ -106,11 +120,41 @@ def test_history_dialog_populates_table(tmp_path, qtbot):
     qtbot.addWidget(dlg)
 
     # table should have 2 rows
-    assert dlg.history_table.rowCount() == 2
+    assert dlg.history_table.model().rowCount() == 2
     # labels updated
     assert 'Total Downloads' in dlg.total_downloads_label.text()
 
 
+def test_history_dialog_pages_and_debounces_filters(tmp_path, qtbot):
+    dbp = str(tmp_path / 'h.db')
+    init_history_db(dbp)
+    conn = sqlite3.connect(dbp)
+    conn.executemany('INSERT INTO downloads (url, title, format, status, download_ts) VALUES (?, ?, ?, ?, ?)',
+                     [(f'http://{i}', f'Title {i}', 'Video', 'Completed', 1_700_000_000 + i)
+                      for i in range(PAGE_SIZE + 50)])
+    conn.commit()
+    conn.close()
+
+    dlg = HistoryDialog(dbp)
+    qtbot.addWidget(dlg)
+    model = dlg.history_table.model()
+    assert model.rowCount() == PAGE_SIZE
+    assert 'Total Downloads: 250' in dlg.total_downloads_label.text()
+    # Every match is counted, not only the loaded page
+    assert dlg.found_label.text() == 'Found 250 downloads'
+    assert dlg.status_label.text() == f'Showing {PAGE_SIZE} download(s)'
+    # Scrolling to the end loads the next page
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert model.rowCount() == PAGE_SIZE + 50 and not model.canFetchMore()
+
+    # Typing only queries once the input settles
+    dlg.title_filter.setText('Title 24')
+    assert model.rowCount() == PAGE_SIZE + 50
+    qtbot.waitUntil(lambda: model.rowCount() == 11, timeout=2000)
+    assert dlg.found_label.text() == 'Found 11 downloads'
+
+
 def test_download_selected_integration(qtbot, tmp_path, monkeypatch):
     # prepare temp history DB
     dbp = str(tmp_path / 'hist.db')
@@ -127,6 +171,7 @@ def test_download_selected_integration(qtbot, tmp_path, monkeypatch):
     win.url_entry.setText('http://example.com/watch?v=vid123')
     win.q_combo.addItem('best')
     win.q_combo.setCurrentIndex(0)
+    monkeypatch.setattr(win, 'show_message', lambda *a, **k: None)
 
     # Monkeypatch YoutubeDL to a fake context manager
     class FakeYDL:
@@ -183,3 +228,174 @@ def test_download_selected_integration(qtbot, tmp_path, monkeypatch):
     rows = cur.fetchall()
     conn.close()
     assert rows and rows[0][0].startswith('http')
+
+
+def test_download_selected_uses_entry_urls(qtbot, tmp_path, monkeypatch):
+    dbp = str(tmp_path / 'hist.db')
+    monkeypatch.setattr(main_V3, 'HISTORY_DB', dbp)
+    monkeypatch.setattr(main_V3, 'DOWNLOAD_DIR', str(tmp_path / 'dl'))
+
+    win = YouTubeDownloader()
+    qtbot.addWidget(win)
+    win.playlist_entries = [
+        {'title': 'One', 'id': 'a1', 'url': 'https://www.youtube.com/watch?v=a1'},
+        {'title': 'Two', 'id': 'b2', 'url': 'https://www.youtube.com/watch?v=b2'},
+    ]
+    win.video_listbox.addItems(['001. One', '002. Two'])
+    win.url_entry.setText('https://www.youtube.com/playlist?list=PL1')
+    win.q_combo.addItem('best')
+    # the completion summary would otherwise open a modal box and block waitUntil
+    monkeypatch.setattr(win, 'show_message', lambda *a, **k: None)
+
+    calls = []
+
+    class FakeYDL:
+        def __init__(self, opts=None):
+            self.opts = opts or {}
+        def __enter__(self):
+            return self
+        def __exit__(self, exc_type, exc, tb):
+            return False
+        def download(self, urls):
+            calls.append((list(urls), self.opts.get('playlist_items')))
+
+    monkeypatch.setattr(main_V3, 'YoutubeDL', FakeYDL)
+    monkeypatch.setattr(win, 'resolve_final_url', lambda u: u)
+
+    win.video_listbox.selectAll()
+    win.download_selected()
+    qtbot.waitUntil(lambda: win.success_count + win.failure_count == 2, timeout=5000)
+
+    # each item is fetched by its own URL; the playlist page is never re-enumerated
+    assert sorted(calls) == [
+        (['https://www.youtube.com/watch?v=a1'], None),
+        (['https://www.youtube.com/watch?v=b2'], None),
+    ]
+
+
+def test_download_selected_reads_caption_language_on_the_gui_thread(qtbot, tmp_path, monkeypatch):
+    import threading
+
+    monkeypatch.setattr(main_V3, 'HISTORY_DB', str(tmp_path / 'hist.db'))
+    monkeypatch.setattr(main_V3, 'DOWNLOAD_DIR', str(tmp_path / 'dl'))
+    win = YouTubeDownloader()
+    qtbot.addWidget(win)
+    win.playlist_entries = [{'title': 'One', 'id': 'a1', 'url': 'https://www.youtube.com/watch?v=a1'}]
+    win.video_listbox.addItem('001. One')
+    win.video_listbox.selectAll()
+    win.url_entry.setText('https://www.youtube.com/watch?v=a1')
+    win.radio_captions.setChecked(True)
+    win.captions_lang_combo.setCurrentText('ar')
+    monkeypatch.setattr(win, 'show_message', lambda *a, **k: None)
+    monkeypatch.setattr(win, 'resolve_final_url', lambda u: u)
+
+    reads, langs = [], []
+    combo_text = win.captions_lang_combo.currentText
+    monkeypatch.setattr(win.captions_lang_combo, 'currentText',
+                        lambda: reads.append(threading.current_thread()) or combo_text())
+
+    class FakeYDL:
+        def __init__(self, opts=None):
+            self.opts = opts or {}
+        def __enter__(self):
+            return self
+        def __exit__(self, exc_type, exc, tb):
+            return False
+        def download(self, urls):
+            langs.append(self.opts['subtitleslangs'])
+
+    monkeypatch.setattr(main_V3, 'YoutubeDL', FakeYDL)
+    win.download_selected()
+    qtbot.waitUntil(lambda: bool(langs), timeout=5000)
+
+    assert langs == [['ar']]
+    assert reads and all(t is threading.main_thread() for t in reads)
+
+
+def test_advanced_two_pass_and_threads_in_commands(tmp_path, monkeypatch):
+    import converter_tool
+    from converter_tool import AdvancedConverterWorker
+
+    monkeypatch.setattr(converter_tool, 'available_hwaccels', lambda: ())
+    monkeypatch.setattr(converter_tool, 'select_video_encoder', lambda codec, hw=False: ('libx264', False))
+    settings = {
+        'output_format': 'mp4', 'output_dir': str(tmp_path), 'video_codec': 'h264',
+        'video_bitrate': 2000, 'crf': 23, 'quality_preset': 'auto', 'audio_codec': 'aac',
+        'audio_bitrate': 128, 'two_pass': True, 'hw_accel': True,
+        'custom_options': '-tune film',
+    }
+    worker = AdvancedConverterWorker([str(tmp_path / 'in.mkv')], settings)
+    job = worker._build_job(str(tmp_path / 'in.mkv'), str(tmp_path / 'in.mp4'), threads=2)
+    first, second = job.passes
+    try:
+        assert os.path.isdir(job.temp_dir)
+        assert first[first.index('-pass') + 1] == '1' and '-an' in first and first[-1] == os.devnull
+        assert second[second.index('-pass') + 1] == '2' and second[-1] == str(tmp_path / 'in.mp4')
+        assert first[first.index('-passlogfile') + 1].startswith(job.temp_dir)
+        # CPU-only box: software encoder with a preset tuned to 2 threads per job, no CRF in two-pass
+        assert second[second.index('-threads') + 1] == '2'
+        assert second[second.index('-preset') + 1] == 'veryfast'
+        assert '-crf' not in second
+        assert second[-3:-1] == ['-tune', 'film']
+    finally:
+        shutil.rmtree(job.temp_dir, ignore_errors=True)
+
+
+def test_advanced_two_pass_removes_passlog_dir_when_options_are_rejected(tmp_path, monkeypatch):
+    import converter_tool
+    from converter_tool import AdvancedConverterWorker
+
+    monkeypatch.setattr(converter_tool, 'available_hwaccels', lambda: ())
+    monkeypatch.setattr(converter_tool, 'select_video_encoder', lambda codec, hw=False: ('libx264', False))
+    monkeypatch.setattr(converter_tool.tempfile, 'tempdir', str(tmp_path))
+    settings = {
+        'output_format': 'mp4', 'output_dir': str(tmp_path), 'video_codec': 'h264',
+        'video_bitrate': 2000, 'quality_preset': 'auto', 'audio_codec': 'aac',
+        'audio_bitrate': 128, 'two_pass': True, 'custom_options': '-i other.mkv',
+    }
+    worker = AdvancedConverterWorker([str(tmp_path / 'in.mkv')], settings)
+    with pytest.raises(ValueError):
+        worker._build_job(str(tmp_path / 'in.mkv'), str(tmp_path / 'in.mp4'), threads=2)
+    assert not list(tmp_path.glob('ffpass_*'))
+
+
+def test_advanced_chunked_mode_encodes_segments_and_audio_in_parallel(tmp_path, monkeypatch):
+    import converter_tool
+    from converter_tool import AdvancedConverterWorker
+    from conversion_engine import ParallelStep
+
+    monkeypatch.setattr(converter_tool, 'available_hwaccels', lambda: ())
+    monkeypatch.setattr(converter_tool, 'select_video_encoder', lambda codec, hw=False: ('libx265', False))
+    monkeypatch.setattr(converter_tool, 'probe_duration', lambda path: 3 * 3600.0)
+    monkeypatch.setattr(converter_tool, 'keyframe_times', lambda path: [i * 2.0 for i in range(5400)])
+    monkeypatch.setattr(converter_tool, 'probe', lambda path: {'streams': [
+        {'codec_type': 'video', 'codec_name': 'h264'}, {'codec_type': 'audio', 'codec_name': 'opus'}]})
+    settings = {
+        'output_format': 'mp4', 'output_dir': str(tmp_path), 'video_codec': 'h265', 'crf': 24,
+        'quality_preset': 'auto', 'audio_codec': 'aac', 'audio_bitrate': 160, 'chunked': True,
+    }
+    worker = AdvancedConverterWorker([str(tmp_path / 'in.mkv')], settings)
+    job = worker._build_job(str(tmp_path / 'in.mkv'), str(tmp_path / 'in.mp4'), threads=16)
+    try:
+        step, concat = job.passes
+        assert isinstance(step, ParallelStep) and step.max_workers == 9
+        *segments, audio = step.commands
+        assert len(segments) == 16
+        assert segments[0][segments[0].index('-ss') + 1] == '0.000'
+        assert '-t' not in segments[-1]  # the last segment runs to the end
+        for cmd in segments:
+            assert '-an' in cmd and cmd[cmd.index('-map') + 1] == '0:v:0'
+            assert cmd[cmd.index('-threads') + 1] == '2'
+            assert cmd[cmd.index('-preset') + 1] == 'medium'  # picked for the whole job's 16 cores
+        assert '-vn' in audio and '-codec:v' not in audio and audio[-1].endswith('audio.mka')
+        assert sum(step.durations[:-1]) == 3 * 3600.0
+        assert concat[concat.index('-f') + 1] == 'concat' and concat[-3:] == ['-tag:v', 'hvc1', str(tmp_path / 'in.mp4')]
+        with open(concat[concat.index('-i') + 1]) as f:
+            assert len(f.read().splitlines()) == 16
+
+        # Short files are encoded in one piece
+        monkeypatch.setattr(converter_tool, 'probe_duration', lambda path: 120.0)
+        single = worker._build_job(str(tmp_path / 'in.mkv'), str(tmp_path / 'in.mp4'), threads=16)
+        assert len(single.passes) == 1 and single.passes[0][-1] == str(tmp_path / 'in.mp4')
+    finally:
+        shutil.rmtree(job.temp_dir, ignore_errors=True)
@@ -0,0 +1,130 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import sqlite3
+
+import pytest
+
+from download_archive import DownloadArchive
+
+
+@pytest.mark.parametrize('use_db', [False, True])
+def test_archive_lookup_is_exact_and_follows_appends(tmp_path, use_db):
+    path = tmp_path / 'downloaded_videos.txt'
+    path.write_text('youtube abcDEF123\nvimeo 42\n', encoding='utf-8')
+    db = str(tmp_path / 'hist.db') if use_db else None
+
+    archive = DownloadArchive(str(path), db_path=db)
+    assert archive.contains('abcDEF123')
+    assert archive.contains('abcDEF123', 'Youtube')
+    assert not archive.contains('abcDEF123', 'vimeo')
+    # substring of a known id must not match
+    assert not archive.contains('DEF')
+    assert not archive.contains('4')
+
+    # yt-dlp appends to the file behind our back
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('youtube zzz999\n')
+    os.utime(path, ns=(1, 1))
+    assert archive.contains('zzz999', 'youtube')
+
+    archive.add('Youtube', 'new1')
+    assert archive.contains('new1', 'youtube')
+    assert 'youtube new1' in path.read_text(encoding='utf-8')
+
+
+@pytest.mark.parametrize('use_db', [False, True])
+def test_archive_reloads_after_rewrite(tmp_path, use_db):
+    path = tmp_path / 'downloaded_videos.txt'
+    path.write_text('youtube aaa\nyoutube bbb\n', encoding='utf-8')
+    db = str(tmp_path / 'hist.db') if use_db else None
+    archive = DownloadArchive(str(path), db_path=db)
+    assert archive.contains('aaa')
+
+    path.write_text('youtube ccc\n', encoding='utf-8')
+    os.utime(path, ns=(2, 2))
+    assert not archive.contains('aaa')
+    assert archive.contains('ccc')
+
+
+@pytest.mark.parametrize('use_db', [False, True])
+def test_archive_reloads_after_same_size_or_larger_rewrite(tmp_path, use_db):
+    path = tmp_path / 'downloaded_videos.txt'
+    path.write_text('youtube aaa\n', encoding='utf-8')
+    db = str(tmp_path / 'hist.db') if use_db else None
+    archive = DownloadArchive(str(path), db_path=db)
+    assert archive.contains('aaa')
+
+    # Same size, written in place: only the content tells it apart
+    with open(path, 'r+', encoding='utf-8') as f:
+        f.write('youtube bbb\n')
+    os.utime(path, ns=(3, 3))
+    assert not archive.contains('aaa')
+    assert archive.contains('bbb')
+
+    path.write_text('youtube ccc\nyoutube ddd\n', encoding='utf-8')
+    os.utime(path, ns=(4, 4))
+    assert not archive.contains('bbb')
+    assert archive.contains('ccc') and archive.contains('ddd')
+
+    path.unlink()
+    assert not archive.contains('ccc')
+
+
+def test_archive_db_rows_are_scoped_to_their_file(tmp_path):
+    db = str(tmp_path / 'hist.db')
+    first = tmp_path / 'a' / 'downloaded_videos.txt'
+    second = tmp_path / 'b' / 'downloaded_videos.txt'
+    first.parent.mkdir()
+    second.parent.mkdir()
+    first.write_text('youtube aaa\n', encoding='utf-8')
+    second.write_text('youtube bbb\n', encoding='utf-8')
+
+    one = DownloadArchive(str(first), db_path=db)
+    two = DownloadArchive(str(second), db_path=db)
+    assert one.contains('aaa') and not one.contains('bbb')
+    assert two.contains('bbb') and not two.contains('aaa', 'youtube')
+
+    # Rewriting one archive drops only its own rows
+    first.write_text('youtube ccc\n', encoding='utf-8')
+    os.utime(first, ns=(5, 5))
+    assert not one.contains('aaa') and one.contains('ccc')
+    assert two.contains('bbb')
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM download_archive WHERE video_id = 'aaa'").fetchone()[0] == 0
+
+
+def test_archive_db_resumes_where_the_last_instance_stopped(tmp_path, monkeypatch):
+    db = str(tmp_path / 'hist.db')
+    path = tmp_path / 'downloaded_videos.txt'
+    path.write_text('youtube aaa\n', encoding='utf-8')
+    assert DownloadArchive(str(path), db_path=db).contains('aaa')
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('youtube bbb\n')
+    stored = []
+    archive = DownloadArchive(str(path), db_path=db)
+    original = archive._store
+    monkeypatch.setattr(archive, '_store', lambda keys, reset, state: (
+        stored.append((list(keys), reset)), original(stored[-1][0], reset, state)))
+    assert archive.contains('aaa') and archive.contains('bbb')
+    assert stored == [([('youtube', 'bbb')], False)]
+
+
+def test_archive_db_replaces_the_unkeyed_table(tmp_path):
+    db = str(tmp_path / 'hist.db')
+    with sqlite3.connect(db) as conn:
+        conn.execute('CREATE TABLE download_archive (extractor TEXT NOT NULL, video_id TEXT NOT NULL, '
+                     'PRIMARY KEY (extractor, video_id)) WITHOUT ROWID')
+        conn.execute("INSERT INTO download_archive VALUES ('youtube', 'stale')")
+    path = tmp_path / 'downloaded_videos.txt'
+    path.write_text('youtube aaa\n', encoding='utf-8')
+
+    archive = DownloadArchive(str(path), db_path=db)
+    assert archive.contains('aaa')
+    assert not archive.contains('stale')
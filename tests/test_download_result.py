@@ -0,0 +1,36 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from download_result import DownloadResult
+
+
+def test_postprocessor_path_wins_over_downloaded_part(tmp_path):
+    final = tmp_path / 'clip.mkv'
+    final.write_bytes(b'x' * 42)
+
+    r = DownloadResult()
+    r.progress_hook({'status': 'downloading', 'filename': 'ignored'})
+    r.progress_hook({'status': 'finished', 'filename': str(tmp_path / 'clip.f137.mp4'), 'total_bytes': 10})
+    r.postprocessor_hook({'status': 'started', 'info_dict': {'filepath': 'ignored'}})
+    r.postprocessor_hook({'status': 'finished', 'info_dict': {'filepath': str(final), 'duration': 12.7}})
+
+    assert r.filepath == str(final)
+    assert r.duration == 12
+    assert r.file_size() == 42
+
+
+def test_update_from_info_uses_requested_downloads():
+    r = DownloadResult()
+    r.update_from_info({
+        'duration': 30,
+        'requested_downloads': [{'filepath': '/nope/a.mp4', 'filesize': 99}],
+    })
+    assert r.filepath == '/nope/a.mp4'
+    assert r.duration == 30
+    # file is missing, so the reported size is used
+    assert r.file_size() == 99
@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+import time
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from download_scheduler import DownloadScheduler, DownloadJob, host_of
+
+
+def _tracking_func(peak, per_host_peak, lock, active, per_host):
+    def _run(job):
+        with lock:
+            active[0] += 1
+            per_host[job.host] = per_host.get(job.host, 0) + 1
+            peak[0] = max(peak[0], active[0])
+            per_host_peak[job.host] = max(per_host_peak.get(job.host, 0), per_host[job.host])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+            per_host[job.host] -= 1
+        return job.key
+    return _run
+
+
+def test_host_of_strips_www():
+    assert host_of('https://www.YouTube.com/watch?v=x') == 'youtube.com'
+    assert host_of('not a url') == ''
+
+
+def test_scheduler_runs_jobs_in_parallel_with_host_cap():
+    jobs = [DownloadJob(i, 'https://a.example/v/%d' % i) for i in range(6)]
+    jobs += [DownloadJob(10 + i, 'https://b.example/v/%d' % i) for i in range(2)]
+    peak, per_host_peak, active, per_host = [0], {}, [0], {}
+    lock = threading.Lock()
+
+    sched = DownloadScheduler(max_workers=4, per_host_limit=2)
+    done = sched.run(jobs, _tracking_func(peak, per_host_peak, lock, active, per_host))
+
+    assert [j.result for j in done] == [j.key for j in jobs]
+    assert 1 < peak[0] <= 4
+    assert per_host_peak['a.example'] <= 2
+    assert per_host_peak['b.example'] <= 2
+
+
+def test_scheduler_aggregates_progress_and_records_errors():
+    seen = []
+    sched = DownloadScheduler(max_workers=2, on_progress=seen.append)
+
+    def _run(job):
+        sched.report(job, 50)
+        if job.key == 1:
+            raise RuntimeError('boom')
+
+    jobs = sched.run([DownloadJob(0, 'https://x'), DownloadJob(1, 'https://x')], _run)
+
+    assert isinstance(jobs[1].error, RuntimeError)
+    assert jobs[0].error is None
+    assert seen[-1] == 100
+    assert sched.aggregate_percent() == 100
+
+
+def test_bandwidth_limit_caps_concurrent_jobs_together():
+    limit = 300_000
+    sched = DownloadScheduler(max_workers=3, bandwidth_limit=limit)
+    chunk, chunks = 10_000, 10
+    barrier = threading.Barrier(3)
+
+    def _run(job):
+        hook = sched.bandwidth_hook()
+        barrier.wait(timeout=2)
+        for i in range(1, chunks + 1):
+            hook({'status': 'downloading', 'filename': f'{job.key}.mp4', 'downloaded_bytes': i * chunk})
+
+    start = time.monotonic()
+    jobs = sched.run([DownloadJob(i, f'https://host{i}/v') for i in range(3)], _run)
+    elapsed = time.monotonic() - start
+
+    assert all(job.error is None for job in jobs)
+    # 300 kB shared by three jobs at 300 kB/s must take about a second, not a third of one
+    assert 3 * chunk * chunks / elapsed <= limit * 1.05
+
+
+def test_bandwidth_hook_counts_each_file_once_and_is_free_when_unlimited(monkeypatch):
+    sched = DownloadScheduler(bandwidth_limit=1000)
+    consumed = []
+    monkeypatch.setattr(sched._limiter, 'consume', consumed.append)
+    hook = sched.bandwidth_hook()
+    hook({'status': 'downloading', 'filename': 'v.mp4', 'downloaded_bytes': 400})
+    hook({'status': 'downloading', 'filename': 'v.mp4', 'downloaded_bytes': 700})
+    hook({'status': 'finished', 'filename': 'v.mp4'})
+    # The audio stream starts counting from zero again
+    hook({'status': 'downloading', 'filename': 'a.m4a', 'downloaded_bytes': 100})
+    assert consumed == [400, 300, 100]
+
+    DownloadScheduler().bandwidth_hook()({'status': 'downloading', 'filename': 'v', 'downloaded_bytes': 10 ** 9})
@@ -0,0 +1,61 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import folder_scanner
+from folder_scanner import FolderScanner, MEDIA_SUFFIXES
+
+
+def _tree(root):
+    for rel in ['a.MKV', 'notes.txt', 'one/b.mp4', 'one/deep/c.webm', 'two/d.avi', 'two/e.mp3']:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x')
+    return str(root)
+
+
+def _count_scandir(monkeypatch):
+    calls = []
+    real = os.scandir
+
+    def counting(path):
+        calls.append(path)
+        return real(path)
+
+    monkeypatch.setattr(folder_scanner.os, 'scandir', counting)
+    return calls
+
+
+def test_scan_matches_suffixes_and_streams_chunks(tmp_path):
+    root = _tree(tmp_path / 'lib')
+    chunks = []
+    files = FolderScanner().scan(root, on_chunk=chunks.append, chunk_size=2)
+    expected = sorted(os.path.join(root, p) for p in ['a.MKV', 'one/b.mp4', 'one/deep/c.webm', 'two/d.avi'])
+    assert files == expected
+    assert sorted(p for c in chunks for p in c) == expected
+    assert all(len(c) <= 3 for c in chunks)
+
+    assert os.path.join(root, 'two', 'e.mp3') in FolderScanner().scan(root, suffixes=MEDIA_SUFFIXES)
+
+
+def test_rescan_only_lists_changed_directories(tmp_path, monkeypatch):
+    root = _tree(tmp_path / 'lib')
+    snapshot = str(tmp_path / 'snapshot.json')
+    first = FolderScanner(snapshot).scan(root)
+
+    calls = _count_scandir(monkeypatch)
+    # A fresh scanner (e.g. after a restart) reuses the persisted listings
+    assert FolderScanner(snapshot).scan(root) == first
+    assert calls == []
+
+    deep = tmp_path / 'lib' / 'one' / 'deep'
+    (deep / 'f.mkv').write_bytes(b'x')
+    st = os.stat(deep)
+    os.utime(deep, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    files = FolderScanner(snapshot).scan(root)
+    assert str(deep / 'f.mkv') in files
+    assert calls == [str(deep)]
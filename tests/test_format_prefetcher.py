@@ -0,0 +1,65 @@
+import os
+import sys
+import threading
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from format_prefetcher import FormatPrefetcher, PRIORITY_SELECTED, common_heights
+from info_cache import InfoCache
+
+
+def _info(*heights):
+    return {'formats': [{'vcodec': 'avc1', 'height': h} for h in heights] + [{'vcodec': 'none', 'height': None}]}
+
+
+def test_common_heights_intersects_selection():
+    assert common_heights([_info(1080, 720, 360), _info(720, 480, 360)]) == [720, 360]
+    assert common_heights([]) == []
+
+
+def test_selection_jumps_the_queue_and_is_cached():
+    started, gate = threading.Event(), threading.Event()
+    order = []
+
+    def fetch(payload):
+        if payload == 'first':
+            started.set()
+            gate.wait(5)
+        order.append(payload)
+        return _info(720)
+
+    cache = InfoCache()
+    pf = FormatPrefetcher(fetch, cache, max_workers=1)
+    pf.request('k0', 'first')  # occupies the only worker
+    assert started.wait(5)
+    for i in range(1, 4):
+        pf.request(f'k{i}', f'visible{i}')
+    pf.request('k3', 'visible3', PRIORITY_SELECTED)
+    gate.set()
+
+    assert pf.fetch_now('k3', 'visible3') == _info(720)
+    assert order[:2] == ['first', 'visible3']
+    pf.fetch_now('k2', 'visible2')
+    calls = len(order)
+    # cached keys are neither fetched nor queued again
+    pf.request('k2', 'visible2')
+    assert pf.fetch_now('k2', 'visible2') == _info(720)
+    assert len(order) == calls
+    pf.close()
+
+
+def test_fetch_now_raises_fetch_errors():
+    def fetch(payload):
+        raise RuntimeError('boom')
+
+    pf = FormatPrefetcher(fetch, InfoCache())
+    try:
+        pf.fetch_now('k', 'p')
+    except RuntimeError as e:
+        assert 'boom' in str(e)
+    else:
+        raise AssertionError('expected RuntimeError')
+    pf.close()
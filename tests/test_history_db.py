@@ -0,0 +1,191 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from history_db import (SCHEMA_VERSION, date_to_ts, fts_query, has_full_text, history_page, history_rows,
+                        history_search, history_where, init_history_db, log_download, migrate, page_key)
+
+LEGACY_SCHEMA = '''CREATE TABLE downloads (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT, title TEXT, format TEXT,
+    quality TEXT, status TEXT, download_date TEXT, file_size INTEGER, duration INTEGER, platform TEXT,
+    file_path TEXT)'''
+
+
+def _legacy_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute(LEGACY_SCHEMA)
+    conn.executemany('INSERT INTO downloads (url, title, status, download_date) VALUES (?, ?, ?, ?)', [
+        ('https://example.com/old', 'Old', 'Completed', '2024-01-02 03:04:05'),
+        ('https://example.com/new', 'New', 'Failed', '2025-06-07 08:09:10'),
+        ('https://example.com/odd', 'Odd', 'Completed', 'yesterday'),
+    ])
+    conn.commit()
+    conn.close()
+
+
+def test_existing_database_is_migrated_in_place(tmp_path):
+    db = str(tmp_path / 'legacy.db')
+    _legacy_db(db)
+    init_history_db(db)
+
+    conn = sqlite3.connect(db)
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+    stamps = dict(conn.execute('SELECT title, download_ts FROM downloads'))
+    assert stamps == {'Old': date_to_ts('2024-01-02 03:04:05'), 'New': date_to_ts('2025-06-07 08:09:10'),
+                      'Odd': None}
+    indexes = {row[1] for row in conn.execute('PRAGMA index_list(downloads)')}
+    assert {f'idx_downloads_{c}' for c in ('download_ts', 'status', 'format', 'platform', 'url')} <= indexes
+    # Newest-first listing walks the index instead of sorting the table
+    plan = ' '.join(row[-1] for row in conn.execute(
+        'EXPLAIN QUERY PLAN SELECT * FROM downloads ORDER BY download_ts DESC, id DESC LIMIT 10'))
+    assert 'idx_downloads_download_ts' in plan and 'TEMP B-TREE' not in plan
+    # Up-to-date databases are left alone
+    assert migrate(conn) == SCHEMA_VERSION
+    conn.close()
+
+    log_download(db, {'url': 'https://example.com/latest', 'title': 'Latest', 'status': 'Completed',
+                      'download_date': '2026-01-01 00:00:00'})
+    assert [r['title'] for r in history_rows(db)] == ['Latest', 'New', 'Old', 'Odd']
+
+
+def test_new_database_gets_current_schema(tmp_db):
+    init_history_db(tmp_db)
+    conn = sqlite3.connect(tmp_db)
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(downloads)')]
+    conn.close()
+    assert 'download_ts' in columns and 'download_date' in columns
+
+
+def _seeded_db(path, count):
+    init_history_db(path)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        'INSERT INTO downloads (url, title, format, status, download_ts) VALUES (?, ?, ?, ?, ?)',
+        [(f'https://example.com/{i}', f'Item {i}', 'Audio' if i % 2 else 'Video',
+          'Failed' if i % 3 == 0 else 'Completed', 1_700_000_000 + i // 2) for i in range(count)])
+    # Undated record, listed after all dated ones
+    conn.execute("INSERT INTO downloads (url, title, status) VALUES ('https://example.com/x', 'Undated', 'Failed')")
+    conn.commit()
+    conn.close()
+
+
+def test_keyset_pages_cover_every_record_once(tmp_db):
+    _seeded_db(tmp_db, 25)
+    seen, key = [], None
+    while True:
+        rows = history_page(tmp_db, after=key, limit=7)
+        seen += [r['title'] for r in rows]
+        if len(rows) < 7:
+            break
+        key = page_key(rows[-1])
+    # Equal timestamps are ordered by id, so nothing is skipped or repeated
+    assert seen == [f'Item {i}' for i in range(24, -1, -1)] + ['Undated']
+
+    failed = history_page(tmp_db, {'status': 'Failed', 'format': 'Video'}, limit=100)
+    assert [r['title'] for r in failed] == ['Item 24', 'Item 18', 'Item 12', 'Item 6', 'Item 0']
+    dated = history_page(tmp_db, {'since': 1_700_000_010, 'until': 1_700_000_012}, limit=100)
+    assert [r['title'] for r in dated] == ['Item 23', 'Item 22', 'Item 21', 'Item 20']
+    assert [r['title'] for r in history_page(tmp_db, {'title': 'item 1'})][-1] == 'Item 1'
+
+
+def test_like_wildcards_in_filters_are_literal(tmp_db):
+    init_history_db(tmp_db)
+    for title in ('100% done', '100 done', 'a_b', 'axb'):
+        log_download(tmp_db, {'url': 'https://example.com', 'title': title, 'status': 'Completed',
+                              'download_date': '2026-01-01 00:00:00'})
+    conn = sqlite3.connect(tmp_db)
+    for text, expected in (('100%', ['100% done']), ('a_b', ['a_b'])):
+        where, params = history_where({'title': text}, fts=False)
+        assert [r[0] for r in conn.execute(f'SELECT title FROM downloads WHERE {where}', params)] == expected
+    conn.close()
+    # Without any word characters the full-text path falls back to LIKE as well
+    assert [r['title'] for r in history_page(tmp_db, {'title': '%'})] == ['100% done']
+
+
+def test_full_text_search_follows_the_table(tmp_db):
+    _legacy_db(tmp_db)
+    init_history_db(tmp_db)
+    # Existing records are indexed by the migration
+    assert [r['title'] for r in history_page(tmp_db, {'title': 'ol'})] == ['Old']
+    log_download(tmp_db, {'url': 'https://youtube.com/watch?v=abc', 'title': 'Learning Python decorators',
+                          'platform': 'youtube', 'status': 'Completed', 'download_date': '2026-01-01 00:00:00'})
+    log_download(tmp_db, {'url': 'https://vimeo.com/python', 'title': 'Cooking pasta',
+                          'platform': 'vimeo', 'status': 'Completed', 'download_date': '2026-01-02 00:00:00'})
+    assert [r['title'] for r in history_page(tmp_db, {'title': 'PYTH deco'})] == ['Learning Python decorators']
+    assert [r['title'] for r in history_page(tmp_db, {'url': 'vimeo'})] == ['Cooking pasta']
+    # A title hit ranks above a URL-only hit
+    assert [r['title'] for r in history_search(tmp_db, 'python')] == ['Learning Python decorators', 'Cooking pasta']
+
+    conn = sqlite3.connect(tmp_db)
+    conn.execute("UPDATE downloads SET title = 'Cooking risotto' WHERE title = 'Cooking pasta'")
+    conn.execute("DELETE FROM downloads WHERE title = 'Old'")
+    conn.commit()
+    conn.close()
+    assert [r['title'] for r in history_page(tmp_db, {'title': 'risotto'})] == ['Cooking risotto']
+    assert history_page(tmp_db, {'title': 'pasta'}) == []
+    assert history_page(tmp_db, {'title': 'old'}) == []
+
+
+def test_pages_sorted_by_other_columns_keep_nulls_in_place(tmp_db):
+    init_history_db(tmp_db)
+    conn = sqlite3.connect(tmp_db)
+    conn.executemany('INSERT INTO downloads (title, file_size) VALUES (?, ?)',
+                     [('a', 30), ('b', None), ('c', 10), ('d', 30), ('e', None), ('f', 20)])
+    conn.commit()
+    conn.close()
+
+    def walk(descending):
+        seen, key = [], None
+        while True:
+            rows = history_page(tmp_db, after=key, limit=2, sort='file_size', descending=descending)
+            seen += [r['title'] for r in rows]
+            if len(rows) < 2:
+                return seen
+            key = page_key(rows[-1], 'file_size')
+
+    assert walk(True) == ['d', 'a', 'f', 'c', 'e', 'b']
+    assert walk(False) == ['b', 'e', 'c', 'f', 'a', 'd']
+    with pytest.raises(ValueError):
+        history_page(tmp_db, sort='file_path')
+
+
+def test_full_text_index_skipped_by_the_migration_is_built_later(tmp_db):
+    # What migration 4 leaves behind on a SQLite built without FTS5
+    _legacy_db(tmp_db)
+    init_history_db(tmp_db)
+    conn = sqlite3.connect(tmp_db)
+    for trigger in ('insert', 'delete', 'update'):
+        conn.execute(f'DROP TRIGGER downloads_fts_{trigger}')
+    conn.execute('DROP TABLE downloads_fts')
+    conn.commit()
+    assert not has_full_text(conn)
+    conn.close()
+
+    init_history_db(tmp_db)
+    conn = sqlite3.connect(tmp_db)
+    assert has_full_text(conn)
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+    conn.close()
+    assert [r['title'] for r in history_page(tmp_db, {'title': 'ol'})] == ['Old']
+
+
+def test_fts_query_quotes_words():
+    assert fts_query('  ') is None
+    assert fts_query('AND "x" OR-y', ['title']) == '{title} : ("AND"* AND "x"* AND "OR"* AND "y"*)'
+
+
+def test_filtered_page_uses_an_index_without_sorting(tmp_db):
+    _seeded_db(tmp_db, 5)
+    where, params = history_where({'status': 'Failed'})
+    conn = sqlite3.connect(tmp_db)
+    plan = ' '.join(row[-1] for row in conn.execute(
+        f'EXPLAIN QUERY PLAN SELECT * FROM downloads WHERE {where} AND (download_ts, id) < (?, ?) '
+        'ORDER BY download_ts DESC, id DESC LIMIT 200', params + [1_700_000_002, 3]))
+    conn.close()
+    assert 'idx_downloads_status' in plan and 'TEMP B-TREE' not in plan
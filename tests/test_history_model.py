@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import sys
+
+from PyQt5 import QtCore
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from history_db import PAGE_SIZE, init_history_db
+from history_model import COLUMNS, HistoryTableModel, RecordRole
+
+
+def _model(db, count):
+    init_history_db(db)
+    conn = sqlite3.connect(db)
+    conn.executemany(
+        'INSERT INTO downloads (url, title, status, download_date, download_ts, file_size, duration) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(f'https://example.com/{i}', f'Item {i:04d}', 'Completed', f'2026-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}',
+          1_700_000_000 + i, i * 1024, i) for i in range(count)])
+    conn.commit()
+    conn.close()
+    model = HistoryTableModel(db)
+    model.set_filters({})
+    return model
+
+
+def test_rows_are_fetched_a_page_at_a_time(qapp, tmp_db):
+    model = _model(tmp_db, PAGE_SIZE * 2 + 10)
+    assert model.rowCount() == PAGE_SIZE and model.canFetchMore()
+    model.fetchMore()
+    model.fetchMore()
+    assert model.rowCount() == PAGE_SIZE * 2 + 10 and not model.canFetchMore()
+
+    # Newest first; cells are formatted from the raw row
+    first = [model.data(model.index(0, c)) for c in range(len(COLUMNS))]
+    assert first[0] == 'Item 0409' and first[5] == '409.0 KB' and first[6] == '06:49'
+    assert model.data(model.index(0, 0), RecordRole)['url'] == 'https://example.com/409'
+
+
+def test_sorting_queries_the_database(qapp, tmp_db):
+    model = _model(tmp_db, PAGE_SIZE + 5)
+    model.sort(0, QtCore.Qt.AscendingOrder)
+    assert model.rowCount() == PAGE_SIZE
+    assert [model.record(r)['title'] for r in range(3)] == ['Item 0000', 'Item 0001', 'Item 0002']
+    model.fetchMore()
+    assert model.record(model.rowCount() - 1)['title'] == f'Item {PAGE_SIZE + 4:04d}'
+
+    model.sort(5, QtCore.Qt.DescendingOrder)
+    model.set_filters({'title': 'item 000'})
+    assert [model.data(model.index(r, 5)) for r in range(model.rowCount())][:2] == ['9.0 KB', '8.0 KB']
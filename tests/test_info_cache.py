@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import info_cache
+from info_cache import InfoCache, entry_key
+
+
+def test_entry_key_matches_flat_and_full_info():
+    flat = {'id': 'abc', 'ie_key': 'Youtube', 'url': 'https://youtu.be/abc'}
+    full = {'id': 'abc', 'extractor_key': 'Youtube', 'formats': []}
+    assert entry_key(flat) == entry_key(full) == 'youtube:abc'
+    assert entry_key({'url': 'https://x/y'}) == 'https://x/y'
+
+
+def test_ttl_lru_and_persistence(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(info_cache.time, 'time', lambda: now[0])
+    path = str(tmp_path / 'cache.json')
+
+    cache = InfoCache(path, ttl=60, max_entries=2)
+    cache.put('a', {'id': 'a'})
+    cache.put('b', {'id': 'b'})
+    assert cache.get('a') == {'id': 'a'}  # 'a' is now most recently used
+    cache.put('c', {'id': 'c'})
+    assert cache.get('b') is None
+    assert 'a' in cache and 'c' in cache
+
+    cache.save()
+    reloaded = InfoCache(path, ttl=60, max_entries=2)
+    assert reloaded.get('c') == {'id': 'c'}
+
+    now[0] += 61
+    assert reloaded.get('c') is None
+    assert InfoCache(path, ttl=60).get('a') is None
+
+
+def test_cookies_never_reach_the_cache_file(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    secret = 'SID=session-secret'
+    info = {'id': 'a', 'title': 'A', 'cookies': secret, 'http_headers': {'Cookie': secret},
+            'formats': [{'format_id': '18', 'url': 'https://media/18', 'cookies': secret,
+                         'http_headers': {'Cookie': secret, 'User-Agent': 'client/1.0',
+                                          'Referer': 'https://site/watch'}}]}
+    cache = InfoCache(path)
+    cache.put('youtube:a', info)
+    # The in-memory copy is what the download uses, credentials and all
+    assert cache.get('youtube:a')['formats'][0]['http_headers']['Cookie'] == secret
+    cache.save()
+    with open(path, encoding='utf-8') as f:
+        assert 'session-secret' not in f.read()
+
+    # The format's own headers survive the round trip, minus Cookie
+    loaded = InfoCache(path).get('youtube:a')
+    assert loaded['formats'] == [{'format_id': '18', 'url': 'https://media/18',
+                                  'http_headers': {'User-Agent': 'client/1.0', 'Referer': 'https://site/watch'}}]
+    assert loaded['http_headers'] == {}
+    assert 'cookies' not in loaded
+
+    # A file written before scrubbing existed is cleaned on load and rewritten
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'youtube:a': [info_cache.time.time(), info]}, f)
+    old = InfoCache(path)
+    assert 'cookies' not in old.get('youtube:a')
+    old.save()
+    with open(path, encoding='utf-8') as f:
+        assert 'session-secret' not in f.read()
@@ -0,0 +1,77 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from media_library import MediaMetadataCache, describe, summarize
+
+INFO = {
+    'format': {'duration': '205.4', 'bit_rate': '4200000'},
+    'streams': [
+        {'codec_type': 'video', 'codec_name': 'mjpeg', 'disposition': {'attached_pic': 1}},
+        {'codec_type': 'video', 'codec_name': 'h264', 'width': 1920, 'height': 1080},
+        {'codec_type': 'audio', 'codec_name': 'aac'},
+    ],
+}
+
+
+def _files(tmp_path, count):
+    paths = []
+    for i in range(count):
+        p = tmp_path / f'clip{i}.mkv'
+        p.write_bytes(b'x' * (i + 1))
+        paths.append(str(p))
+    return paths
+
+
+def test_summary_and_label():
+    meta = summarize(INFO)
+    assert meta == {'duration': 205.4, 'video_codec': 'h264', 'audio_codec': 'aac',
+                    'width': 1920, 'height': 1080, 'bit_rate': 4200000}
+    assert describe(meta) == '3:25 | h264 1920x1080 | aac | 4.2 Mb/s'
+    assert describe(summarize(None)) == ''
+
+
+def test_rescan_only_probes_new_or_changed_files(tmp_db, tmp_path):
+    probed = []
+
+    def fake_probe(path):
+        probed.append(path)
+        if path.endswith('clip2.mkv'):
+            raise RuntimeError('Invalid data found when processing input')
+        return INFO
+
+    paths = _files(tmp_path, 3)
+    cache = MediaMetadataCache(tmp_db, max_workers=2, probe=fake_probe)
+    metas = cache.metadata(paths)
+    assert sorted(probed) == sorted(paths)
+    assert metas[paths[0]]['video_codec'] == 'h264'
+    assert describe(metas[paths[2]]) == ''
+
+    # A new instance reads the same table: nothing is probed again, unreadable files included
+    probed.clear()
+    seen = {}
+    metas = MediaMetadataCache(tmp_db, probe=fake_probe).metadata(paths, on_result=seen.__setitem__)
+    assert probed == []
+    assert metas == seen and metas[paths[1]]['height'] == 1080
+
+    # Changing a file's size (or mtime) invalidates its row only
+    with open(paths[1], 'ab') as f:
+        f.write(b'more')
+    new = [str(tmp_path / 'new.mp4')]
+    open(new[0], 'wb').close()
+    cache.metadata(paths + new)
+    assert sorted(probed) == sorted([paths[1], new[0]])
+
+
+def test_missing_ffprobe_is_not_recorded(tmp_db, tmp_path):
+    def no_ffprobe(path):
+        raise FileNotFoundError('ffprobe')
+
+    paths = _files(tmp_path, 2)
+    assert MediaMetadataCache(tmp_db, probe=no_ffprobe).metadata(paths) == {}
+    found, stale = MediaMetadataCache(tmp_db, probe=no_ffprobe).lookup(paths)
+    assert found == {} and len(stale) == 2
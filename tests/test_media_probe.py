@@ -0,0 +1,92 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import media_probe
+from media_probe import plan_mp4, copyable_streams, REMUX, AUDIO_ONLY, TRANSCODE
+
+
+def _info(*streams):
+    return {'format': {'duration': '12.5'},
+            'streams': [dict(s, index=i) for i, s in enumerate(streams)]}
+
+
+def test_compatible_mkv_is_a_pure_remux():
+    info = _info({'codec_type': 'video', 'codec_name': 'h264'},
+                 {'codec_type': 'audio', 'codec_name': 'aac'},
+                 {'codec_type': 'subtitle', 'codec_name': 'subrip'},
+                 {'codec_type': 'subtitle', 'codec_name': 'hdmv_pgs_subtitle'},
+                 {'codec_type': 'attachment', 'codec_name': 'ttf'})
+    plan = plan_mp4(info)
+    assert plan.mode == REMUX
+    assert plan.args == ['-map', '0:0', '-c:0', 'copy', '-map', '0:1', '-c:1', 'copy',
+                         '-map', '0:2', '-c:2', 'mov_text']
+
+
+def test_opus_audio_is_reencoded_alone_and_vp8_video_forces_transcode():
+    plan = plan_mp4(_info({'codec_type': 'video', 'codec_name': 'hevc'},
+                          {'codec_type': 'audio', 'codec_name': 'opus'}))
+    assert plan.mode == AUDIO_ONLY
+    assert plan.args[plan.args.index('-c:0') + 1] == 'copy' and '-tag:0' in plan.args
+    assert plan.args[plan.args.index('-c:1') + 1] == 'aac'
+
+    plan = plan_mp4(_info({'codec_type': 'video', 'codec_name': 'vp8'},
+                          {'codec_type': 'audio', 'codec_name': 'vorbis'}))
+    assert plan.mode == TRANSCODE
+
+
+def test_unprobed_file_falls_back_to_stream_copy():
+    assert plan_mp4(None).args == ['-c:v', 'copy', '-c:a', 'copy']
+
+
+def test_advanced_settings_copy_only_matching_streams():
+    info = _info({'codec_type': 'video', 'codec_name': 'h264', 'avg_frame_rate': '30/1', 'tags': {'BPS': '2000000'}},
+                 {'codec_type': 'audio', 'codec_name': 'opus', 'bit_rate': '96000'})
+    settings = {'output_format': 'mp4', 'video_codec': 'h264', 'video_bitrate': 2500,
+                'framerate': 30, 'audio_codec': 'aac', 'audio_bitrate': 128}
+    assert copyable_streams(info, settings) == (True, False)
+    assert copyable_streams(info, dict(settings, resolution='1280x720')) == (False, False)
+    assert copyable_streams(info, dict(settings, video_bitrate=1000)) == (False, False)
+
+
+def test_probe_runs_ffprobe_once_per_unchanged_file(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_ffprobe(path):
+        calls.append(path)
+        return _info({'codec_type': 'audio', 'codec_name': 'aac'})
+
+    monkeypatch.setattr(media_probe, 'run_ffprobe', fake_ffprobe)
+    f = tmp_path / 'a.mkv'
+    f.write_bytes(b'1')
+    assert media_probe.probe_duration(str(f)) == 12.5
+    media_probe.probe(str(f))
+    assert len(calls) == 1
+    f.write_bytes(b'12')  # size changed: probed again
+    media_probe.probe(str(f))
+    assert len(calls) == 2
+
+
+def test_probe_cache_keeps_one_entry_per_file_up_to_the_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_probe, 'run_ffprobe', lambda path: {'format': {}})
+    monkeypatch.setattr(media_probe, '_cache', media_probe.OrderedDict())
+    monkeypatch.setattr(media_probe, 'PROBE_CACHE_SIZE', 3)
+    files = []
+    for i in range(5):
+        f = tmp_path / f'{i}.mkv'
+        f.write_bytes(b'x')
+        files.append(f)
+        media_probe.probe(str(f))
+    files[0].write_bytes(b'xy')
+    media_probe.probe(str(files[0]))
+    assert list(media_probe._cache) == [str(files[3]), str(files[4]), str(files[0])]
+
+
+def test_mp4_command_overwrites_only_when_asked(monkeypatch):
+    monkeypatch.setattr(media_probe, 'probe', lambda path: None)
+    assert media_probe.mp4_command('a.mkv', 'a.mp4')[0][:2] == ['ffmpeg', '-y']
+    assert '-y' not in media_probe.mp4_command('a.mkv', 'a.mp4', overwrite=False)[0]
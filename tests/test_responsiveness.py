@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+from PyQt5.QtCore import QTimer
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import main_V3
+from main_V3 import YouTubeDownloader
+
+# Longest the Qt event loop may stall while network work is in flight
+LATENCY_BUDGET = 0.2
+NETWORK_DELAY = 0.6
+
+
+class _StallMonitor:
+    """Measure the largest gap between ticks of a fast QTimer"""
+
+    def __init__(self, interval_ms=10):
+        self.max_gap = 0.0
+        self._last = time.monotonic()
+        self.timer = QTimer()
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self._tick)
+        self.timer.start()
+
+    def _tick(self):
+        now = time.monotonic()
+        self.max_gap = max(self.max_gap, now - self._last)
+        self._last = now
+
+
+def test_fetch_and_load_formats_never_block_event_loop(qtbot, tmp_path, monkeypatch):
+    monkeypatch.setattr(main_V3, 'HISTORY_DB', str(tmp_path / 'hist.db'))
+    monkeypatch.setattr(main_V3, 'INFO_CACHE_FILE', str(tmp_path / 'info_cache.json'))
+    win = YouTubeDownloader()
+    qtbot.addWidget(win)
+
+    def slow_resolve(url):
+        time.sleep(NETWORK_DELAY)
+        return url
+
+    class SlowYDL:
+        def __init__(self, opts=None):
+            self.opts = opts or {}
+        def __enter__(self):
+            return self
+        def __exit__(self, exc_type, exc, tb):
+            return False
+        def extract_info(self, url, download=False):
+            time.sleep(NETWORK_DELAY)
+            entries = [{'id': 'a', 'ie_key': 'Generic', 'title': 'A', 'url': 'https://example.com/a'}]
+            if self.opts.get('extract_flat'):
+                return {'entries': entries}
+            return {'id': 'a', 'extractor_key': 'Generic', 'formats': [{'vcodec': 'avc1', 'height': 720}]}
+        def sanitize_info(self, info, remove_private_keys=False):
+            return info
+
+    monkeypatch.setattr(win._resolver, 'resolve', slow_resolve)
+    monkeypatch.setattr(main_V3, 'YoutubeDL', SlowYDL)
+    monkeypatch.setattr(win, 'show_message', lambda *a, **k: None)
+    win.settings['prefetch_formats'] = False
+    win.url_entry.setText('https://example.com/share/abc')
+
+    monitor = _StallMonitor()
+    qtbot.wait(50)
+
+    win.fetch_videos()
+    qtbot.waitUntil(lambda: win.video_listbox.count() == 1, timeout=5000)
+    win.video_listbox.setCurrentRow(0)
+    win.load_formats_for_selection()
+    qtbot.waitUntil(lambda: win.progress_label.text() == "Formats loaded.", timeout=5000)
+    monitor.timer.stop()
+
+    assert '720' in win.q_combo.itemText(1)
+    assert monitor.max_gap < LATENCY_BUDGET, f"event loop blocked for {monitor.max_gap:.3f}s"
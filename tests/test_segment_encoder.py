@@ -0,0 +1,31 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from segment_encoder import plan_segments, segment_durations, concat_command
+
+
+def test_segments_are_cut_at_nearest_keyframes():
+    keyframes = [0.0, 95.0, 190.0, 310.0, 400.0]
+    segments = plan_segments(keyframes, 400.0, 4, min_length=30)
+    assert segments == [(0.0, 95.0), (95.0, 190.0), (190.0, 310.0), (310.0, None)]
+    assert segment_durations(segments, 400.0) == [95.0, 95.0, 120.0, 90.0]
+
+
+def test_short_or_keyframe_poor_inputs_stay_whole():
+    assert plan_segments([0.0, 10.0], 50.0, 8, min_length=30) == [(0.0, None)]
+    # one keyframe near the end: the tail would be too short to stand alone
+    assert plan_segments([0.0, 590.0], 600.0, 4, min_length=30) == [(0.0, None)]
+
+
+def test_concat_list_quotes_paths(tmp_path):
+    part = tmp_path / "it's.mkv"
+    list_path = str(tmp_path / 'list.txt')
+    cmd = concat_command([str(part)], list_path, 'out.mp4', audio_file='a.mka')
+    with open(list_path) as f:
+        assert f.read() == f"file '{str(part).replace(chr(39), chr(39) + chr(92) + chr(39) + chr(39))}'\n"
+    assert cmd[-7:] == ['-map', '0:v', '-map', '1:a', '-c', 'copy', 'out.mp4']
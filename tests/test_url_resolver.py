@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from url_resolver import UrlResolver
+
+
+class FakeResponse:
+    def __init__(self, url, status_code=200):
+        self.url = url
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, head_status=200):
+        self.head_status = head_status
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def head(self, url, **kwargs):
+        with self.lock:
+            self.calls.append(('HEAD', url))
+        return FakeResponse(url + '/final', self.head_status)
+
+    def get(self, url, **kwargs):
+        assert kwargs.get('stream') is True
+        with self.lock:
+            self.calls.append(('GET', url))
+        return FakeResponse(url + '/streamed')
+
+    def close(self):
+        pass
+
+
+def test_canonical_hosts_skip_requests_and_results_are_cached():
+    session = FakeSession()
+    r = UrlResolver(session=session)
+    assert r.resolve('https://www.youtube.com/watch?v=x') == 'https://www.youtube.com/watch?v=x'
+    assert r.resolve('https://youtu.be/x') == 'https://youtu.be/x'
+    assert r.resolve('https://fb.watch/abc') == 'https://fb.watch/abc/final'
+    assert r.resolve('https://fb.watch/abc') == 'https://fb.watch/abc/final'
+    assert session.calls == [('HEAD', 'https://fb.watch/abc')]
+
+
+def test_head_refused_falls_back_to_streamed_get():
+    session = FakeSession(head_status=405)
+    r = UrlResolver(session=session)
+    assert r.resolve('https://example.com/s') == 'https://example.com/s/streamed'
+    assert session.calls == [('HEAD', 'https://example.com/s'), ('GET', 'https://example.com/s')]
+
+
+def test_resolve_many_keeps_order_and_dedupes():
+    session = FakeSession()
+    r = UrlResolver(session=session, max_workers=4)
+    urls = ['https://a.example/1', 'https://youtu.be/z', 'https://a.example/2', 'https://a.example/1']
+    assert r.resolve_many(urls) == [
+        'https://a.example/1/final', 'https://youtu.be/z', 'https://a.example/2/final', 'https://a.example/1/final']
+    assert sorted(session.calls) == [('HEAD', 'https://a.example/1'), ('HEAD', 'https://a.example/2')]
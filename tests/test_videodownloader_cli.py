@@ -0,0 +1,161 @@
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from contextlib import contextmanager
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import conversion_engine
+import media_probe
+import videodownloader
+from download_core import history_record
+from history_db import log_download, init_history_db
+from media_probe import ConversionPlan, REMUX
+
+
+class FakeYDL:
+    def __init__(self, opts, fail_urls=()):
+        self.opts = opts
+        self.fail_urls = fail_urls
+
+    def extract_info(self, url, download=True):
+        if url in self.fail_urls:
+            raise RuntimeError('Unsupported URL')
+        home = self.opts['paths']['home']
+        path = os.path.join(home, url.rsplit('/', 1)[-1] + '.mkv')
+        with open(path, 'w') as f:
+            f.write('x' * 10)
+        for hook in self.opts['progress_hooks']:
+            hook({'status': 'downloading', 'downloaded_bytes': 5, 'total_bytes': 10})
+            hook({'status': 'finished', 'filename': path})
+        return {'title': url.rsplit('/', 1)[-1], 'extractor': 'fake', 'filepath': path, 'duration': 12}
+
+
+class FakePool:
+    def __init__(self, fail_urls=()):
+        self.fail_urls = fail_urls
+        self.opts = []
+
+    @contextmanager
+    def session(self, opts):
+        self.opts.append(opts)
+        yield FakeYDL(opts, self.fail_urls)
+
+
+def _run(argv, monkeypatch, pool=None):
+    if pool is not None:
+        monkeypatch.setattr(videodownloader, '_ydl_pool', lambda: pool)
+    out = io.StringIO()
+    code = videodownloader.main(argv, stream=out)
+    return code, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_import_does_not_load_qt_or_ytdlp():
+    code = ("import sys, videodownloader; "
+            "print(sorted(m for m in ('PyQt5', 'yt_dlp') if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == '[]'
+
+
+def test_download_reports_json_lines_and_exit_code(tmp_path, monkeypatch):
+    db = str(tmp_path / 'hist.db')
+    pool = FakePool(fail_urls={'https://example.com/bad'})
+    code, events = _run(['download', '--history-db', db, '--no-resolve', '-o', str(tmp_path / 'dl'),
+                         '-q', '720p', '--retries', '2', '-j', '2',
+                         'https://example.com/one', 'https://example.com/bad'], monkeypatch, pool)
+
+    assert code == videodownloader.EXIT_FAILED
+    kinds = [e['event'] for e in events]
+    assert kinds[-1] == 'summary' and events[-1]['ok'] == 1 and events[-1]['fail'] == 1
+    assert 'progress' in kinds and kinds.count('retry') == 1
+    done = next(e for e in events if e['event'] == 'done')
+    assert done['file'].endswith('one.mkv')
+    assert pool.opts[0]['format'] == 'bestvideo[height<=720]+bestaudio/best'
+    assert pool.opts[0]['download_archive'] == os.path.join(str(tmp_path / 'dl'), 'downloaded_videos.txt')
+
+    conn = sqlite3.connect(db)
+    rows = sorted(conn.execute('SELECT url, status, file_size, duration FROM downloads'))
+    conn.close()
+    assert rows == [('https://example.com/bad', 'Failed', 0, 0), ('https://example.com/one', 'Completed', 10, 12)]
+
+
+def test_batch_resumes_failed_items(tmp_path, monkeypatch):
+    db = str(tmp_path / 'hist.db')
+    url_file = tmp_path / 'urls.txt'
+    url_file.write_text('https://example.com/a\nnot a url\nhttps://example.com/b\n')
+    argv = ['batch', '--history-db', db, '--no-resolve', '-o', str(tmp_path / 'dl'), str(url_file)]
+
+    code, events = _run(argv, monkeypatch, FakePool(fail_urls={'https://example.com/b'}))
+    assert code == videodownloader.EXIT_FAILED
+    assert events[-1] == {'event': 'summary', 'ok': 1, 'fail': 1, 'total': 2, 'done': 1}
+
+    # Only the failed item runs again
+    pool = FakePool()
+    code, events = _run(argv, monkeypatch, pool)
+    assert code == videodownloader.EXIT_OK
+    assert events[0] == {'event': 'resume', 'remaining': 1, 'total': 2}
+    assert [e['url'] for e in events if e['event'] == 'start'] == ['https://example.com/b']
+
+    # Editing the list: a removed URL is not downloaded and totals follow the file
+    url_file.write_text('https://example.com/a\nhttps://example.com/c\n')
+    pool = FakePool(fail_urls={'https://example.com/c'})
+    _run(argv, monkeypatch, pool)
+    url_file.write_text('https://example.com/a\n')
+    code, events = _run(argv, monkeypatch, FakePool())
+    assert code == videodownloader.EXIT_OK
+    assert not [e for e in events if e['event'] == 'start']
+    assert events[-1] == {'event': 'summary', 'ok': 0, 'fail': 0, 'total': 1, 'done': 1}
+
+    empty = tmp_path / 'empty.txt'
+    empty.write_text('nothing here\n')
+    code, events = _run(['batch', '--history-db', db, str(empty)], monkeypatch)
+    assert code == videodownloader.EXIT_USAGE and events[0]['event'] == 'error'
+
+
+def test_convert_skips_up_to_date_outputs(tmp_path, monkeypatch):
+    db = str(tmp_path / 'hist.db')
+    folder = tmp_path / 'videos'
+    folder.mkdir()
+    for name in ('a.mkv', 'b.avi', 'c.mp4'):
+        (folder / name).write_bytes(b'data')
+
+    def fake_run_ffmpeg(cmd, duration=None, on_progress=None, on_start=None, **kwargs):
+        with open(cmd[-1], 'wb') as f:
+            f.write(b'mp4')
+        return 0, ''
+
+    monkeypatch.setattr(conversion_engine, 'run_ffmpeg', fake_run_ffmpeg)
+    monkeypatch.setattr(conversion_engine, 'probe_duration', lambda path: None)
+    monkeypatch.setattr(media_probe, 'mp4_command', lambda i, o: (['ffmpeg', '-i', i, o], ConversionPlan(REMUX, [])))
+
+    code, events = _run(['convert', '--history-db', db, str(folder)], monkeypatch)
+    assert code == videodownloader.EXIT_OK
+    assert sorted(os.path.basename(e['output']) for e in events if e['event'] == 'done') == ['a.mp4', 'b.mp4']
+
+    code, events = _run(['convert', '--history-db', db, str(folder)], monkeypatch)
+    assert code == videodownloader.EXIT_OK
+    assert [e['reason'] for e in events if e['event'] == 'skipped'] == ['Up to date', 'Up to date']
+    assert events[-1]['skipped'] == 2
+
+    code, events = _run(['convert', '--history-db', db, str(tmp_path / 'missing.mkv')], monkeypatch)
+    assert code == videodownloader.EXIT_USAGE
+
+
+def test_history_filters_records(tmp_path, monkeypatch):
+    db = str(tmp_path / 'hist.db')
+    init_history_db(db)
+    log_download(db, history_record('https://example.com/1', 'First clip', 'Video', 'Completed'))
+    log_download(db, history_record('https://example.com/2', 'Second clip', 'Audio', 'Failed'))
+
+    code, rows = _run(['history', '--history-db', db], monkeypatch)
+    assert code == videodownloader.EXIT_OK
+    assert [r['title'] for r in rows] == ['Second clip', 'First clip']
+
+    _, rows = _run(['history', '--history-db', db, '--status', 'Completed', '--search', 'clip'], monkeypatch)
+    assert [r['title'] for r in rows] == ['First clip']
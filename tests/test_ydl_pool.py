@@ -0,0 +1,67 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+
+from ydl_pool import YoutubeDLPool
+
+
+def test_pool_reuses_instance_and_swaps_item_options(tmp_path):
+    yt_dlp = pytest.importorskip('yt_dlp')
+    built = []
+
+    def factory(opts):
+        ydl = yt_dlp.YoutubeDL(opts)
+        built.append(ydl)
+        return ydl
+
+    pool = YoutubeDLPool(factory=factory)
+    seen = []
+    base = {'quiet': True, 'http_headers': {'Referer': 'http://x'}}
+
+    with pool.session(dict(base, format='best', outtmpl='a.%(ext)s',
+                           progress_hooks=[lambda d: seen.append(('a', d))])) as first:
+        first._progress_hooks[0]({'status': 'downloading'})
+
+    with pool.session(dict(base, format='worst', paths={'home': '/tmp/b'},
+                           progress_hooks=[lambda d: seen.append(('b', d))])) as second:
+        assert second is first
+        assert second.params['format'] == 'worst'
+        assert second.params['paths'] == {'home': '/tmp/b'}
+        # the first item's template does not leak into the second one
+        assert second.params['outtmpl']['default'] != 'a.%(ext)s'
+        second._progress_hooks[0]({'status': 'finished'})
+
+    assert [tag for tag, _ in seen] == ['a', 'b']
+
+    # different cookies/headers need a separate instance
+    with pool.session(dict(base, cookiefile=str(tmp_path / 'cookies.txt'))) as other:
+        assert other is not first
+    assert len(built) == 2
+    pool.close()
+
+
+def test_pool_does_not_keep_objects_without_params():
+    closed = []
+
+    class Fake:
+        def __init__(self, opts):
+            self.opts = opts
+        def __enter__(self):
+            return self
+        def __exit__(self, *a):
+            closed.append(self)
+            return False
+
+    pool = YoutubeDLPool(factory=Fake)
+    with pool.session({'format': 'best'}) as a:
+        assert a.opts['format'] == 'best'
+    with pool.session({'format': 'best'}) as b:
+        pass
+    assert a is not b
+    assert closed == [a, b]
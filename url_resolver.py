@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+URL resolver for Enhanced YouTube Downloader
+Follows share/redirect links once per TTL over a pooled HTTP session
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from download_scheduler import host_of
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36'
+# Hosts whose URLs yt-dlp handles directly; resolving them only costs a round trip
+CANONICAL_HOSTS = frozenset({'youtube.com', 'youtu.be', 'm.youtube.com', 'music.youtube.com', 'youtube-nocookie.com'})
+DEFAULT_TTL = 60 * 60
+DEFAULT_TIMEOUT = (5, 10)  # connect, read
+DEFAULT_MAX_WORKERS = 8
+
+
+def is_canonical(url: str) -> bool:
+    host = host_of(url)
+    return host in CANONICAL_HOSTS or host.endswith('.youtube.com')
+
+
+class UrlResolver:
+    """Resolve redirecting URLs (share links, shorteners) to their final target.
+
+    Requests go through one ``requests.Session`` so connections are pooled.
+    A HEAD request is tried first; servers that reject it get a streamed GET
+    whose body is never read. Results are cached for ``ttl`` seconds and
+    canonical hosts are returned unchanged without any request. On any error
+    the input URL is returned, like yt-dlp would receive it anyway.
+    """
+
+    def __init__(self, session=None, ttl=DEFAULT_TTL, timeout=DEFAULT_TIMEOUT, max_workers=DEFAULT_MAX_WORKERS):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._session = session
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = USER_AGENT
+                self._session = session
+            return self._session
+
+    def _cached(self, url):
+        with self._lock:
+            item = self._cache.get(url)
+            if item is None:
+                return None
+            stamp, final = item
+            if time.time() - stamp >= self.ttl:
+                del self._cache[url]
+                return None
+            return final
+
+    def _follow(self, url):
+        session = self.session
+        resp = session.head(url, allow_redirects=True, timeout=self.timeout)
+        try:
+            if resp.status_code < 400:
+                return resp.url or url
+        finally:
+            resp.close()
+        # HEAD not allowed (405) or refused: stream a GET and drop the body unread
+        resp = session.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+        try:
+            return resp.url or url
+        finally:
+            resp.close()
+
+    def resolve(self, url: str) -> str:
+        """Final URL after redirects (cached), or ``url`` itself"""
+        if not url or is_canonical(url):
+            return url
+        final = self._cached(url)
+        if final is not None:
+            return final
+        try:
+            final = self._follow(url)
+        except Exception as e:
+            logging.info('Could not resolve %s: %s', url, e)
+            return url
+        with self._lock:
+            self._cache[url] = (time.time(), final)
+        return final
+
+    def resolve_many(self, urls) -> list:
+        """Resolve several URLs concurrently; results keep the input order"""
+        urls = list(urls)
+        unique = [u for u in dict.fromkeys(urls) if u and not is_canonical(u) and self._cached(u) is None]
+        resolved = {}
+        if unique:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique))) as pool:
+                resolved = dict(zip(unique, pool.map(self.resolve, unique)))
+        return [resolved[u] if u in resolved else self.resolve(u) for u in urls]
+
+    def close(self):
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Command line interface for Enhanced YouTube Downloader
+Headless download, batch, convert and history commands that print JSON-lines progress
+
+    python -m videodownloader download URL... [--mode Audio] [--quality 720]
+    python -m videodownloader batch urls.txt
+    python -m videodownloader convert FILE_OR_FOLDER... [--force]
+    python -m videodownloader history [--limit 20] [--status Failed]
+
+Never imports PyQt5; yt-dlp is only imported by the commands that download.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+
+from download_core import (DEFAULT_DOWNLOAD_DIR, SETTINGS_FILE, ARCHIVE_NAME, MODES, DEFAULT_RETRIES,
+                           default_history_db_path, height_selector, read_url_list, run_batch, download_urls)
+from history_db import init_history_db, history_rows
+from download_scheduler import DownloadScheduler, DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT
+from history_writer import HistoryWriter
+
+EXIT_OK = 0
+# Some items failed (the rest were done)
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+class JsonLines:
+    """Thread-safe writer of one JSON object per line"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def __call__(self, event: dict):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+
+def load_settings(path=SETTINGS_FILE) -> dict:
+    """The window's settings.json, so both front ends share limits and the history DB"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+        return settings if isinstance(settings, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def quality_for(mode, quality) -> str:
+    """yt-dlp format selector for ``--quality``: a height ('720'), 'best', or a raw selector"""
+    if mode == 'Audio' and not quality:
+        return 'bestaudio/best'
+    quality = (quality or 'best').strip()
+    if quality.lower().rstrip('p').isdigit():
+        return height_selector(quality.lower().rstrip('p'))
+    return quality
+
+
+def _scheduler(args, settings, emit):
+    def on_progress(percent):
+        emit({'event': 'progress', 'percent': percent})
+
+    return DownloadScheduler(
+        max_workers=args.workers or settings.get('max_concurrent_downloads', DEFAULT_MAX_WORKERS),
+        per_host_limit=args.per_host or settings.get('per_host_limit', DEFAULT_PER_HOST_LIMIT),
+        bandwidth_limit=int(args.limit_rate if args.limit_rate is not None
+                            else settings.get('bandwidth_limit_kbps', 0) or 0) * 1024,
+        on_progress=on_progress,
+    )
+
+
+def _ydl_pool():
+    # Imported here so 'history' and 'convert' start without loading yt-dlp
+    from yt_dlp import YoutubeDL
+    from ydl_pool import YoutubeDLPool
+    return YoutubeDLPool(factory=lambda opts: YoutubeDL(opts))
+
+
+def _resolver(args):
+    if args.no_resolve:
+        return None
+    from url_resolver import UrlResolver
+    return UrlResolver()
+
+
+def _summary(emit, counts):
+    emit(dict(counts, event='summary'))
+    return EXIT_FAILED if counts.get('fail') else EXIT_OK
+
+
+def cmd_download(args, settings, emit):
+    mode = args.mode.capitalize()
+    download_dir = args.output or DEFAULT_DOWNLOAD_DIR
+    archive = None if args.no_archive else os.path.join(download_dir, ARCHIVE_NAME)
+    writer = HistoryWriter(args.history_db)
+    try:
+        counts = download_urls(args.urls, mode, quality_for(mode, args.quality), download_dir,
+                               _scheduler(args, settings, emit), _ydl_pool(), args.history_db,
+                               resolver=_resolver(args), cookies_path=args.cookies, archive_file=archive,
+                               lang=args.lang, retries=args.retries, on_event=emit, log=writer.submit)
+    finally:
+        writer.close()
+    return _summary(emit, counts)
+
+
+def cmd_batch(args, settings, emit):
+    try:
+        urls = read_url_list(args.file)
+    except OSError as e:
+        emit({'event': 'error', 'error': str(e)})
+        return EXIT_USAGE
+    if not urls:
+        emit({'event': 'error', 'error': 'No valid URLs found in the file.'})
+        return EXIT_USAGE
+    from batch_queue import BatchJobQueue
+    download_dir = args.output or DEFAULT_DOWNLOAD_DIR
+    writer = HistoryWriter(args.history_db)
+    try:
+        counts = run_batch(urls, BatchJobQueue.batch_key_for(args.file), args.history_db, download_dir,
+                           _scheduler(args, settings, emit), _ydl_pool(), resolver=_resolver(args),
+                           cookies_path=args.cookies, on_event=emit, log=writer.submit)
+    finally:
+        writer.close()
+    return _summary(emit, counts)
+
+
+def _convert_inputs(paths):
+    """Files named on the command line plus the videos found in named folders"""
+    from folder_scanner import FolderScanner
+    scanner = None
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            scanner = scanner or FolderScanner()
+            found.extend(p for p in scanner.scan(path) if not p.lower().endswith('.mp4'))
+        else:
+            found.append(path)
+    return found
+
+
+def cmd_convert(args, settings, emit):
+    from conversion_cache import ConversionCache
+    from conversion_engine import ConversionJob, ConversionPool, auto_workers
+    from media_probe import mp4_command, MP4_CONVERSION_SETTINGS
+
+    inputs = _convert_inputs(args.inputs)
+    missing = [p for p in inputs if not os.path.isfile(p)]
+    if missing:
+        emit({'event': 'error', 'error': 'File not found', 'files': missing})
+        return EXIT_USAGE
+    pairs = []
+    for input_file in inputs:
+        output_file = os.path.splitext(input_file)[0] + '.mp4'
+        if os.path.normcase(os.path.abspath(input_file)) == os.path.normcase(os.path.abspath(output_file)):
+            emit({'event': 'skipped', 'input': input_file, 'reason': 'Already MP4'})
+        else:
+            pairs.append((input_file, output_file))
+    cache = ConversionCache(args.history_db)
+    current = set() if args.force else cache.up_to_date(pairs, MP4_CONVERSION_SETTINGS)
+    for input_file, output_file in pairs:
+        if output_file in current:
+            emit({'event': 'skipped', 'input': input_file, 'output': output_file, 'reason': 'Up to date'})
+
+    def prepare(job):
+        # Probing happens on the pool thread, not while the job list is built
+        job.cmd, _ = mp4_command(job.input_file, job.output_file)
+        job.passes = [job.cmd]
+
+    jobs = [ConversionJob(i, o, prepare=prepare) for i, o in pairs if o not in current]
+    last = {}
+
+    def on_progress(job, percent):
+        value = int(percent)
+        if last.get('percent') != value:
+            last['percent'] = value
+            emit({'event': 'progress', 'percent': value})
+
+    def on_job_done(job):
+        if job.ok:
+            cache.record(job.input_file, job.output_file, MP4_CONVERSION_SETTINGS)
+            emit({'event': 'done', 'input': job.input_file, 'output': job.output_file})
+        else:
+            emit({'event': 'failed', 'input': job.input_file, 'error': job.error})
+
+    workers = args.workers or auto_workers({'output_format': 'mp4'}, max(1, len(jobs)))
+    pool = ConversionPool(max_workers=workers, on_progress=on_progress, on_job_done=on_job_done)
+    # Run off the main thread so Ctrl+C can stop the ffmpeg processes instead of waiting for them
+    runner = threading.Thread(target=pool.run, args=(jobs,), daemon=True)
+    runner.start()
+    try:
+        while runner.is_alive():
+            runner.join(0.2)
+    except KeyboardInterrupt:
+        pool.cancel()
+        runner.join()
+        raise
+    failed = sum(1 for job in jobs if not job.ok)
+    return _summary(emit, {'ok': len(jobs) - failed, 'fail': failed, 'skipped': len(inputs) - len(jobs),
+                           'total': len(inputs)})
+
+
+def cmd_history(args, settings, emit):
+    init_history_db(args.history_db)
+    for row in history_rows(args.history_db, limit=args.limit, status=args.status, search=args.search):
+        emit(row)
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--history-db', help='History database (default: the one the window uses)')
+    common.add_argument('--log-file', help='Write log messages to this file')
+    parser = argparse.ArgumentParser(prog='python -m videodownloader',
+                                     description='Download and convert media without the GUI. '
+                                                 'Progress is printed as JSON lines.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def download_args(p):
+        p.add_argument('-o', '--output', help='Download folder')
+        p.add_argument('--cookies', help='cookies.txt for sites that need a login')
+        p.add_argument('-j', '--workers', type=int, help='Parallel downloads')
+        p.add_argument('--per-host', type=int, help='Parallel downloads per site')
+        p.add_argument('--limit-rate', type=int, help='Total bandwidth limit in KiB/s (0 = unlimited)')
+        p.add_argument('--no-resolve', action='store_true', help='Do not follow share/redirect links first')
+
+    p = sub.add_parser('download', help='Download videos or playlists', parents=[common])
+    p.add_argument('urls', nargs='+', metavar='URL')
+    p.add_argument('-m', '--mode', choices=[m.lower() for m in MODES], type=str.lower, default='video')
+    p.add_argument('-q', '--quality', help="Height (720), 'best', 'worst' or a yt-dlp format selector")
+    p.add_argument('--lang', default='en', help='Captions language')
+    p.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='Attempts per URL')
+    p.add_argument('--no-archive', action='store_true', help='Download again even if already archived')
+    download_args(p)
+    p.set_defaults(func=cmd_download)
+
+    p = sub.add_parser('batch', help='Download every URL of a text file (resumable)', parents=[common])
+    p.add_argument('file')
+    download_args(p)
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser('convert', help='Convert files (or the videos in folders) to MP4', parents=[common])
+    p.add_argument('inputs', nargs='+', metavar='PATH')
+    p.add_argument('-j', '--workers', type=int, help='Parallel ffmpeg processes')
+    p.add_argument('--force', action='store_true', help='Convert even if the MP4 is up to date')
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser('history', help='Print download history records', parents=[common])
+    p.add_argument('-n', '--limit', type=int, default=50)
+    p.add_argument('--status', help='Only records with this status (Completed, Failed)')
+    p.add_argument('--search', help='Only records whose title or URL contains this text')
+    p.set_defaults(func=cmd_history)
+    return parser
+
+
+def main(argv=None, stream=None) -> int:
+    args = build_parser().parse_args(argv)
+    settings = load_settings()
+    args.history_db = args.history_db or settings.get('history_db') or default_history_db_path()
+    # stdout carries the JSON lines; without a log file only warnings go to stderr
+    logging.basicConfig(filename=args.log_file, level=logging.INFO if args.log_file else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    emit = JsonLines(stream)
+    if args.command != 'history':
+        init_history_db(args.history_db)
+    try:
+        return args.func(args, settings, emit)
+    except KeyboardInterrupt:
+        emit({'event': 'interrupted'})
+        return EXIT_INTERRUPTED
+
+
+if __name__ == '__main__':
+    sys.exit(main())
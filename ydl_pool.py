@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Pooled YoutubeDL sessions for Enhanced YouTube Downloader
+Reuses YoutubeDL objects (extractors, cookie jar, HTTP connections) across items
+"""
+
+import json
+import logging
+import threading
+from contextlib import contextmanager
+
+# Options that may differ from one item to the next without rebuilding the object
+ITEM_OPTIONS = ('format', 'outtmpl', 'paths', 'playlist_items', 'ratelimit')
+HOOK_OPTIONS = ('progress_hooks', 'postprocessor_hooks')
+
+
+def _default_outtmpl():
+    try:
+        from yt_dlp.utils import DEFAULT_OUTTMPL
+        return dict(DEFAULT_OUTTMPL)
+    except Exception:
+        return {'default': '%(title)s [%(id)s].%(ext)s'}
+
+
+def session_key(opts: dict) -> str:
+    """Key identifying which pooled instances can serve ``opts``.
+
+    Everything except per-item options and hooks (cookie file, headers,
+    post-processors, archive, ...) has to match.
+    """
+    base = {k: v for k, v in opts.items() if k not in ITEM_OPTIONS and k not in HOOK_OPTIONS}
+    return json.dumps(base, sort_keys=True, default=repr)
+
+
+class _PooledYDL:
+    """A YoutubeDL instance plus the per-lease state layered on top of it"""
+
+    def __init__(self, factory, opts):
+        self.progress_hooks = list(opts.get('progress_hooks') or [])
+        self.postprocessor_hooks = list(opts.get('postprocessor_hooks') or [])
+        build_opts = dict(opts)
+        build_opts['progress_hooks'] = [self._dispatch_progress]
+        build_opts['postprocessor_hooks'] = [self._dispatch_postprocessor]
+        self.ydl = factory(build_opts)
+        self.params = getattr(self.ydl, 'params', None)
+        # Output templates of other types (subtitles, thumbnails, ...) stay as built;
+        # the ones this item set fall back to yt-dlp's defaults for later items
+        self.base_outtmpl = {}
+        if self.params is not None:
+            item_outtmpl = opts.get('outtmpl')
+            if isinstance(item_outtmpl, dict):
+                item_keys = set(item_outtmpl)
+            else:
+                item_keys = {'default'} if item_outtmpl else set()
+            self.base_outtmpl = {k: v for k, v in (self.params.get('outtmpl') or {}).items() if k not in item_keys}
+            self.base_outtmpl.update({k: v for k, v in _default_outtmpl().items() if k in item_keys})
+
+    @property
+    def reusable(self):
+        return self.params is not None and hasattr(self.ydl, 'build_format_selector')
+
+    def _dispatch_progress(self, d):
+        for hook in list(self.progress_hooks):
+            hook(d)
+
+    def _dispatch_postprocessor(self, d):
+        for hook in list(self.postprocessor_hooks):
+            hook(d)
+
+    def apply(self, opts):
+        """Switch the live instance over to another item's options"""
+        self.progress_hooks = list(opts.get('progress_hooks') or [])
+        self.postprocessor_hooks = list(opts.get('postprocessor_hooks') or [])
+        for key in ITEM_OPTIONS:
+            value = opts.get(key)
+            if key == 'outtmpl':
+                outtmpl = dict(self.base_outtmpl)
+                if isinstance(value, dict):
+                    outtmpl.update(value)
+                elif value:
+                    outtmpl['default'] = value
+                self.params['outtmpl'] = outtmpl
+                continue
+            if value is None:
+                self.params.pop(key, None)
+            else:
+                self.params[key] = value
+            if key == 'format':
+                self.ydl.format_selector = (
+                    value if value in (None, '-') or callable(value)
+                    else self.ydl.build_format_selector(value))
+
+    def close(self):
+        try:
+            if hasattr(self.ydl, 'close'):
+                self.ydl.close()
+            else:
+                self.ydl.__exit__(None, None, None)
+        except Exception:
+            logging.exception('Failed to close YoutubeDL instance')
+
+
+class YoutubeDLPool:
+    """Lease YoutubeDL objects keyed by their session options.
+
+    ``factory`` builds a new instance from an options dict (defaults to
+    ``yt_dlp.YoutubeDL``). Each lease is used by a single thread; concurrent
+    callers with the same key get separate instances, and up to
+    ``max_idle`` instances per key are kept alive between leases.
+    """
+
+    def __init__(self, factory=None, max_idle=8):
+        if factory is None:
+            from yt_dlp import YoutubeDL
+            factory = YoutubeDL
+        self._factory = factory
+        self._max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @contextmanager
+    def session(self, opts: dict):
+        """Yield a YoutubeDL configured with ``opts``; usable like ``with YoutubeDL(opts)``"""
+        key = session_key(opts)
+        pooled = None
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                pooled = idle.pop()
+        if pooled is not None:
+            pooled.apply(opts)
+        else:
+            pooled = _PooledYDL(self._factory, opts)
+        try:
+            yield pooled.ydl
+        finally:
+            pooled.progress_hooks = []
+            pooled.postprocessor_hooks = []
+            self._release(key, pooled)
+
+    def _release(self, key, pooled):
+        if pooled.reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if not self._closed and len(idle) < self._max_idle:
+                    idle.append(pooled)
+                    return
+        pooled.close()
+
+    def close(self):
+        """Close every idle instance (saves cookie jars, drops HTTP connections)"""
+        with self._lock:
+            self._closed = True
+            pooled = [p for idle in self._idle.values() for p in idle]
+            self._idle.clear()
+        for p in pooled:
+            p.close()